@@ -0,0 +1,364 @@
+"""JSON API over the employees, clients, projects, tasks and project members.
+
+    GET  /api/tasks?fields=task_id,task_name,due_date&project_id=7&is_active=1&limit=100
+    GET  /api/tasks?after=<next token from the previous page>
+    GET  /api/tasks/123?fields=task_name,project_code
+    POST /api/batch   {"requests": ["/api/projects/7", "/api/members?project_id=7", ...]}
+    GET  /api/changes?after=<cursor>&resources=tasks,projects&rows=1
+
+`fields` picks the columns to return; only those are selected, and a join is
+added only when a picked field or the sort key needs it. Filters are the
+query arguments named in each resource's `filters`. Lists are paged by
+primary key with the keyset tokens of pagination.py. A batch runs its
+sub-requests (GETs of the paths above) one after another on a single pooled
+connection.
+
+/api/changes pages through the change log (see changes.py) for incremental
+sync: take the cursor from /api/changes?after=latest, copy the resources in
+full, then keep requesting ?after=<cursor> with the cursor of the previous
+batch while "more" is true. It is always read from the primary. With rows=1 each change carries the row as it
+is now (default fields, null once deleted), read with one query per
+resource and batch.
+
+Bodies are serialized with orjson when it is installed (dates as ISO 8601,
+decimals as strings), with the standard json module otherwise.
+"""
+import json
+from urllib.parse import parse_qsl, urlsplit
+
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+import changes
+import queries
+from export import json_default
+from pagination import Keyset, page_query, page_rows, page_size
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BATCH_MAX_REQUESTS = 50
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Resource:
+    """One API collection.
+
+    `fields` maps each field name to (SQL expression, join alias or None);
+    `joins` maps a join alias to its JOIN clause; `filters` maps a query
+    argument to (SQL condition, type); `key` is the primary key's fields,
+    which every list is sorted by.
+    """
+
+    def __init__(self, name, source, fields, joins, filters, key, default_fields=None):
+        self.name = name
+        self.source = source
+        self.fields = fields
+        self.joins = joins
+        self.filters = filters
+        self.key = key
+        self.default_fields = default_fields or tuple(fields)
+        self.keyset = Keyset(*((fields[f][0], f) for f in key))
+        self.conditions = queries.Filters(**{arg: condition for arg, (condition, _) in filters.items()})
+        # executions are counted under this name, whatever the fields and filters
+        self.query = queries.Query(f"api.{name}", self.select(self.default_fields))
+
+    def select(self, picked):
+        """SELECT ... FROM ... JOIN ... reading `picked` plus the key fields."""
+        names = list(dict.fromkeys(list(picked) + list(self.key)))
+        aliases = {self.fields[f][1] for f in names} - {None}
+        columns = ", ".join(f"{self.fields[f][0]} AS {f}" for f in names)
+        joins = " ".join(self.joins[alias] for alias in self.joins if alias in aliases)
+        return f"SELECT {columns} FROM {self.source} {joins}"
+
+    def pick(self, raw):
+        """The field names asked for by ?fields= (all default fields when absent)."""
+        if not raw:
+            return list(self.default_fields)
+        picked = [f.strip() for f in raw.split(",") if f.strip()]
+        unknown = [f for f in picked if f not in self.fields]
+        if unknown or not picked:
+            raise ApiError(400, f"Unknown field(s) {', '.join(unknown)}; {self.name} has "
+                                f"{', '.join(self.fields)}.")
+        return picked
+
+    def where(self, args):
+        values = {}
+        for arg, (_, kind) in self.filters.items():
+            raw = args.get(arg)
+            if raw is None or raw == "":
+                continue
+            try:
+                values[arg] = kind(raw)
+            except ValueError:
+                raise ApiError(400, f"Filter {arg} must be {kind.__name__}.")
+        return self.conditions.build(**values)
+
+
+RESOURCES = {r.name: r for r in (
+    Resource(
+        "employees", "employees e",
+        fields={
+            "employee_id": ("e.employee_id", None),
+            "employee_number": ("e.employee_number", None),
+            "first_name": ("e.first_name", None),
+            "last_name": ("e.last_name", None),
+            "email": ("e.email", None),
+            "phone": ("e.phone", None),
+            "hire_date": ("e.hire_date", None),
+            "department_id": ("e.department_id", None),
+            "department_name": ("d.department_name", "d"),
+            "job_title_id": ("e.job_title_id", None),
+            "title_name": ("j.title_name", "j"),
+            "is_active": ("e.is_active", None),
+        },
+        joins={
+            "d": "JOIN departments d ON d.department_id = e.department_id",
+            "j": "JOIN job_titles j ON j.job_title_id = e.job_title_id",
+        },
+        filters={
+            "is_active": ("e.is_active = %s", int),
+            "department_id": ("e.department_id = %s", int),
+            "job_title_id": ("e.job_title_id = %s", int),
+        },
+        key=("employee_id",),
+    ),
+    Resource(
+        "clients", "clients c",
+        fields={
+            "client_id": ("c.client_id", None),
+            "client_name": ("c.client_name", None),
+            "contact_name": ("c.contact_name", None),
+            "contact_email": ("c.contact_email", None),
+            "contact_phone": ("c.contact_phone", None),
+            "is_active": ("c.is_active", None),
+            "created_at": ("c.created_at", None),
+        },
+        joins={},
+        filters={"is_active": ("c.is_active = %s", int)},
+        key=("client_id",),
+    ),
+    Resource(
+        "projects", "projects p",
+        fields={
+            "project_id": ("p.project_id", None),
+            "project_code": ("p.project_code", None),
+            "project_name": ("p.project_name", None),
+            "client_id": ("p.client_id", None),
+            "client_name": ("c.client_name", "c"),
+            "start_date": ("p.start_date", None),
+            "end_date": ("p.end_date", None),
+            "status": ("p.status", None),
+            "is_active": ("p.is_active", None),
+        },
+        joins={"c": "JOIN clients c ON c.client_id = p.client_id"},
+        filters={
+            "is_active": ("p.is_active = %s", int),
+            "client_id": ("p.client_id = %s", int),
+            "status": ("p.status = %s", str),
+        },
+        key=("project_id",),
+    ),
+    Resource(
+        "tasks", "tasks t",
+        fields={
+            "task_id": ("t.task_id", None),
+            "task_name": ("t.task_name", None),
+            "task_status": ("t.task_status", None),
+            "due_date": ("t.due_date", None),
+            "project_id": ("t.project_id", None),
+            "project_code": ("p.project_code", "p"),
+            "project_name": ("p.project_name", "p"),
+            "employee_id": ("t.employee_id", None),
+            "first_name": ("e.first_name", "e"),
+            "last_name": ("e.last_name", "e"),
+            "is_active": ("t.is_active", None),
+        },
+        joins={
+            "p": "JOIN projects p ON p.project_id = t.project_id",
+            "e": "LEFT JOIN employees e ON e.employee_id = t.employee_id",
+        },
+        filters={
+            "is_active": ("t.is_active = %s", int),
+            "project_id": ("t.project_id = %s", int),
+            "employee_id": ("t.employee_id = %s", int),
+            "task_status": ("t.task_status = %s", str),
+        },
+        key=("task_id",),
+    ),
+    Resource(
+        "members", "project_members pm",
+        fields={
+            "project_id": ("pm.project_id", None),
+            "project_code": ("p.project_code", "p"),
+            "project_name": ("p.project_name", "p"),
+            "employee_id": ("pm.employee_id", None),
+            "employee_number": ("e.employee_number", "e"),
+            "first_name": ("e.first_name", "e"),
+            "last_name": ("e.last_name", "e"),
+        },
+        joins={
+            "p": "JOIN projects p ON p.project_id = pm.project_id",
+            "e": "JOIN employees e ON e.employee_id = pm.employee_id",
+        },
+        filters={
+            "project_id": ("pm.project_id = %s", int),
+            "employee_id": ("pm.employee_id = %s", int),
+        },
+        key=("project_id", "employee_id"),
+    ),
+)}
+
+
+def _resource(name):
+    resource = RESOURCES.get(name)
+    if resource is None:
+        raise ApiError(404, f"Unknown resource {name!r}; expected one of {', '.join(RESOURCES)}.")
+    return resource
+
+
+def _trim(rows, picked, resource):
+    """Drop the key fields that were only selected for paging."""
+    if set(resource.key) <= set(picked):
+        return rows
+    return [{f: row[f] for f in picked} for row in rows]
+
+
+def list_resource(conn, name, args):
+    """One page of a resource: {"data": [...], "page": {"limit", "next", "prev"}}."""
+    resource = _resource(name)
+    picked = resource.pick(args.get("fields"))
+    where_parts, params = resource.where(args)
+    sql, params, state = page_query(resource.select(picked), where_parts, params, resource.keyset,
+                                    page_size(args.get("limit")), args.get("after"), args.get("before"))
+    rows, page = page_rows(queries.fetch_all(conn, resource.query, params, sql=sql), resource.keyset, state)
+    return 200, {"data": _trim(rows, picked, resource), "page": page}
+
+
+def get_item(conn, name, pk, args):
+    """One row by primary key: {"data": {...}}."""
+    resource = _resource(name)
+    if len(resource.key) != 1:
+        raise ApiError(404, f"{name} has no single-column key; list it with filters instead.")
+    picked = resource.pick(args.get("fields"))
+    expr = resource.fields[resource.key[0]][0]
+    sql = f"{resource.select(picked)} WHERE {expr} = %s"
+    rows = queries.fetch_all(conn, resource.query, (pk,), sql=sql)
+    if not rows:
+        raise ApiError(404, f"No {name} row with id {pk}.")
+    return 200, {"data": _trim(rows, picked, resource)[0]}
+
+
+# change_log table -> resource
+CHANGE_RESOURCES = {"employees": "employees", "clients": "clients", "projects": "projects", "tasks": "tasks",
+                    "project_members": "members"}
+
+
+def list_changes(conn, args):
+    """A batch of changes after ?after=: {"data": [{"change_id", "resource", "key",
+    "operation", "changed_at"[, "row"]}, ...], "cursor", "more"}."""
+    after = args.get("after") or "0"
+    if after == "latest":
+        return 200, {"data": [], "cursor": changes.latest(conn), "more": False}
+    tables = None
+    if args.get("resources"):
+        wanted = [r.strip() for r in args["resources"].split(",") if r.strip()]
+        tables = [t for t, r in CHANGE_RESOURCES.items() if r in wanted]
+        unknown = set(wanted) - set(CHANGE_RESOURCES.values())
+        if unknown:
+            raise ApiError(400, f"Unknown resource(s) {', '.join(sorted(unknown))}; changes are logged for "
+                                f"{', '.join(CHANGE_RESOURCES.values())}.")
+
+    try:
+        entries, more, cursor = changes.since(conn, after, page_size(args.get("limit")), tables)
+    except ValueError:
+        raise ApiError(400, "after must be a cursor from an earlier response, or latest.")
+    rows = _current_rows(conn, entries) if args.get("rows") == "1" else None
+    data = []
+    for entry in entries:
+        resource = RESOURCES[CHANGE_RESOURCES[entry["table_name"]]]
+        item = {"change_id": entry["change_id"], "resource": resource.name,
+                "key": dict(zip(resource.key, entry["key"])), "operation": entry["operation"],
+                "changed_at": entry["changed_at"]}
+        if rows is not None:
+            item["row"] = rows.get((resource.name, entry["key"]))
+        data.append(item)
+    return 200, {"data": data, "cursor": cursor, "more": more}
+
+
+def _current_rows(conn, entries):
+    """{(resource name, key): row} for the rows the entries point at that still exist."""
+    keys = {}
+    for entry in entries:
+        keys.setdefault(CHANGE_RESOURCES[entry["table_name"]], set()).add(entry["key"])
+    found = {}
+    for name, wanted in keys.items():
+        resource = RESOURCES[name]
+        columns = [resource.fields[f][0] for f in resource.key]
+        if len(columns) == 1:
+            condition = f"{columns[0]} IN ({', '.join(['%s'] * len(wanted))})"
+        else:
+            # OR'd key pairs rather than (a, b) IN ((..)): SQLite only seeks by key with the former
+            pair = "(" + " AND ".join(f"{c} = %s" for c in columns) + ")"
+            condition = "(" + " OR ".join([pair] * len(wanted)) + ")"
+        params = [value for key in sorted(wanted) for value in key]
+        sql = f"{resource.select(resource.default_fields)} WHERE {condition}"
+        for row in queries.fetch_all(conn, resource.query, params, sql=sql):
+            found[(name, tuple(row[f] for f in resource.key))] = row
+    return found
+
+
+ROUTES = Map([
+    Rule("/api/changes", endpoint=list_changes, methods=["GET"]),
+    Rule("/api/<name>", endpoint=list_resource, methods=["GET"]),
+    Rule("/api/<name>/<int:pk>", endpoint=get_item, methods=["GET"]),
+])
+
+
+def handle(conn, path, args):
+    """(status, body) for a GET of `path` with query arguments `args`."""
+    try:
+        handler, view_args = ROUTES.bind("").match(path, method="GET")
+        return handler(conn, args=args, **view_args)
+    except ApiError as e:
+        return e.status, {"error": str(e)}
+    except HTTPException as e:
+        return e.code, {"error": e.description}
+
+
+def reads_primary(paths):
+    """True if any of these request paths must be answered from the primary: a
+    replica behind by more than a gap's lifetime would lose change log entries."""
+    if not isinstance(paths, list):
+        return False
+    return any(isinstance(path, str) and urlsplit(path).path.rstrip("/") == "/api/changes" for path in paths)
+
+
+def batch(conn, requests):
+    """Run each sub-request (a path with its query string) on `conn`, in order:
+    {"responses": [{"path", "status", "body"}, ...]}."""
+    if not isinstance(requests, list) or not all(isinstance(r, str) for r in requests):
+        raise ApiError(400, "Expected {\"requests\": [\"/api/...\", ...]}.")
+    if len(requests) > BATCH_MAX_REQUESTS:
+        raise ApiError(413, f"At most {BATCH_MAX_REQUESTS} requests per batch.")
+    responses = []
+    for path in requests:
+        url = urlsplit(path)
+        status, body = handle(conn, url.path, MultiDict(parse_qsl(url.query, keep_blank_values=True)))
+        responses.append({"path": path, "status": status, "body": body})
+    return 200, {"responses": responses}
+
+
+def dumps(body):
+    """`body` as JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(body, default=json_default)
+    return json.dumps(body, default=json_default, separators=(",", ":")).encode()
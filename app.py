@@ -1,8 +1,359 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-from final_project_db import get_connection
+import datetime
+import os
+import time
+
+from flask import (Flask, Response, render_template, request, redirect, url_for, flash, g, get_flashed_messages,
+                   jsonify, session, send_file, stream_template, stream_with_context, before_render_template,
+                   template_rendered)
+
+import api
+import changes
+import entity_cache
+import http_cache
+import instrumentation
+import jobs
+import metrics
+import queries
+import refdata
+import search_index
+import soft_delete
+import summaries
+import timeline
+import worker_stats
+import workload
+import final_project_db
+from final_project_db import get_connection, get_read_connection, pool_stats, replica_stats
+from employee_import import import_employees, read_csv
+from entity_cache import get_entity, invalidate_entity
+from export import MIMETYPES, count_query, stream_query
+from pagination import Keyset, page_query, page_rows, page_size, stream_page_rows
+from project_members import MODES, MembersChanged, apply_members, current_members, parse_ids
+from queries import (EMPLOYEES_LIST, CLIENTS_LIST, PROJECTS_LIST, TASKS_LIST, PROJECT_HEADER, PROJECT_MEMBERS,
+                     PROJECT_EXISTS, EMPLOYEE_FILTERS, CLIENT_FILTERS, PROJECT_FILTERS, TASK_FILTERS,
+                     active_only)
+from refdata import lookup, invalidate
 
 app = Flask(__name__)
 app.secret_key = "change-this-key"  # needed for flash messages
+app.config["SQL_DEBUG_PANEL"] = os.environ.get("SQL_DEBUG_PANEL") == "1"  # list each page's SQL at the bottom
+app.config["STREAM_LIST_PAGES"] = os.environ.get("STREAM_LIST_PAGES") == "1"  # render list pages as they are read
+
+# Sort keys for the paginated list pages (see pagination.py)
+EMPLOYEE_KEYSET = Keyset(("e.last_name", "last_name", str), ("e.first_name", "first_name", str),
+                         ("e.employee_id", "employee_id", int))
+CLIENT_KEYSET = Keyset(("client_name", "client_name", str))
+PROJECT_KEYSET = Keyset(("p.project_code", "project_code", str))
+# t.project_code, a copy of p.project_code (migration 0009): MySQL reads an ORDER BY off an
+# index only when every column comes from the first table
+TASK_KEYSET = Keyset(("t.project_code", "project_code", str),
+                     ("t.due_date IS NULL", lambda row: int(row["due_date"] is None), int),
+                     ("t.due_date", "due_date", str),
+                     ("t.task_name", "task_name", str),
+                     ("t.task_id", "task_id", int))
+
+def employee_filters(show):
+    return EMPLOYEE_FILTERS.build(is_active=active_only(show))
+
+
+def client_filters(show):
+    return CLIENT_FILTERS.build(is_active=active_only(show))
+
+
+def project_filters(show):
+    return PROJECT_FILTERS.build(is_active=active_only(show))
+
+
+def task_filters(project_id, show):
+    # Show only active tasks by default
+    return TASK_FILTERS.build(project_id=project_id or None, is_active=active_only(show))
+
+
+# -----------------------------------------
+# Per-request SQL instrumentation (see instrumentation.py)
+# -----------------------------------------
+@app.before_request
+def start_query_stats():
+    g.query_stats_token = instrumentation.begin_request()
+
+
+@app.after_request
+def add_query_stats(response):
+    stats = instrumentation.current()
+    if stats is None:
+        return response
+    if response.is_streamed:
+        # the headers go out before the body is read: see finish_streamed_request
+        return response
+    response.headers["Server-Timing"] = stats.server_timing()
+
+    if (app.config["SQL_DEBUG_PANEL"] and response.mimetype == "text/html"
+            and not response.is_streamed):
+        panel = render_template("_sql_panel.html", stats=stats, fingerprint=instrumentation.fingerprint)
+        body = response.get_data(as_text=True)
+        if "</body>" in body:
+            response.set_data(body.replace("</body>", panel + "</body>", 1))
+    return response
+
+
+@app.teardown_request
+def end_query_stats(exc):
+    token = g.pop("query_stats_token", None)
+    if token is None:
+        return
+    stats = instrumentation.end_request(token)
+    if exc is not None:
+        # after_request is skipped for unhandled errors
+        record_request_metrics(500, stats)
+
+
+# -----------------------------------------
+# Metrics (Prometheus, see metrics.py)
+# -----------------------------------------
+def _render_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+def _render_finished(sender, template, context, **extra):
+    started = g.pop("render_started", None)
+    if started is not None:
+        g.render_seconds = g.get("render_seconds", 0.0) + time.perf_counter() - started
+
+
+before_render_template.connect(_render_started, app)
+template_rendered.connect(_render_finished, app)
+
+
+def record_request_metrics(status, stats, endpoint=None, render_seconds=None):
+    if render_seconds is None:
+        render_seconds = g.get("render_seconds", 0.0)
+    metrics.registry.observe(endpoint or request.endpoint or "unmatched", status, stats.elapsed(),
+                             db_seconds=stats.db_time, render_seconds=render_seconds,
+                             queries=stats.query_count)
+
+
+def finish_streamed_request(status):
+    """A close callback for a streamed response: stops collecting the request's
+    stats and records its metrics once the body has been sent (or abandoned),
+    so they include the rows read and rendered while streaming."""
+    token = g.pop("query_stats_token")  # end_query_stats leaves it to us
+    request_g = g._get_current_object()  # the stream's template signals still add to it
+    endpoint = request.endpoint
+
+    def finish():
+        stats = instrumentation.end_request(token)
+        record_request_metrics(status, stats, endpoint=endpoint,
+                               render_seconds=request_g.get("render_seconds", 0.0))
+    return finish
+
+
+@app.after_request
+def add_request_metrics(response):
+    stats = instrumentation.current()
+    if stats is None:
+        return response
+    if response.is_streamed and "query_stats_token" in g:
+        response.call_on_close(finish_streamed_request(response.status_code))
+    else:
+        record_request_metrics(response.status_code, stats)
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    body = metrics.render(pool=pool_stats(), refdata=refdata.cache.stats(), entity=entity_cache.cache.stats(),
+                          http=http_cache.stats(), statements=queries.stats(), jobs=jobs.queue.stats(),
+                          replicas=replica_stats())
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/workers.json")
+def workers_json():
+    """Per-process stats of the pre-forked workers (see serve.py); empty under `python app.py`."""
+    worker_stats.current.flush()
+    return jsonify(master=os.getppid() if worker_stats.current.pid else None,
+                   workers=worker_stats.read_all())
+
+
+# -----------------------------------------
+# Read replicas (see final_project_db.get_read_connection)
+# -----------------------------------------
+@app.before_request
+def route_reads():
+    # a session that wrote in the last READ_YOUR_WRITES seconds reads the primary, so the
+    # page it is redirected to shows its change even if the replicas have not caught up
+    final_project_db.start_request(pinned=session.get("primary_until", 0) > time.time())
+
+
+@app.after_request
+def pin_after_write(response):
+    if final_project_db.wrote_in_request() and final_project_db.has_replicas():
+        session["primary_until"] = time.time() + final_project_db.READ_YOUR_WRITES
+    return response
+
+
+# -----------------------------------------
+# Conditional GETs for the list pages (see http_cache.py)
+# -----------------------------------------
+# list endpoint -> tables its page shows, whose changes must change its ETag
+LIST_PAGE_TABLES = {
+    "hrm_employees_list": ("employees",),
+    "pm_clients_list": ("clients",),
+    "pm_projects_list": ("projects", "clients"),
+    "pm_tasks_list": ("tasks", "projects", "employees"),
+}
+
+
+@app.before_request
+def conditional_list_page():
+    tables = LIST_PAGE_TABLES.get(request.endpoint)
+    if tables is None or request.method not in ("GET", "HEAD") or session.get("_flashes"):
+        return None  # a pending flash message makes the page a one-off
+
+    etag, changed_at = http_cache.validator(request.endpoint, tables)
+    g.list_page_validator = (etag, changed_at)
+    if request.if_none_match:
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304)
+    elif changed_at and request.if_modified_since and request.if_modified_since.timestamp() >= int(changed_at):
+        return Response(status=304)
+
+    if not app.config["SQL_DEBUG_PANEL"]:
+        g.page_cache_key = http_cache.page_key(request.endpoint, request.args, etag)
+        body = http_cache.cached_page(g.page_cache_key)
+        if body is not None:
+            g.pop("page_cache_key")
+            return Response(body, mimetype="text/html")
+    return None
+
+
+@app.after_request
+def add_list_page_validators(response):
+    validator = g.pop("list_page_validator", None)
+    if validator is None or response.status_code not in (200, 304):
+        return response
+    etag, changed_at = validator
+    response.set_etag(etag, weak=True)
+    if changed_at:
+        response.last_modified = changed_at
+    response.cache_control.private = True
+    response.cache_control.no_cache = True  # always revalidate, which costs a 304 at most
+
+    key = g.pop("page_cache_key", None)
+    if key is not None and response.status_code == 200 and not response.is_streamed:
+        http_cache.store_page(key, response.get_data())
+    return response
+
+
+@app.teardown_request
+def forget_table_versions(exc):
+    http_cache.changes_committed()
+
+
+def page_request():
+    """The page asked for by ?limit=&after=&before=, as page_query() keyword arguments."""
+    return {"limit": page_size(request.args.get("limit")),
+            "after": request.args.get("after"),
+            "before": request.args.get("before")}
+
+
+def add_page_links(page):
+    """Add prev/next links that keep the page's path and other query arguments."""
+    args = {**request.args.to_dict(), **(request.view_args or {})}
+    args.pop("after", None)
+    args.pop("before", None)
+    page["next_url"] = url_for(request.endpoint, **args, after=page["next"]) if page["next"] else None
+    page["prev_url"] = url_for(request.endpoint, **args, before=page["prev"]) if page["prev"] else None
+    return page
+
+
+def list_page(conn, query, where_parts, params, keyset):
+    """Fetch the page of a list query requested by the query string, with prev/next links."""
+    sql, params, state = page_query(query.sql, where_parts, params, keyset, **page_request())
+    rows, page = page_rows(queries.fetch_all(conn, query, params, sql=sql), keyset, state)
+    return rows, add_page_links(page)
+
+
+# -----------------------------------------
+# List page rendering: whole, or streamed with STREAM_LIST_PAGES=1
+# -----------------------------------------
+STREAM_BUFFER_SIZE = 16384  # characters of rendered rows per chunk sent
+
+
+def precompile_templates():
+    """Compile every template into the Jinja environment's cache, so no request
+    compiles one (run at import: in the gunicorn master, before forking)."""
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+
+precompile_templates()
+
+
+def streaming_list_pages():
+    # the SQL panel and the page cache both need the whole body once it is rendered; a
+    # HEAD response has no body to stream, and its Content-Length needs the whole of it
+    return (app.config["STREAM_LIST_PAGES"] and not app.config["SQL_DEBUG_PANEL"]
+            and request.method != "HEAD"
+            and (http_cache.pages is None or "page_cache_key" not in g))
+
+
+def render_list_page(template, name, conn, query, where_parts, params, keyset, **context):
+    """Render the requested page of a list query with `template`, the rows passed
+    as `name`. Closes `conn`."""
+    if streaming_list_pages():
+        return stream_list_page(template, name, conn, query, where_parts, params, keyset, **context)
+    try:
+        rows, page = list_page(conn, query, where_parts, params, keyset)
+    finally:
+        conn.close()
+    return render_template(template, **{name: rows}, page=page, **context)
+
+
+def stream_list_page(template, name, conn, query, where_parts, params, keyset, **context):
+    """A streamed response for render_list_page(). The page up to the table body
+    is sent as soon as the first batch of rows is read (queries.iter_rows);
+    the rest are read off the cursor while the template renders them and go
+    out in chunks of STREAM_BUFFER_SIZE, so neither the rows nor the HTML are
+    ever held in full. The prev/next links come last, once the rows are known.
+    `conn` is closed when the response is, whether or not its body was read."""
+    # pop the flashed messages now, while the session can still be saved: the
+    # template's get_flashed_messages() then reads them from the request context
+    get_flashed_messages()
+    sql, params, state = page_query(query.sql, where_parts, params, keyset, **page_request())
+    rows, page = stream_page_rows(queries.iter_rows(conn, query, params, sql=sql), keyset, state)
+    reading = []
+
+    def tracked():
+        reading.append(True)
+        yield from rows
+        add_page_links(page)
+
+    stream = tracked()
+    body = stream_template(template, **{name: stream}, page=page, **context)
+
+    def generate():
+        buffered, size, head = [], 0, True
+        for piece in body:
+            if head and reading:  # the first row is in: send the page up to it
+                yield "".join(buffered)
+                buffered, size, head = [], 0, False
+            buffered.append(piece)
+            size += len(piece)
+            if size >= STREAM_BUFFER_SIZE:
+                yield "".join(buffered)
+                buffered, size = [], 0
+        yield "".join(buffered)
+
+    def close():
+        # a client gone mid-page: finish with the cursor before the connection goes back
+        body.close()
+        stream.close()
+        conn.close()
+
+    response = Response(generate(), mimetype="text/html")
+    # the WSGI server closes the response even if it never reads the body
+    response.call_on_close(close)
+    return response
 
 
 # -----------------------------------------
@@ -12,46 +363,11 @@ app.secret_key = "change-this-key"  # needed for flash messages
 def hrm_employees_list():
     show = request.args.get("show", "active")  # active | all
 
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
+    conn = get_read_connection()
 
-    where_clause = ""
-    params = []
-
-    if show == "active":
-        where_clause = "WHERE e.is_active = %s"
-        params.append(1)
-
-    query = f"""
-        SELECT
-            e.employee_id,
-            e.employee_number,
-            e.first_name,
-            e.last_name,
-            e.email,
-            e.phone,
-            e.hire_date,
-            e.is_active,
-            d.department_name,
-            j.title_name
-        FROM employees e
-        JOIN departments d ON e.department_id = d.department_id
-        JOIN job_titles j ON e.job_title_id = j.job_title_id
-        {where_clause}
-        ORDER BY e.last_name, e.first_name
-    """
-
-    cur.execute(query, params)
-    employees = cur.fetchall()
-
-    cur.close()
-    conn.close()
-
-    return render_template(
-        "hrm/employees_list.html",
-        employees=employees,
-        show=show
-    )
+    where_parts, params = employee_filters(show)
+    return render_list_page("hrm/employees_list.html", "employees", conn, EMPLOYEES_LIST, where_parts, params,
+                            EMPLOYEE_KEYSET, show=show)
 
 
 # -----------------------------------------
@@ -62,12 +378,9 @@ def hrm_employee_add():
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
 
-    # dropdown data
-    cur.execute("SELECT department_id, department_name FROM departments WHERE is_active = 1 ORDER BY department_name;")
-    departments = cur.fetchall()
-
-    cur.execute("SELECT job_title_id, title_name FROM job_titles WHERE is_active = 1 ORDER BY title_name;")
-    job_titles = cur.fetchall()
+    # dropdown data (cached, see refdata.py)
+    departments = lookup("departments", cur)
+    job_titles = lookup("job_titles", cur)
 
     if request.method == "POST":
         employee_number = request.form["employee_number"].strip()
@@ -85,9 +398,12 @@ def hrm_employee_add():
                 (employee_number, first_name, last_name, email, phone, hire_date, department_id, job_title_id, is_active)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1)
             """, (employee_number, first_name, last_name, email, phone, hire_date, department_id, job_title_id))
+            employee_id = cur.lastrowid
+            summaries.employees_changed(conn, after=[{"department_id": department_id, "job_title_id": job_title_id,
+                                                      "is_active": 1}])
+            changes.record(conn, "employees", changes.INSERT, [employee_id])
+            http_cache.bump(conn, "employees")
             conn.commit()
-            flash("Employee added successfully.", "success")
-            return redirect(url_for("hrm_employees_list"))
         except Exception as e:
             conn.rollback()
             error_msg = str(e)
@@ -98,6 +414,13 @@ def hrm_employee_add():
                 flash("Email address already exists. Please use a different email.", "warning")
             else:
                 flash("An unexpected database error occurred.", "danger")
+        else:
+            invalidate("employees")
+            search_index.refresh("employees", employee_id, conn)
+            flash("Employee added successfully.", "success")
+            cur.close()
+            conn.close()
+            return redirect(url_for("hrm_employees_list"))
 
     cur.close()
     conn.close()
@@ -113,20 +436,16 @@ def hrm_employee_edit(employee_id):
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT * FROM employees WHERE employee_id = %s;", (employee_id,))
-    employee = cur.fetchone()
+    employee = get_entity(cur, "employees", employee_id)  # cached, see entity_cache.py
     if not employee:
         cur.close()
         conn.close()
         flash("Employee not found.", "warning")
         return redirect(url_for("hrm_employees_list"))
 
-    # dropdown data
-    cur.execute("SELECT department_id, department_name FROM departments WHERE is_active = 1 ORDER BY department_name;")
-    departments = cur.fetchall()
-
-    cur.execute("SELECT job_title_id, title_name FROM job_titles WHERE is_active = 1 ORDER BY title_name;")
-    job_titles = cur.fetchall()
+    # dropdown data (cached, see refdata.py)
+    departments = lookup("departments", cur)
+    job_titles = lookup("job_titles", cur)
 
     if request.method == "POST":
         employee_number = request.form["employee_number"].strip()
@@ -140,6 +459,7 @@ def hrm_employee_edit(employee_id):
         is_active = 1 if request.form.get("is_active") == "1" else 0
 
         try:
+            old = summaries.locked_employee(conn, employee_id)
             cur.execute("""
                 UPDATE employees
                 SET employee_number=%s,
@@ -154,12 +474,22 @@ def hrm_employee_edit(employee_id):
                 WHERE employee_id=%s
             """, (employee_number, first_name, last_name, email, phone, hire_date,
                   department_id, job_title_id, is_active, employee_id))
+            summaries.employees_changed(conn, [old], [{"department_id": department_id, "job_title_id": job_title_id,
+                                                       "is_active": is_active}])
+            changes.record(conn, "employees", changes.UPDATE, [employee_id])
+            http_cache.bump(conn, "employees")
             conn.commit()
-            flash("Employee updated successfully.", "success")
-            return redirect(url_for("hrm_employees_list"))
         except Exception as e:
             conn.rollback()
             flash(f"Error updating employee: {e}", "danger")
+        else:
+            invalidate("employees")
+            invalidate_entity("employees", employee_id)
+            search_index.refresh("employees", employee_id, conn)
+            flash("Employee updated successfully.", "success")
+            cur.close()
+            conn.close()
+            return redirect(url_for("hrm_employees_list"))
 
     cur.close()
     conn.close()
@@ -170,51 +500,78 @@ def hrm_employee_edit(employee_id):
 # -----------------------------------------
 # HRM: Employees (DISABLE / SOFT DELETE)
 # -----------------------------------------
+def disabled_message(noun, report):
+    cascaded = soft_delete.summary(report)
+    return f"{noun} disabled (soft delete){'; ' + cascaded if cascaded else ''}."
+
+
 @app.route("/hrm/employees/<int:employee_id>/disable", methods=["POST"])
 def hrm_employee_disable(employee_id):
     conn = get_connection()
-    cur = conn.cursor()
 
     try:
-        cur.execute("UPDATE employees SET is_active = 0 WHERE employee_id = %s;", (employee_id,))
-        conn.commit()
-        flash("Employee disabled (soft delete).", "info")
+        report = soft_delete.disable(conn, "employees", [employee_id])
+        flash(disabled_message("Employee", report), "info")
     except Exception as e:
-        conn.rollback()
         flash(f"Error disabling employee: {e}", "danger")
     finally:
-        cur.close()
         conn.close()
 
     return redirect(url_for("hrm_employees_list"))
 
 
+# -----------------------------------------
+# HRM: Employees (BULK IMPORT)
+# -----------------------------------------
+@app.route("/hrm/employees/import", methods=["GET", "POST"])
+def hrm_employee_import():
+    """CSV upload form, or a JSON list of employee objects (returns a JSON report)."""
+    if request.method == "GET":
+        return render_template("hrm/employee_import.html", report=None)
+
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        rows = payload.get("employees") if isinstance(payload, dict) else payload
+        if not isinstance(rows, list):
+            return jsonify(error="Expected a JSON list of employees."), 400
+    else:
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Please choose a CSV file to import.", "warning")
+            return render_template("hrm/employee_import.html", report=None)
+        try:
+            rows = read_csv(upload)
+        except (UnicodeDecodeError, ValueError) as e:
+            flash(f"Could not read CSV file: {e}", "danger")
+            return render_template("hrm/employee_import.html", report=None)
+
+    conn = get_connection()
+    try:
+        report = import_employees(conn, rows)
+    finally:
+        conn.close()
+    if report["inserted"]:
+        invalidate("employees")
+        search_index.invalidate()
+
+    if request.is_json:
+        return jsonify(report)
+    flash(f"Imported {report['inserted']} of {report['total']} employees.",
+          "success" if not report["failed"] else "warning")
+    return render_template("hrm/employee_import.html", report=report)
+
+
 # =========================================================
 # PM: Clients (LIST)
 # =========================================================
 @app.route("/pm/clients")
 def pm_clients_list():
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
+    conn = get_read_connection()
 
     show = request.args.get("show", "active")  # active | all
-    where_clause = ""
-    params = []
-    if show == "active":
-        where_clause = "WHERE is_active = %s"
-        params.append(1)
-
-    cur.execute(f"""
-        SELECT client_id, client_name, contact_name, contact_email, contact_phone, is_active, created_at
-        FROM clients
-        {where_clause}
-        ORDER BY client_name
-    """, params)
-    clients = cur.fetchall()
-
-    cur.close()
-    conn.close()
-    return render_template("pm/clients_list.html", clients=clients, show=show)
+    where_parts, params = client_filters(show)
+    return render_list_page("pm/clients_list.html", "clients", conn, CLIENTS_LIST, where_parts, params,
+                            CLIENT_KEYSET, show=show)
 
 
 # =========================================================
@@ -235,9 +592,10 @@ def pm_client_add():
                 INSERT INTO clients (client_name, contact_name, contact_email, contact_phone, is_active)
                 VALUES (%s, %s, %s, %s, 1)
             """, (client_name, contact_name, contact_email, contact_phone))
+            client_id = cur.lastrowid
+            changes.record(conn, "clients", changes.INSERT, [client_id])
+            http_cache.bump(conn, "clients")
             conn.commit()
-            flash("Client created successfully.", "success")
-            return redirect(url_for("pm_clients_list"))
         except Exception as e:
             conn.rollback()
             msg = str(e)
@@ -245,6 +603,11 @@ def pm_client_add():
                 flash("Client name already exists. Please choose a unique name.", "warning")
             else:
                 flash(f"Error creating client: {e}", "danger")
+        else:
+            invalidate("clients")
+            search_index.refresh("clients", client_id, conn)
+            flash("Client created successfully.", "success")
+            return redirect(url_for("pm_clients_list"))
         finally:
             cur.close()
             conn.close()
@@ -260,8 +623,7 @@ def pm_client_edit(client_id):
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT * FROM clients WHERE client_id = %s;", (client_id,))
-    client = cur.fetchone()
+    client = get_entity(cur, "clients", client_id)  # cached, see entity_cache.py
     if not client:
         cur.close(); conn.close()
         flash("Client not found.", "warning")
@@ -280,9 +642,9 @@ def pm_client_edit(client_id):
                 SET client_name=%s, contact_name=%s, contact_email=%s, contact_phone=%s, is_active=%s
                 WHERE client_id=%s
             """, (client_name, contact_name, contact_email, contact_phone, is_active, client_id))
+            changes.record(conn, "clients", changes.UPDATE, [client_id])
+            http_cache.bump(conn, "clients")
             conn.commit()
-            flash("Client updated successfully.", "success")
-            return redirect(url_for("pm_clients_list"))
         except Exception as e:
             conn.rollback()
             msg = str(e)
@@ -290,6 +652,13 @@ def pm_client_edit(client_id):
                 flash("Client name already exists. Please choose a unique name.", "warning")
             else:
                 flash(f"Error updating client: {e}", "danger")
+        else:
+            invalidate("clients")
+            invalidate_entity("clients", client_id)
+            search_index.refresh("clients", client_id, conn)
+            flash("Client updated successfully.", "success")
+            cur.close(); conn.close()
+            return redirect(url_for("pm_clients_list"))
 
     cur.close(); conn.close()
     return render_template("pm/client_form.html", mode="edit", client=client)
@@ -301,16 +670,13 @@ def pm_client_edit(client_id):
 @app.route("/pm/clients/<int:client_id>/disable", methods=["POST"])
 def pm_client_disable(client_id):
     conn = get_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("UPDATE clients SET is_active = 0 WHERE client_id = %s;", (client_id,))
-        conn.commit()
-        flash("Client disabled (soft delete).", "info")
+        report = soft_delete.disable(conn, "clients", [client_id])
+        flash(disabled_message("Client", report), "info")
     except Exception as e:
-        conn.rollback()
         flash(f"Error disabling client: {e}", "danger")
     finally:
-        cur.close(); conn.close()
+        conn.close()
     return redirect(url_for("pm_clients_list"))
 
 
@@ -319,29 +685,12 @@ def pm_client_disable(client_id):
 # =========================================================
 @app.route("/pm/projects")
 def pm_projects_list():
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
+    conn = get_read_connection()
 
     show = request.args.get("show", "active")  # active | all
-    where_clause = ""
-    params = []
-    if show == "active":
-        where_clause = "WHERE p.is_active = %s"
-        params.append(1)
-
-    cur.execute(f"""
-        SELECT
-            p.project_id, p.project_code, p.project_name, p.start_date, p.end_date, p.status, p.is_active,
-            c.client_name
-        FROM projects p
-        JOIN clients c ON p.client_id = c.client_id
-        {where_clause}
-        ORDER BY p.project_code
-    """, params)
-    projects = cur.fetchall()
-
-    cur.close(); conn.close()
-    return render_template("pm/projects_list.html", projects=projects, show=show)
+    where_parts, params = project_filters(show)
+    return render_list_page("pm/projects_list.html", "projects", conn, PROJECTS_LIST, where_parts, params,
+                            PROJECT_KEYSET, show=show)
 
 
 # =========================================================
@@ -352,8 +701,7 @@ def pm_project_add():
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT client_id, client_name FROM clients WHERE is_active=1 ORDER BY client_name;")
-    clients = cur.fetchall()
+    clients = lookup("clients", cur)
 
     if request.method == "POST":
         client_id = int(request.form["client_id"])
@@ -368,9 +716,10 @@ def pm_project_add():
                 INSERT INTO projects (client_id, project_code, project_name, start_date, end_date, status, is_active)
                 VALUES (%s,%s,%s,%s,%s,%s,1)
             """, (client_id, project_code, project_name, start_date, end_date, status))
+            project_id = cur.lastrowid
+            changes.record(conn, "projects", changes.INSERT, [project_id])
+            http_cache.bump(conn, "projects")
             conn.commit()
-            flash("Project created successfully.", "success")
-            return redirect(url_for("pm_projects_list"))
         except Exception as e:
             conn.rollback()
             msg = str(e)
@@ -378,6 +727,12 @@ def pm_project_add():
                 flash("Project code already exists. Please use a unique project code.", "warning")
             else:
                 flash(f"Error creating project: {e}", "danger")
+        else:
+            invalidate("projects")
+            search_index.refresh("projects", project_id, conn)
+            flash("Project created successfully.", "success")
+            cur.close(); conn.close()
+            return redirect(url_for("pm_projects_list"))
 
     cur.close(); conn.close()
     return render_template("pm/project_form.html", mode="add", project=None, clients=clients)
@@ -391,15 +746,13 @@ def pm_project_edit(project_id):
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT * FROM projects WHERE project_id=%s;", (project_id,))
-    project = cur.fetchone()
+    project = get_entity(cur, "projects", project_id)  # cached, see entity_cache.py
     if not project:
         cur.close(); conn.close()
         flash("Project not found.", "warning")
         return redirect(url_for("pm_projects_list"))
 
-    cur.execute("SELECT client_id, client_name FROM clients WHERE is_active=1 ORDER BY client_name;")
-    clients = cur.fetchall()
+    clients = lookup("clients", cur)
 
     if request.method == "POST":
         client_id = int(request.form["client_id"])
@@ -417,9 +770,12 @@ def pm_project_edit(project_id):
                     start_date=%s, end_date=%s, status=%s, is_active=%s
                 WHERE project_id=%s
             """, (client_id, project_code, project_name, start_date, end_date, status, is_active, project_id))
+            # the tasks list sorts by a copy of the code (migration 0009)
+            cur.execute("UPDATE tasks SET project_code=%s WHERE project_id=%s AND project_code <> %s",
+                        (project_code, project_id, project_code))
+            changes.record(conn, "projects", changes.UPDATE, [project_id])
+            http_cache.bump(conn, "projects")  # also in the tasks list's validator
             conn.commit()
-            flash("Project updated successfully.", "success")
-            return redirect(url_for("pm_projects_list"))
         except Exception as e:
             conn.rollback()
             msg = str(e)
@@ -427,6 +783,13 @@ def pm_project_edit(project_id):
                 flash("Project code already exists. Please use a unique project code.", "warning")
             else:
                 flash(f"Error updating project: {e}", "danger")
+        else:
+            invalidate("projects")
+            invalidate_entity("projects", project_id)
+            search_index.refresh("projects", project_id, conn)
+            flash("Project updated successfully.", "success")
+            cur.close(); conn.close()
+            return redirect(url_for("pm_projects_list"))
 
     cur.close(); conn.close()
     return render_template("pm/project_form.html", mode="edit", project=project, clients=clients)
@@ -438,16 +801,13 @@ def pm_project_edit(project_id):
 @app.route("/pm/projects/<int:project_id>/disable", methods=["POST"])
 def pm_project_disable(project_id):
     conn = get_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("UPDATE projects SET is_active = 0 WHERE project_id = %s;", (project_id,))
-        conn.commit()
-        flash("Project disabled (soft delete).", "info")
+        report = soft_delete.disable(conn, "projects", [project_id])
+        flash(disabled_message("Project", report), "info")
     except Exception as e:
-        conn.rollback()
         flash(f"Error disabling project: {e}", "danger")
     finally:
-        cur.close(); conn.close()
+        conn.close()
     return redirect(url_for("pm_projects_list"))
 
 
@@ -460,36 +820,17 @@ def pm_project_members(project_id):
     cur = conn.cursor(dictionary=True)
 
     # Project header
-    cur.execute("""
-        SELECT p.project_id, p.project_code, p.project_name, c.client_name
-        FROM projects p
-        JOIN clients c ON p.client_id = c.client_id
-        WHERE p.project_id=%s
-    """, (project_id,))
-    project = cur.fetchone()
+    project = queries.fetch_one(conn, PROJECT_HEADER, (project_id,))
     if not project:
         cur.close(); conn.close()
         flash("Project not found.", "warning")
         return redirect(url_for("pm_projects_list"))
 
     # Current members
-    cur.execute("""
-        SELECT e.employee_id, e.employee_number, e.first_name, e.last_name
-        FROM project_members pm
-        JOIN employees e ON pm.employee_id = e.employee_id
-        WHERE pm.project_id = %s
-        ORDER BY e.last_name, e.first_name
-    """, (project_id,))
-    members = cur.fetchall()
+    members = queries.fetch_all(conn, PROJECT_MEMBERS, (project_id,))
 
     # Available employees to assign (active employees)
-    cur.execute("""
-        SELECT employee_id, employee_number, first_name, last_name
-        FROM employees
-        WHERE is_active = 1
-        ORDER BY last_name, first_name
-    """)
-    employees = cur.fetchall()
+    employees = lookup("employees", cur)
 
     if request.method == "POST":
         employee_id = int(request.form["employee_id"])
@@ -498,8 +839,11 @@ def pm_project_members(project_id):
                 INSERT INTO project_members (project_id, employee_id)
                 VALUES (%s, %s)
             """, (project_id, employee_id))
+            summaries.members_changed(conn, project_id, 1)
+            changes.record(conn, "project_members", changes.INSERT, [(project_id, employee_id)])
             conn.commit()
             flash("Employee assigned to project.", "success")
+            cur.close(); conn.close()
             return redirect(url_for("pm_project_members", project_id=project_id))
         except Exception as e:
             conn.rollback()
@@ -523,6 +867,9 @@ def pm_project_member_remove(project_id, employee_id):
             DELETE FROM project_members
             WHERE project_id=%s AND employee_id=%s
         """, (project_id, employee_id))
+        if cur.rowcount:
+            summaries.members_changed(conn, project_id, -cur.rowcount)
+            changes.record(conn, "project_members", changes.DELETE, [(project_id, employee_id)])
         conn.commit()
         flash("Employee removed from project.", "info")
     except Exception as e:
@@ -533,6 +880,67 @@ def pm_project_member_remove(project_id, employee_id):
     return redirect(url_for("pm_project_members", project_id=project_id))
 
 
+def project_exists(conn, project_id):
+    return queries.fetch_one(conn, PROJECT_EXISTS, (project_id,), dictionary=False) is not None
+
+
+@app.route("/pm/projects/<int:project_id>/members/bulk", methods=["POST"])
+def pm_project_members_bulk(project_id):
+    """Assign (mode=add), remove (mode=remove) or replace (mode=set) many members at once."""
+    mode = request.form.get("mode", "add")
+    employee_ids, _ = parse_ids(request.form.getlist("employee_ids"))
+    if mode not in MODES:
+        flash("Unknown member update mode.", "warning")
+        return redirect(url_for("pm_project_members", project_id=project_id))
+
+    conn = get_connection()
+    try:
+        if not project_exists(conn, project_id):
+            flash("Project not found.", "warning")
+            return redirect(url_for("pm_projects_list"))
+        result = apply_members(conn, project_id, employee_ids, mode)
+        flash(f"{len(result['added'])} assigned, {len(result['removed'])} removed"
+              + (f", {len(result['skipped'])} skipped (not active employees)." if result["skipped"] else "."),
+              "success")
+    except Exception as e:
+        flash(f"Error updating members: {e}", "danger")
+    finally:
+        conn.close()
+    return redirect(url_for("pm_project_members", project_id=project_id))
+
+
+@app.route("/pm/projects/<int:project_id>/members.json", methods=["GET", "POST"])
+def pm_project_members_json(project_id):
+    """GET: current member ids. POST {"employee_ids": [...], "mode": "set" | "add" | "remove"}."""
+    conn = get_connection()
+    try:
+        if not project_exists(conn, project_id):
+            return jsonify(error="Project not found."), 404
+
+        if request.method == "GET":
+            cur = conn.cursor()
+            members = current_members(cur, project_id)
+            cur.close()
+            return jsonify(project_id=project_id, employee_ids=sorted(members))
+
+        payload = request.get_json(silent=True) or {}
+        mode = payload.get("mode", "set")
+        raw_ids = payload.get("employee_ids")
+        if mode not in MODES or not isinstance(raw_ids, list):
+            return jsonify(error="Expected {\"employee_ids\": [...], \"mode\": \"set|add|remove\"}."), 400
+        employee_ids, bad = parse_ids(raw_ids)
+        if bad:
+            return jsonify(error="employee_ids must be integers.", invalid=bad), 400
+
+        try:
+            result = apply_members(conn, project_id, employee_ids, mode)
+        except MembersChanged as e:
+            return jsonify(error=str(e)), 409
+        return jsonify(project_id=project_id, mode=mode, **result)
+    finally:
+        conn.close()
+
+
 # =========================================================
 # PM: Tasks (LIST)
 # =========================================================
@@ -540,44 +948,14 @@ def pm_project_member_remove(project_id, employee_id):
 def pm_tasks_list():
     project_id = request.args.get("project_id", type=int)
 
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
+    # Dropdown of projects, before borrowing the page's connection (see refdata.py)
+    projects = lookup("projects")
 
-    # Dropdown of projects
-    cur.execute("SELECT project_id, project_code, project_name FROM projects WHERE is_active=1 ORDER BY project_code;")
-    projects = cur.fetchall()
-
-    params = []
-    where_parts = []
-    if project_id:
-        where_parts.append("t.project_id = %s")
-        params.append(project_id)
-
-    # Show only active tasks by default
+    conn = get_read_connection()
     show = request.args.get("show", "active")  # active | all
-    if show == "active":
-        where_parts.append("t.is_active = %s")
-        params.append(1)
-
-    where_clause = ""
-    if where_parts:
-        where_clause = "WHERE " + " AND ".join(where_parts)
-
-    cur.execute(f"""
-        SELECT
-            t.task_id, t.task_name, t.task_status, t.due_date, t.is_active,
-            p.project_code, p.project_name,
-            e.first_name, e.last_name
-        FROM tasks t
-        JOIN projects p ON t.project_id = p.project_id
-        LEFT JOIN employees e ON t.employee_id = e.employee_id
-        {where_clause}
-        ORDER BY p.project_code, t.due_date IS NULL, t.due_date, t.task_name
-    """, params)
-    tasks = cur.fetchall()
-
-    cur.close(); conn.close()
-    return render_template("pm/tasks_list.html", tasks=tasks, projects=projects, project_id=project_id, show=show)
+    where_parts, params = task_filters(project_id, show)
+    return render_list_page("pm/tasks_list.html", "tasks", conn, TASKS_LIST, where_parts, params, TASK_KEYSET,
+                            projects=projects, project_id=project_id, show=show)
 
 
 # =========================================================
@@ -588,16 +966,8 @@ def pm_task_add():
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT project_id, project_code, project_name FROM projects WHERE is_active=1 ORDER BY project_code;")
-    projects = cur.fetchall()
-
-    cur.execute("""
-        SELECT employee_id, employee_number, first_name, last_name
-        FROM employees
-        WHERE is_active=1
-        ORDER BY last_name, first_name
-    """)
-    employees = cur.fetchall()
+    projects = lookup("projects", cur)
+    employees = lookup("employees", cur)
 
     if request.method == "POST":
         project_id = int(request.form["project_id"])
@@ -609,15 +979,23 @@ def pm_task_add():
 
         try:
             cur.execute("""
-                INSERT INTO tasks (project_id, employee_id, task_name, task_status, due_date, is_active)
-                VALUES (%s,%s,%s,%s,%s,1)
-            """, (project_id, employee_id, task_name, task_status, due_date))
+                INSERT INTO tasks (project_id, project_code, employee_id, task_name, task_status, due_date, is_active)
+                VALUES (%s,(SELECT project_code FROM projects WHERE project_id=%s),%s,%s,%s,%s,1)
+            """, (project_id, project_id, employee_id, task_name, task_status, due_date))
+            task_id = cur.lastrowid
+            summaries.tasks_changed(conn, after=[{"project_id": project_id, "task_status": task_status,
+                                                  "due_date": due_date, "is_active": 1}])
+            changes.record(conn, "tasks", changes.INSERT, [task_id])
+            http_cache.bump(conn, "tasks")
             conn.commit()
-            flash("Task created successfully.", "success")
-            return redirect(url_for("pm_tasks_list", project_id=project_id))
         except Exception as e:
             conn.rollback()
             flash(f"Error creating task: {e}", "danger")
+        else:
+            search_index.refresh("tasks", task_id, conn)
+            flash("Task created successfully.", "success")
+            cur.close(); conn.close()
+            return redirect(url_for("pm_tasks_list", project_id=project_id))
 
     cur.close(); conn.close()
     return render_template("pm/task_form.html", mode="add", task=None, projects=projects, employees=employees)
@@ -631,23 +1009,14 @@ def pm_task_edit(task_id):
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT * FROM tasks WHERE task_id=%s;", (task_id,))
-    task = cur.fetchone()
+    task = get_entity(cur, "tasks", task_id)  # cached, see entity_cache.py
     if not task:
         cur.close(); conn.close()
         flash("Task not found.", "warning")
         return redirect(url_for("pm_tasks_list"))
 
-    cur.execute("SELECT project_id, project_code, project_name FROM projects WHERE is_active=1 ORDER BY project_code;")
-    projects = cur.fetchall()
-
-    cur.execute("""
-        SELECT employee_id, employee_number, first_name, last_name
-        FROM employees
-        WHERE is_active=1
-        ORDER BY last_name, first_name
-    """)
-    employees = cur.fetchall()
+    projects = lookup("projects", cur)
+    employees = lookup("employees", cur)
 
     if request.method == "POST":
         project_id = int(request.form["project_id"])
@@ -659,18 +1028,27 @@ def pm_task_edit(task_id):
         is_active = 1 if request.form.get("is_active") == "1" else 0
 
         try:
+            old = summaries.locked_task(conn, task_id)
             cur.execute("""
                 UPDATE tasks
-                SET project_id=%s, employee_id=%s, task_name=%s, task_status=%s,
-                    due_date=%s, is_active=%s
+                SET project_id=%s, project_code=(SELECT project_code FROM projects WHERE project_id=%s),
+                    employee_id=%s, task_name=%s, task_status=%s, due_date=%s, is_active=%s
                 WHERE task_id=%s
-            """, (project_id, employee_id, task_name, task_status, due_date, is_active, task_id))
+            """, (project_id, project_id, employee_id, task_name, task_status, due_date, is_active, task_id))
+            summaries.tasks_changed(conn, [old], [{"project_id": project_id, "task_status": task_status,
+                                                   "due_date": due_date, "is_active": is_active}])
+            changes.record(conn, "tasks", changes.UPDATE, [task_id])
+            http_cache.bump(conn, "tasks")
             conn.commit()
-            flash("Task updated successfully.", "success")
-            return redirect(url_for("pm_tasks_list", project_id=project_id))
         except Exception as e:
             conn.rollback()
             flash(f"Error updating task: {e}", "danger")
+        else:
+            invalidate_entity("tasks", task_id)
+            search_index.refresh("tasks", task_id, conn)
+            flash("Task updated successfully.", "success")
+            cur.close(); conn.close()
+            return redirect(url_for("pm_tasks_list", project_id=project_id))
 
     cur.close(); conn.close()
     return render_template("pm/task_form.html", mode="edit", task=task, projects=projects, employees=employees)
@@ -682,19 +1060,433 @@ def pm_task_edit(task_id):
 @app.route("/pm/tasks/<int:task_id>/disable", methods=["POST"])
 def pm_task_disable(task_id):
     conn = get_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("UPDATE tasks SET is_active = 0 WHERE task_id = %s;", (task_id,))
-        conn.commit()
-        flash("Task disabled (soft delete).", "info")
+        report = soft_delete.disable(conn, "tasks", [task_id])
+        flash(disabled_message("Task", report), "info")
     except Exception as e:
-        conn.rollback()
         flash(f"Error disabling task: {e}", "danger")
     finally:
-        cur.close(); conn.close()
+        conn.close()
     return redirect(request.referrer or url_for("pm_tasks_list"))
 
 
+# =========================================================
+# Bulk disable (cascading soft delete, see soft_delete.py)
+# =========================================================
+BULK_DISABLE_CHUNK = 500  # ids per transaction; longer lists go through the bulk_disable job
+
+
+@app.route("/hrm/employees/disable.json", methods=["POST"], defaults={"table": "employees"})
+@app.route("/pm/clients/disable.json", methods=["POST"], defaults={"table": "clients"})
+@app.route("/pm/projects/disable.json", methods=["POST"], defaults={"table": "projects"})
+@app.route("/pm/tasks/disable.json", methods=["POST"], defaults={"table": "tasks"})
+def disable_many_json(table):
+    """POST {"ids": [...], "dry_run": false}: disable the rows and their cascade in one
+    transaction; a dry run reports the same counts and timings and rolls back."""
+    payload = request.get_json(silent=True) or {}
+    raw_ids, dry_run = payload.get("ids"), payload.get("dry_run", False)
+    if not isinstance(raw_ids, list) or not raw_ids or not isinstance(dry_run, bool):
+        return jsonify(error="Expected {\"ids\": [...], \"dry_run\": false}."), 400
+    ids, bad = parse_ids(raw_ids)
+    if bad:
+        return jsonify(error="ids must be integers.", invalid=bad), 400
+    if len(ids) > BULK_DISABLE_CHUNK:
+        return jsonify(error=f"At most {BULK_DISABLE_CHUNK} ids per request; "
+                             f"submit a bulk_disable job to POST {url_for('jobs_endpoint')} instead."), 413
+    conn = get_connection()
+    try:
+        report = soft_delete.disable(conn, table, ids, dry_run=dry_run)
+    finally:
+        conn.close()
+    return jsonify(report)
+
+
+# =========================================================
+# Dashboard (summary tables, see summaries.py)
+# =========================================================
+@app.route("/dashboard")
+def dashboard():
+    conn = get_connection()
+    try:
+        data = summaries.dashboard(conn)
+    finally:
+        conn.close()
+    return render_template("dashboard.html", statuses=summaries.TASK_STATUSES, **data)
+
+
+@app.route("/dashboard.json")
+def dashboard_json():
+    conn = get_connection()
+    try:
+        data = summaries.dashboard(conn)
+    finally:
+        conn.close()
+    return jsonify(data)
+
+
+# =========================================================
+# Task timeline (see timeline.py)
+# =========================================================
+def timeline_response(**body):
+    return Response(api.dumps(body), mimetype="application/json")
+
+
+def request_date(arg):
+    """?<arg>=YYYY-MM-DD as a date, today if absent; None if malformed."""
+    raw = request.args.get(arg)
+    if not raw:
+        return datetime.date.today()
+    try:
+        return datetime.date.fromisoformat(raw)
+    except ValueError:
+        return None
+
+
+@app.route("/pm/timeline/overdue.json")
+def timeline_overdue():
+    """Open tasks due before ?today= (default today), oldest first; ?employee_id= for one assignee.
+    ?by_employee=1 adds the overdue count per assignee (reads every overdue task)."""
+    today = request_date("today")
+    if today is None:
+        return jsonify(error="today must be YYYY-MM-DD."), 400
+    employee_id = request.args.get("employee_id", type=int)
+    conn = get_read_connection()
+    try:
+        tasks, page = timeline.overdue(conn, today, employee_id, **page_request())
+        by_employee = None
+        if request.args.get("by_employee") == "1":
+            by_employee = timeline.overdue_by_employee(conn, today)
+    finally:
+        conn.close()
+    return timeline_response(today=today, tasks=tasks, page=add_page_links(page), by_employee=by_employee)
+
+
+@app.route("/pm/timeline/week.json")
+def timeline_week():
+    """Active tasks due in the week (Monday to Sunday) of ?start= (default this week); ?employee_id=."""
+    day = request_date("start")
+    if day is None:
+        return jsonify(error="start must be YYYY-MM-DD."), 400
+    start = timeline.week_start(day)
+    conn = get_read_connection()
+    try:
+        days = timeline.week(conn, start, request.args.get("employee_id", type=int))
+    finally:
+        conn.close()
+    return timeline_response(start=start, end=start + datetime.timedelta(days=6),
+                             days=[{"date": d, "tasks": tasks} for d, tasks in days.items()])
+
+
+@app.route("/hrm/employees/<int:employee_id>/upcoming.json")
+def timeline_upcoming(employee_id):
+    """One employee's open tasks due in the next ?days= days (default 30, max 366), soonest first."""
+    today = request_date("today")
+    if today is None:
+        return jsonify(error="today must be YYYY-MM-DD."), 400
+    days = max(1, min(request.args.get("days", 30, type=int), 366))
+    conn = get_read_connection()
+    try:
+        tasks, page = timeline.upcoming(conn, employee_id, today, days, **page_request())
+    finally:
+        conn.close()
+    return timeline_response(employee_id=employee_id, today=today, days=days, tasks=tasks,
+                             page=add_page_links(page))
+
+
+@app.route("/pm/calendar")
+def pm_calendar():
+    """One week of due tasks, a column per day; ?week=<any day of it>&employee_id=."""
+    start = timeline.week_start(request_date("week") or datetime.date.today())
+    employee_id = request.args.get("employee_id", type=int)
+    employees = lookup("employees")  # before borrowing the page's connection (see refdata.py)
+    conn = get_read_connection()
+    try:
+        days = timeline.week(conn, start, employee_id)
+    finally:
+        conn.close()
+    week = datetime.timedelta(days=7)
+    return render_template("pm/calendar.html", days=days, start=start, end=start + datetime.timedelta(days=6),
+                           today=datetime.date.today(), employees=employees, employee_id=employee_id,
+                           prev_week=start - week, next_week=start + week)
+
+
+# =========================================================
+# Workload report (see workload.py)
+# =========================================================
+@app.route("/hrm/workload.csv")
+def hrm_workload_csv():
+    """Memberships, open tasks by status and overdue tasks per active employee."""
+    conn = get_read_connection()
+    try:
+        report = workload.build(conn)
+    finally:
+        conn.close()
+    response = Response(report.csv_chunks(), mimetype=MIMETYPES["csv"])
+    response.headers["Content-Disposition"] = f"attachment; filename=workload-{report.today}.csv"
+    return response
+
+
+@app.route("/hrm/workload.json")
+def hrm_workload_json():
+    """The report's totals (all active employees summed) and how long it took to build."""
+    conn = get_read_connection()
+    try:
+        report = workload.build(conn)
+    finally:
+        conn.close()
+    return jsonify(today=report.today.isoformat(), seconds=round(report.seconds, 3), **report.totals())
+
+
+# =========================================================
+# Search (see search_index.py)
+# =========================================================
+SEARCH_TYPES = ("employees", "clients", "projects", "tasks")
+
+SEARCH_LINKS = {
+    "employees": ("hrm_employee_edit", "employee_id"),
+    "clients": ("pm_client_edit", "client_id"),
+    "projects": ("pm_project_edit", "project_id"),
+    "tasks": ("pm_task_edit", "task_id"),
+}
+
+
+def run_search():
+    q = request.args.get("q", "").strip()
+    types = [t for t in request.args.getlist("type") if t in SEARCH_TYPES]
+    include_inactive = request.args.get("show", "active") == "all"
+    limit = page_size(request.args.get("limit", 20))
+    offset = max(request.args.get("offset", 0, type=int), 0)
+
+    total, results = search_index.search(q, kinds=types or None, include_inactive=include_inactive,
+                                         limit=limit, offset=offset)
+    for r in results:
+        endpoint, arg = SEARCH_LINKS[r["type"]]
+        r["url"] = url_for(endpoint, **{arg: r["id"]})
+    return {"q": q, "types": types, "total": total, "limit": limit, "offset": offset, "results": results}
+
+
+@app.route("/search")
+def search():
+    found = run_search()
+    args = request.args.to_dict(flat=False)
+    args.pop("offset", None)
+    prev_url = next_url = None
+    if found["offset"] > 0:
+        prev_url = url_for("search", **args, offset=max(found["offset"] - found["limit"], 0))
+    if found["offset"] + found["limit"] < found["total"]:
+        next_url = url_for("search", **args, offset=found["offset"] + found["limit"])
+    return render_template("search.html", **found, show=request.args.get("show", "active"),
+                           page={"limit": found["limit"], "prev_url": prev_url, "next_url": next_url})
+
+
+@app.route("/search.json")
+def search_json():
+    return jsonify(run_search())
+
+
+# =========================================================
+# Exports (streamed CSV / NDJSON of the list queries)
+# =========================================================
+def export_response(name, fmt, select_sql, where_parts, params, keyset):
+    body = stream_query(select_sql, where_parts, params, keyset.order_by(), fmt)
+    return Response(stream_with_context(body), mimetype=MIMETYPES[fmt],
+                    headers={"Content-Disposition": f"attachment; filename={name}.{fmt}"})
+
+
+@app.route("/hrm/employees/export.<any(csv, ndjson):fmt>")
+def hrm_employees_export(fmt):
+    show = request.args.get("show", "active")  # active | all
+    where_parts, params = employee_filters(show)
+    return export_response("employees", fmt, EMPLOYEES_LIST.sql, where_parts, params, EMPLOYEE_KEYSET)
+
+
+@app.route("/pm/projects/export.<any(csv, ndjson):fmt>")
+def pm_projects_export(fmt):
+    show = request.args.get("show", "active")  # active | all
+    where_parts, params = project_filters(show)
+    return export_response("projects", fmt, PROJECTS_LIST.sql, where_parts, params, PROJECT_KEYSET)
+
+
+@app.route("/pm/tasks/export.<any(csv, ndjson):fmt>")
+def pm_tasks_export(fmt):
+    project_id = request.args.get("project_id", type=int)
+    show = request.args.get("show", "active")  # active | all
+    where_parts, params = task_filters(project_id, show)
+    return export_response("tasks", fmt, TASKS_LIST.sql, where_parts, params, TASK_KEYSET)
+
+
+# =========================================================
+# JSON API (see api.py)
+# =========================================================
+def api_response(status, body):
+    return Response(api.dumps(body), status=status, mimetype="application/json")
+
+
+@app.route("/api/<name>")
+@app.route("/api/<name>/<int:pk>")
+def api_get(name, pk=None):
+    """?fields=a,b&<filter>=<value>&limit=&after=&before= (see api.RESOURCES)."""
+    conn = get_connection() if api.reads_primary([request.path]) else get_read_connection()
+    try:
+        return api_response(*api.handle(conn, request.path, request.args))
+    finally:
+        conn.close()
+
+
+@app.route("/api/batch", methods=["POST"])
+def api_batch():
+    """POST {"requests": ["/api/...", ...]}: the GETs run in order on one pooled connection."""
+    payload = request.get_json(silent=True) or {}
+    conn = get_connection() if api.reads_primary(payload.get("requests")) else get_read_connection()
+    try:
+        return api_response(*api.batch(conn, payload.get("requests")))
+    except api.ApiError as e:
+        return api_response(e.status, {"error": str(e)})
+    finally:
+        conn.close()
+
+
+# =========================================================
+# Background jobs (see jobs.py): exports, bulk disables, summary rebuilds
+# =========================================================
+EXPORT_JOBS = {
+    "employees": (EMPLOYEES_LIST, EMPLOYEE_KEYSET, lambda show, project_id: employee_filters(show)),
+    "clients": (CLIENTS_LIST, CLIENT_KEYSET, lambda show, project_id: client_filters(show)),
+    "projects": (PROJECTS_LIST, PROJECT_KEYSET, lambda show, project_id: project_filters(show)),
+    "tasks": (TASKS_LIST, TASK_KEYSET, lambda show, project_id: task_filters(project_id, show)),
+}
+
+
+def export_params(params):
+    table, fmt = params.get("table"), params.get("fmt", "csv")
+    show, project_id = params.get("show", "active"), params.get("project_id")
+    if table not in EXPORT_JOBS or fmt not in MIMETYPES or show not in ("active", "all"):
+        raise ValueError("Expected {\"table\": \"employees|clients|projects|tasks\", \"fmt\": \"csv|ndjson\", "
+                         "\"show\": \"active|all\"}.")
+    if project_id is not None and (table != "tasks" or not isinstance(project_id, int)):
+        raise ValueError("project_id must be an integer, and only filters task exports.")
+    return {"table": table, "fmt": fmt, "show": show, "project_id": project_id}
+
+
+@jobs.queue.register("export", validate=export_params)
+def export_job(ctx, table, fmt, show, project_id=None):
+    query, keyset, filters = EXPORT_JOBS[table]
+    where_parts, params = filters(show, project_id)
+    total = count_query(query.sql, where_parts, params)
+    written = 0
+
+    def progress(done):
+        nonlocal written
+        written = done
+        ctx.progress(done, total, f"{done} of {total} rows")
+
+    filename = f"{table}.{fmt}"
+    with open(ctx.file(filename), "w", encoding="utf-8", newline="") as f:
+        for chunk in stream_query(query.sql, where_parts, params, keyset.order_by(), fmt, progress=progress):
+            f.write(chunk)
+    return {"filename": filename, "mimetype": MIMETYPES[fmt], "rows": written,
+            "bytes": os.path.getsize(ctx.result_file)}
+
+
+def bulk_disable_params(params):
+    table, raw_ids, dry_run = params.get("table"), params.get("ids"), params.get("dry_run", False)
+    if (table not in soft_delete.CASCADES or not isinstance(raw_ids, list) or not raw_ids
+            or not isinstance(dry_run, bool)):
+        raise ValueError("Expected {\"table\": \"employees|clients|projects|tasks\", \"ids\": [...], "
+                         "\"dry_run\": false}.")
+    ids, bad = parse_ids(raw_ids)
+    if bad:
+        raise ValueError(f"ids must be integers: {bad[:10]}")
+    return {"table": table, "ids": sorted(ids), "dry_run": dry_run}
+
+
+@jobs.queue.register("bulk_disable", validate=bulk_disable_params)
+def bulk_disable_job(ctx, table, ids, dry_run=False):
+    # chunks commit one by one: a cancelled or failed job keeps the chunks already done
+    steps, ms = {}, 0.0
+    for start in range(0, len(ids), BULK_DISABLE_CHUNK):
+        conn = get_connection()
+        try:
+            report = soft_delete.disable(conn, table, ids[start:start + BULK_DISABLE_CHUNK], dry_run=dry_run)
+        finally:
+            conn.close()
+        http_cache.changes_committed()
+        for step in report["steps"]:
+            key = f"{step['action']} {step['table']}"
+            steps[key] = steps.get(key, 0) + step["rows"]
+        ms += report["ms"]
+        done = min(start + BULK_DISABLE_CHUNK, len(ids))
+        ctx.progress(done, len(ids), f"{done} of {len(ids)} ids processed")
+    return {"table": table, "requested": len(ids), "dry_run": dry_run, "rows": steps, "ms": round(ms, 2)}
+
+
+@jobs.queue.register("summaries_rebuild")
+def summaries_rebuild_job(ctx):
+    conn = get_connection()
+    try:
+        summaries.rebuild(conn, progress=lambda done, total, table: ctx.progress(done, total, f"{table} recounted"))
+    finally:
+        conn.close()
+    return {"tables": list(summaries.SUMMARIES)}
+
+
+def job_json(job):
+    job["status_url"] = url_for("job_status", job_id=job["id"])
+    job["result_url"] = url_for("job_result", job_id=job["id"])
+    return job
+
+
+@app.route("/jobs", methods=["GET", "POST"])
+def jobs_endpoint():
+    """GET: recent jobs (?status=, ?limit=). POST {"kind": ..., "params": {...}}: queue a job."""
+    if request.method == "GET":
+        status = request.args.get("status")
+        limit = page_size(request.args.get("limit", 50))
+        return jsonify(jobs=[job_json(job) for job in jobs.queue.recent(limit, status)])
+
+    payload = request.get_json(silent=True) or {}
+    params = payload.get("params", {})
+    if not isinstance(params, dict):
+        return jsonify(error="params must be an object."), 400
+    try:
+        job = jobs.queue.submit(payload.get("kind"), params)
+    except ValueError as e:
+        return jsonify(error=str(e), kinds=sorted(jobs.queue.kinds)), 400
+    job = job_json(job)
+    return jsonify(job), 202, {"Location": job["status_url"]}
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = jobs.queue.get(job_id)
+    if job is None:
+        return jsonify(error="Job not found."), 404
+    return jsonify(job_json(job))
+
+
+@app.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    """The finished job's file (exports) or JSON result; 409 until it is done."""
+    job = jobs.queue.get(job_id)
+    if job is None:
+        return jsonify(error="Job not found."), 404
+    if job["status"] != "done":
+        return jsonify(error=f"Job is {job['status']}.", job=job_json(job)), 409
+    if job["has_file"]:
+        result = job["result"]
+        return send_file(jobs.queue.result_file(job_id), mimetype=result["mimetype"], as_attachment=True,
+                         download_name=result["filename"])
+    return jsonify(job["result"])
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def job_cancel(job_id):
+    job = jobs.queue.cancel(job_id)
+    if job is None:
+        return jsonify(error="Job not found."), 404
+    return jsonify(job_json(job)), 202
+
+
 # Home redirect
 @app.route("/")
 def home():
@@ -0,0 +1,307 @@
+"""ASGI entry point: serves app.py with an async database driver.
+
+    DB_BACKEND=sqlite uvicorn asgi_app:application
+
+The read-only list pages and the members page are answered on the event loop
+with async_db.py, so a request waiting on the database holds no thread; like
+their threaded versions, the list pages read from a replica when one is
+configured (async_db.get_read_connection) and the members page from the
+primary. The Flask request hooks around them run on the thread pool. Every
+other route (forms, writes, imports, exports, JSON, /metrics) runs the
+unchanged Flask app on a thread pool of ASGI_WSGI_THREADS threads. Both kinds
+go through the Flask request hooks, so flashes, Server-Timing, the SQL debug
+panel and /metrics behave as under `python app.py`.
+"""
+import asyncio
+import contextvars
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import render_template, request, redirect, url_for, flash
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+import async_db
+import refdata
+from app import (app, page_request, add_page_links, employee_filters, client_filters, project_filters,
+                 task_filters, EMPLOYEE_KEYSET, CLIENT_KEYSET, PROJECT_KEYSET, TASK_KEYSET)
+from async_db import get_connection, get_read_connection
+from pagination import page_query, page_rows
+from queries import EMPLOYEES_LIST, CLIENTS_LIST, PROJECTS_LIST, TASKS_LIST, PROJECT_HEADER, PROJECT_MEMBERS
+
+ASGI_WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", 16))  # threads for the Flask-only routes
+
+_executor = ThreadPoolExecutor(max_workers=ASGI_WSGI_THREADS, thread_name_prefix="wsgi")
+
+
+async def list_page(conn, query, where_parts, params, keyset):
+    """Async twin of app.list_page() (the async drivers have no prepared statements)."""
+    sql, params, state = page_query(query.sql, where_parts, params, keyset, **page_request())
+    rows, page = page_rows(await conn.fetchall(sql, params), keyset, state)
+    return rows, add_page_links(page)
+
+
+# -----------------------------------------
+# HRM: Employees (LIST)
+# -----------------------------------------
+async def hrm_employees_list():
+    show = request.args.get("show", "active")  # active | all
+
+    conn = await get_read_connection()
+    try:
+        where_parts, params = employee_filters(show)
+        employees, page = await list_page(conn, EMPLOYEES_LIST, where_parts, params, EMPLOYEE_KEYSET)
+    finally:
+        await conn.close()
+
+    return render_template("hrm/employees_list.html", employees=employees, show=show, page=page)
+
+
+# =========================================================
+# PM: Clients (LIST)
+# =========================================================
+async def pm_clients_list():
+    show = request.args.get("show", "active")  # active | all
+
+    conn = await get_read_connection()
+    try:
+        where_parts, params = client_filters(show)
+        clients, page = await list_page(conn, CLIENTS_LIST, where_parts, params, CLIENT_KEYSET)
+    finally:
+        await conn.close()
+
+    return render_template("pm/clients_list.html", clients=clients, show=show, page=page)
+
+
+# =========================================================
+# PM: Projects (LIST)
+# =========================================================
+async def pm_projects_list():
+    show = request.args.get("show", "active")  # active | all
+
+    conn = await get_read_connection()
+    try:
+        where_parts, params = project_filters(show)
+        projects, page = await list_page(conn, PROJECTS_LIST, where_parts, params, PROJECT_KEYSET)
+    finally:
+        await conn.close()
+
+    return render_template("pm/projects_list.html", projects=projects, show=show, page=page)
+
+
+# =========================================================
+# PM: Project Members (GET only; assigning runs in app.py)
+# =========================================================
+async def pm_project_members(project_id):
+    conn = await get_connection()
+    try:
+        project = await conn.fetchone(PROJECT_HEADER.sql, (project_id,))
+        if not project:
+            flash("Project not found.", "warning")
+            return redirect(url_for("pm_projects_list"))
+
+        members = await conn.fetchall(PROJECT_MEMBERS.sql, (project_id,))
+
+        employees = await refdata.cache.aget("employees", conn)
+    finally:
+        await conn.close()
+
+    return render_template("pm/project_members.html", project=project, members=members, employees=employees)
+
+
+# =========================================================
+# PM: Tasks (LIST)
+# =========================================================
+async def pm_tasks_list():
+    project_id = request.args.get("project_id", type=int)
+    show = request.args.get("show", "active")  # active | all
+
+    projects = await refdata.cache.aget("projects")  # before borrowing the page's connection
+    conn = await get_read_connection()
+    try:
+        where_parts, params = task_filters(project_id, show)
+        tasks, page = await list_page(conn, TASKS_LIST, where_parts, params, TASK_KEYSET)
+    finally:
+        await conn.close()
+
+    return render_template("pm/tasks_list.html", tasks=tasks, projects=projects, project_id=project_id, show=show,
+                           page=page)
+
+
+# Flask endpoints answered natively for GET / HEAD; everything else goes to the thread pool
+ASYNC_VIEWS = {
+    "hrm_employees_list": hrm_employees_list,
+    "pm_clients_list": pm_clients_list,
+    "pm_projects_list": pm_projects_list,
+    "pm_project_members": pm_project_members,
+    "pm_tasks_list": pm_tasks_list,
+}
+
+
+# -----------------------------------------
+# ASGI plumbing
+# -----------------------------------------
+def build_environ(scope, body=b""):
+    """WSGI environ for an ASGI http scope."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for raw_name, raw_value in scope.get("headers", ()):
+        name = raw_name.decode("latin1").upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+            continue
+        if name == "CONTENT_LENGTH":
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _match(environ):
+    """(view, view_args) when the request is one of ASYNC_VIEWS, else (None, None)."""
+    if environ["REQUEST_METHOD"] not in ("GET", "HEAD"):
+        return None, None
+    adapter = app.url_map.bind_to_environ(environ, server_name=app.config["SERVER_NAME"])
+    try:
+        endpoint, view_args = adapter.match()
+    except (HTTPException, RequestRedirect):
+        return None, None  # 404 / 405 / slash redirects are Flask's business
+    return ASYNC_VIEWS.get(endpoint), view_args
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+def _header_list(headers):
+    return [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers]
+
+
+async def _dispatch_async(environ, view, view_args, send):
+    """Run an async view through Flask's request hooks, like Flask.wsgi_app() does.
+
+    The hooks use the blocking driver (the table versions behind the list
+    ETags, replica health), so they run on the thread pool and only the view
+    runs on the event loop. All of it runs in one context, which holds the
+    request context and the per-request state the hooks set up.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()  # entered by one thread at a time
+    ctx = app.request_context(environ)
+
+    def call(fn, *args):
+        return loop.run_in_executor(_executor, context.run, fn, *args)
+
+    error = None
+    context.run(ctx.push)
+    try:
+        try:
+            rv = await call(app.preprocess_request)
+            if rv is None:
+                rv = await context.run(asyncio.ensure_future, view(**view_args))
+        except Exception as e:
+            rv = context.run(app.handle_user_exception, e)
+        response = await call(app.finalize_request, rv)
+    except Exception as e:
+        error = e
+        response = context.run(app.handle_exception, e)
+    finally:
+        await call(ctx.pop, error)
+
+    body = b"" if environ["REQUEST_METHOD"] == "HEAD" else response.get_data()
+    await send({"type": "http.response.start", "status": response.status_code,
+                "headers": _header_list(response.headers.items())})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _dispatch_wsgi(environ, send):
+    """Run the Flask app on the thread pool, streaming its response body chunk by chunk."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()  # one context, entered by one thread at a time
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = headers
+
+    def call(fn, *args):
+        return loop.run_in_executor(_executor, context.run, fn, *args)
+
+    result = await call(app, environ, start_response)
+    chunks = iter(result)
+    try:
+        chunk = await call(next, chunks, None)
+        await send({"type": "http.response.start", "status": started["status"],
+                    "headers": _header_list(started["headers"])})
+        while chunk is not None:
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            chunk = await call(next, chunks, None)
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        if hasattr(result, "close"):
+            await call(result.close)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await async_db.reset_pool()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """The ASGI application."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        raise RuntimeError(f"Unsupported ASGI scope type {scope['type']!r}.")
+
+    environ = build_environ(scope)
+    view, view_args = _match(environ)
+    if view is not None:
+        await _dispatch_async(environ, view, view_args, send)
+        return
+
+    body = await _read_body(receive)
+    await _dispatch_wsgi(build_environ(scope, body), send)
+
+
+if __name__ == "__main__":
+    import uvicorn  # or any ASGI server: hypercorn asgi_app:application
+    uvicorn.run("asgi_app:application", host=os.environ.get("HOST", "127.0.0.1"),
+                port=int(os.environ.get("PORT", 8000)))
@@ -0,0 +1,395 @@
+"""Async connection pool for the ASGI serving mode (see asgi_app.py).
+
+Talks to DB_CONFIG through aiomysql, or to the SQLite stand-in through
+aiosqlite when DB_BACKEND=sqlite. A request waiting on the database only
+holds an asyncio task, not a thread, so one process can keep many slow
+queries in flight; ASYNC_POOL_SIZE bounds how many connections they share.
+The driver is imported on first connect, so the threaded app does not need it.
+"""
+import asyncio
+import functools
+import os
+import sqlite3
+import time
+from collections import deque
+
+import final_project_db
+import instrumentation
+import sqlite_backend
+from final_project_db import PoolTimeoutError
+
+ASYNC_POOL_CONFIG = dict(
+    final_project_db.POOL_CONFIG,
+    size=int(os.environ.get("ASYNC_POOL_SIZE", 50)),  # connections are cheap here; no thread each
+)
+
+
+async def _connect(path=None, config=None):
+    """Open a new raw async connection to the configured backend (or to the
+    SQLite file `path` / the MySQL server in `config`, for a replica)."""
+    if final_project_db.DB_BACKEND == "sqlite":
+        try:
+            import aiosqlite
+        except ImportError:
+            raise RuntimeError("The ASGI mode with DB_BACKEND=sqlite requires the 'aiosqlite' package.")
+        raw = await aiosqlite.connect(path or final_project_db.SQLITE_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+        await raw.execute("PRAGMA foreign_keys = ON")
+        return raw
+
+    try:
+        import aiomysql
+    except ImportError:
+        raise RuntimeError("The ASGI mode requires the 'aiomysql' package.")
+    config = config or final_project_db.DB_CONFIG
+    return await aiomysql.connect(host=config["host"], port=config["port"], user=config["user"],
+                                  password=config["password"], db=config["database"], autocommit=False)
+
+
+def _replica_connectors():
+    """[(name, connect function)] for the configured replicas (see final_project_db)."""
+    if final_project_db.DB_BACKEND == "sqlite":
+        return [(path, functools.partial(_connect, path=path)) for path in final_project_db.SQLITE_REPLICA_PATHS]
+    found = []
+    for entry in final_project_db.REPLICA_HOSTS:
+        host, _, port = entry.strip().partition(":")
+        config = dict(final_project_db.DB_CONFIG, host=host, port=int(port or final_project_db.DB_CONFIG["port"]))
+        found.append((entry.strip(), functools.partial(_connect, config=config)))
+    return found
+
+
+class AsyncConnectionPool:
+    """Bounded pool of async connections, shared by the tasks of one event loop."""
+
+    def __init__(self, connect, size=50, timeout=10.0, max_lifetime=1800.0, health_check=True):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+        self.sqlite = final_project_db.DB_BACKEND == "sqlite"
+
+        # single-threaded: the condition only orders waiters, counters need no lock
+        self._cond = asyncio.Condition()
+        self._idle = deque()  # (raw connection, created_at), most recently used on the right
+        self._open = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._failed_checks = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def acquire(self):
+        """Borrow a connection, waiting up to `timeout` seconds for one to free up."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        while True:
+            raw, created_at = await self._checkout(deadline)
+            if raw is None:
+                try:
+                    raw = await self._connect()
+                except Exception:
+                    await self._give_back_slot()
+                    raise
+                created_at = time.monotonic()
+                self._created += 1
+            elif not await self._usable(raw, created_at):
+                await self._discard(raw)
+                continue
+
+            waited = time.monotonic() - start
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            return AsyncConnection(self, raw, created_at)
+
+    async def _checkout(self, deadline):
+        """Take an idle connection, or reserve a slot for a new one (returns None)."""
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+                if self._idle:
+                    self._in_use += 1
+                    return self._idle.pop()
+                if self._open < self.size:
+                    self._open += 1
+                    self._in_use += 1
+                    return None, None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout:.1f}s "
+                        f"(pool size {self.size})."
+                    )
+                self._waiters += 1
+                try:
+                    await asyncio.wait_for(self._cond.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._waiters -= 1
+
+    async def _usable(self, raw, created_at):
+        if time.monotonic() - created_at > self.max_lifetime:
+            self._recycled += 1
+            return False
+        if self.health_check:
+            try:
+                if self.sqlite:
+                    await raw.execute("SELECT 1")
+                else:
+                    await raw.ping(reconnect=False)
+            except Exception:
+                self._failed_checks += 1
+                return False
+        return True
+
+    async def _give_back_slot(self):
+        async with self._cond:
+            self._open -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    async def _close_raw(self, raw):
+        try:
+            if self.sqlite:
+                await raw.close()
+            else:
+                raw.close()
+        except Exception:
+            pass
+
+    async def _discard(self, raw):
+        await self._close_raw(raw)
+        await self._give_back_slot()
+
+    async def release(self, raw, created_at):
+        """Return a borrowed connection; broken or expired ones are closed instead."""
+        try:
+            # never hand the next borrower a half-finished transaction
+            await raw.rollback()
+        except Exception:
+            await self._discard(raw)
+            return
+
+        if self._closed or time.monotonic() - created_at > self.max_lifetime:
+            if not self._closed:
+                self._recycled += 1
+            await self._discard(raw)
+            return
+
+        async with self._cond:
+            self._in_use -= 1
+            self._idle.append((raw, created_at))
+            self._cond.notify()
+
+    async def close(self):
+        """Close idle connections; borrowed ones are closed when returned."""
+        async with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for raw, _ in idle:
+            await self._close_raw(raw)
+
+    def stats(self):
+        """Snapshot of pool usage counters (same keys as ConnectionPool.stats())."""
+        return {
+            "size": self.size,
+            "open": self._open,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiters": self._waiters,
+            "checkouts": self._checkouts,
+            "timeouts": self._timeouts,
+            "created": self._created,
+            "recycled": self._recycled,
+            "failed_health_checks": self._failed_checks,
+            "wait_time_total": self._wait_total,
+            "wait_time_max": self._wait_max,
+            "wait_time_avg": self._wait_total / self._checkouts if self._checkouts else 0.0,
+        }
+
+
+class AsyncConnection:
+    """Borrowed connection; statements return dict rows and are recorded by instrumentation.py."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    async def _run(self, sql, params, fetch):
+        if self._raw is None:
+            raise RuntimeError("Connection has already been returned to the pool.")
+        params = tuple(params or ())
+        rows, rowcount = [], 0
+        start = time.perf_counter()
+        try:
+            if self._pool.sqlite:
+                if sqlite_backend.LATENCY:
+                    await asyncio.sleep(sqlite_backend.LATENCY)
+                async with self._raw.execute(sqlite_backend.translate(sql), params) as cur:
+                    if fetch and cur.description:
+                        names = [d[0] for d in cur.description]
+                        rows = [dict(zip(names, r)) for r in await cur.fetchall()]
+                    rowcount = cur.rowcount
+            else:
+                import aiomysql
+                async with self._raw.cursor(aiomysql.DictCursor) as cur:
+                    await cur.execute(sql, params)
+                    if fetch:
+                        rows = list(await cur.fetchall())
+                    rowcount = cur.rowcount
+        finally:
+            instrumentation.record_query(sql, params, time.perf_counter() - start, len(rows))
+        return rows, rowcount
+
+    async def fetchall(self, sql, params=()):
+        rows, _ = await self._run(sql, params, fetch=True)
+        return rows
+
+    async def fetchone(self, sql, params=()):
+        rows, _ = await self._run(sql, params, fetch=True)
+        return rows[0] if rows else None
+
+    async def execute(self, sql, params=()):
+        """Run a statement without reading rows; returns the affected row count."""
+        _, rowcount = await self._run(sql, params, fetch=False)
+        return rowcount
+
+    async def commit(self):
+        await self._raw.commit()
+
+    async def rollback(self):
+        await self._raw.rollback()
+
+    async def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            await self._pool.release(raw, self._created_at)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class AsyncReplicaSet(final_project_db.ReplicaSet):
+    """final_project_db.ReplicaSet over async pools: the same order per process
+    and the same health and lag rules (REPLICA_CONFIG); only the connection
+    work of acquire() and _try() is awaited."""
+
+    def _new_pool(self, connect):
+        return AsyncConnectionPool(connect, **ASYNC_POOL_CONFIG)
+
+    async def acquire(self):
+        """A connection to a healthy replica, or None if there is none."""
+        for replica in self._candidates():
+            conn = await self._try(replica)
+            if conn is not None:
+                return conn
+        self._fell_back()
+        return None
+
+    async def _try(self, replica):
+        try:
+            conn = await replica.pool.acquire()
+        except PoolTimeoutError:
+            return None  # busy, not broken
+        except Exception:
+            self._mark_down(replica)
+            return None
+        if self._check_due(replica):
+            try:
+                lag = await _replication_lag(conn)
+            except Exception:
+                lag = None
+            if not self._checked(replica, lag):
+                await conn.close()
+                return None
+        self._served(replica)
+        return conn
+
+    async def close(self):
+        for replica in self.replicas:
+            await replica.pool.close()
+
+
+async def _replication_lag(conn):
+    """Async final_project_db._replication_lag()."""
+    rows = await conn.fetchall(final_project_db._lag_statement())
+    return final_project_db._lag_from(rows[0] if rows else None)
+
+
+_pool = None
+_replicas = None
+
+
+def get_pool():
+    """Return the pool of the running event loop's process, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = AsyncConnectionPool(_connect, **ASYNC_POOL_CONFIG)
+    return _pool
+
+
+def get_replicas():
+    """Return the AsyncReplicaSet of this process (empty when none are configured)."""
+    global _replicas
+    if _replicas is None:
+        _replicas = AsyncReplicaSet(_replica_connectors(), **final_project_db.REPLICA_CONFIG)
+    return _replicas
+
+
+async def reset_pool():
+    """Close the current pools so the next get_connection() builds fresh ones."""
+    global _pool, _replicas
+    old, _pool = _pool, None
+    old_replicas, _replicas = _replicas, None
+    if old is not None:
+        await old.close()
+    if old_replicas is not None:
+        await old_replicas.close()
+
+
+def pool_stats():
+    """Usage counters for the async pool."""
+    return get_pool().stats()
+
+
+async def get_connection():
+    """Borrow an async connection from the pool. Await close() to return it."""
+    start = time.perf_counter()
+    try:
+        conn = await get_pool().acquire()
+    except (PoolTimeoutError, RuntimeError):
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Database connection error: {e}")
+    instrumentation.record_acquire(time.perf_counter() - start)
+    return conn
+
+
+async def get_read_connection():
+    """Async twin of final_project_db.get_read_connection(): a healthy replica
+    unless this request is pinned to the primary (see app.route_reads)."""
+    if not final_project_db.pinned():
+        start = time.perf_counter()
+        conn = await get_replicas().acquire()
+        if conn is not None:
+            instrumentation.record_acquire(time.perf_counter() - start)
+            return conn
+    return await get_connection()
@@ -0,0 +1,207 @@
+"""Compare how the threaded (WSGI) and async (ASGI) serving modes scale with
+the number of concurrent requests.
+
+    python -m bench.concurrency --levels 1,10,100,1000 --latency-ms 20
+
+Each statement against the SQLite stand-in is delayed by --latency-ms to
+mimic the round trip to a MySQL server. The threaded model serves the list
+pages from --threads worker threads (each holding a pooled connection while
+it waits); the async model serves them from asgi_app.application on one event
+loop with an async pool of --async-pool connections. Latency is measured from
+the moment a request is issued, so time spent queued for a worker counts.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from bench.run import percentile, use_sqlite
+from bench.seed import seed, volume_args, volumes_from
+
+DEFAULT_PATHS = ["/hrm/employees", "/pm/projects", "/pm/tasks"]
+
+
+def summarize(latencies, errors, wall, peak_threads):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "peak_threads": peak_threads,
+    }
+
+
+class ThreadWatch:
+    """Samples threading.active_count() in the background and keeps the peak."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_threaded(app, paths, requests, concurrency, threads):
+    """`concurrency` clients keep one request each in flight against `threads` workers."""
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def handle(path, issued):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        status = client.get(path).status_code
+        with lock:
+            latencies.append(time.perf_counter() - issued)
+            if status >= 400:
+                errors[0] += 1
+
+    issued = threading.Semaphore(concurrency)  # at most `concurrency` outstanding requests
+
+    def done(_):
+        issued.release()
+
+    start = time.perf_counter()
+    with ThreadWatch() as watch, ThreadPoolExecutor(max_workers=threads) as pool:
+        for i in range(requests):
+            issued.acquire()
+            pool.submit(handle, paths[i % len(paths)], time.perf_counter()).add_done_callback(done)
+    wall = time.perf_counter() - start
+    return summarize(latencies, errors[0], wall, watch.peak)
+
+
+async def asgi_get(application, path):
+    """Call an ASGI app directly (no server) and return the response status."""
+    parts = urlsplit(path)
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": parts.path, "raw_path": parts.path.encode(), "root_path": "",
+             "query_string": parts.query.encode(), "headers": [(b"host", b"localhost")],
+             "server": ("localhost", 80), "client": ("127.0.0.1", 50000)}
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await application(scope, receive, send)
+    return status.get("code", 500)
+
+
+async def _run_async(application, paths, requests, concurrency):
+    import async_db
+    await async_db.reset_pool()
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for i in counter:
+            issued = time.perf_counter()
+            if await asgi_get(application, paths[i % len(paths)]) >= 400:
+                errors += 1
+            latencies.append(time.perf_counter() - issued)
+
+    start = time.perf_counter()
+    with ThreadWatch() as watch:
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    await async_db.reset_pool()
+    return summarize(latencies, errors, wall, watch.peak)
+
+
+def run_async(paths, requests, concurrency):
+    from asgi_app import application
+    return asyncio.run(_run_async(application, paths, requests, concurrency))
+
+
+def print_table(results):
+    header = (f"{'model':9} {'conc':>6} {'req':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} "
+              f"{'p95 ms':>9} {'p99 ms':>9} {'threads':>8}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['model']:9} {r['concurrency']:>6} {r['requests']:>6} {r['errors']:>5} "
+              f"{r['throughput_rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['peak_threads']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Threaded vs. async serving under rising concurrency.")
+    parser.add_argument("--db", help="SQLite file to seed (default: a temporary file)")
+    parser.add_argument("--reuse", action="store_true", help="use --db as is instead of reseeding it")
+    parser.add_argument("--levels", default="1,10,100,1000", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=0,
+                        help="requests per level and model (default: 5 x level, at least 200)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated DB round trip (default 20)")
+    parser.add_argument("--threads", type=int, default=32, help="threaded model workers and pool size (default 32)")
+    parser.add_argument("--async-pool", type=int, default=200, help="async model pool size (default 200)")
+    parser.add_argument("--path", action="append", default=[], help="URL to request (repeatable)")
+    parser.add_argument("--model", choices=("both", "threaded", "async"), default="both")
+    parser.add_argument("--json", help="write results to this JSON file")
+    volume_args(parser)
+    args = parser.parse_args(argv)
+
+    volumes = volumes_from(args)
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite3")
+    if not args.reuse:
+        seed(path, volumes, args.seed)
+
+    import async_db
+    import sqlite_backend
+    sqlite_backend.LATENCY = args.latency_ms / 1000.0
+    app = use_sqlite(path, args.threads)
+    async_db.ASYNC_POOL_CONFIG["size"] = args.async_pool
+    paths = args.path or DEFAULT_PATHS
+
+    # warm the dropdown cache so both models run the same statements
+    app.test_client().get("/pm/tasks")
+
+    results = []
+    for level in [int(n) for n in args.levels.split(",") if n.strip()]:
+        requests = args.requests or max(200, 5 * level)
+        if args.model in ("both", "threaded"):
+            r = run_threaded(app, paths, requests, level, args.threads)
+            results.append(dict(r, model="threaded", concurrency=level))
+        if args.model in ("both", "async"):
+            r = run_async(paths, requests, level)
+            results.append(dict(r, model="async", concurrency=level))
+        print_table(results[-2 if args.model == "both" else -1:])
+        print()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": {"latency_ms": args.latency_ms, "threads": args.threads,
+                                  "async_pool": args.async_pool, "paths": paths, "volumes": volumes},
+                       "results": results}, f, indent=2)
+        print(f"Wrote {args.json}")
+    return 0 if all(r["errors"] == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
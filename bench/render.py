@@ -0,0 +1,137 @@
+"""Compare the list pages rendered whole with the streamed rendering
+(STREAM_LIST_PAGES, see app.stream_list_page).
+
+    python -m bench.render --requests 50 --latency-ms 2 --json render.json
+
+Each page is requested through the WSGI interface and its body read chunk by
+chunk and dropped, as a server writing to the socket would. Per page and mode
+we report time to first byte, time to the last byte (p50 / p95) and the peak
+memory allocated while serving one request (tracemalloc, measured in separate
+runs so tracing does not slow down the timed ones).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from bench.run import percentile, use_sqlite
+from bench.seed import seed, volume_args, volumes_from
+
+DEFAULT_PATHS = ["/hrm/employees?show=all&limit=500", "/pm/clients?show=all&limit=500",
+                 "/pm/projects?show=all&limit=500", "/pm/tasks?show=all&limit=500"]
+MODES = (("whole", False), ("streamed", True))
+
+
+def serve(app, path):
+    """Serve `path` once; returns (seconds to first byte, seconds to last byte, bytes)."""
+    url = urlsplit(path)
+    environ = EnvironBuilder(path=url.path, query_string=url.query).get_environ()
+    start = time.perf_counter()
+    body, status, headers = run_wsgi_app(app.wsgi_app, environ, buffered=False)
+    first, size = None, 0
+    try:
+        for chunk in body:
+            if chunk and first is None:
+                first = time.perf_counter() - start
+            size += len(chunk)
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+    if not status.startswith("200"):
+        raise RuntimeError(f"{path}: {status}")
+    return first, time.perf_counter() - start, size
+
+
+def peak_memory(app, path, runs=3):
+    """Lowest peak of traced allocations over `runs` requests (bytes above the
+    level before each one)."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(runs):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            serve(app, path)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return min(peaks)
+
+
+def run_mode(app, path, streamed, requests):
+    app.config["STREAM_LIST_PAGES"] = streamed
+    serve(app, path)  # warm the caches and prepared statements
+    ttfb, total, size = [], [], 0
+    for _ in range(requests):
+        first, last, size = serve(app, path)
+        ttfb.append(first)
+        total.append(last)
+    ttfb.sort()
+    total.sort()
+    return {
+        "requests": requests,
+        "bytes": size,
+        "ttfb_p50_ms": round(percentile(ttfb, 50) * 1000, 3),
+        "ttfb_p95_ms": round(percentile(ttfb, 95) * 1000, 3),
+        "total_p50_ms": round(percentile(total, 50) * 1000, 3),
+        "total_p95_ms": round(percentile(total, 95) * 1000, 3),
+        "peak_kib": round(peak_memory(app, path) / 1024, 1),
+    }
+
+
+def print_table(results):
+    header = (f"{'path':38} {'mode':9} {'KiB sent':>9} {'ttfb p50':>9} {'ttfb p95':>9} "
+              f"{'last p50':>9} {'last p95':>9} {'peak KiB':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['path'][:38]:38} {r['mode']:9} {r['bytes'] / 1024:>9.1f} {r['ttfb_p50_ms']:>9.2f} "
+              f"{r['ttfb_p95_ms']:>9.2f} {r['total_p50_ms']:>9.2f} {r['total_p95_ms']:>9.2f} {r['peak_kib']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Whole vs. streamed list page rendering: TTFB and peak memory.")
+    parser.add_argument("--db", help="SQLite file to seed (default: a temporary file)")
+    parser.add_argument("--reuse", action="store_true", help="use --db as is instead of reseeding it")
+    parser.add_argument("--requests", type=int, default=20, help="timed requests per page and mode (default 20)")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated DB round trip per statement (default 0)")
+    parser.add_argument("--path", action="append", default=[], help="URL to request (repeatable)")
+    parser.add_argument("--json", help="write results to this JSON file")
+    volume_args(parser)
+    args = parser.parse_args(argv)
+
+    volumes = volumes_from(args)
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite3")
+    if not args.reuse:
+        started = time.perf_counter()
+        seed(path, volumes, args.seed)
+        print(f"Seeded {path} in {time.perf_counter() - started:.1f}s")
+
+    import sqlite_backend
+    sqlite_backend.LATENCY = args.latency_ms / 1000.0
+    app = use_sqlite(path, 2)
+    paths = args.path or DEFAULT_PATHS
+
+    results = []
+    for page in paths:
+        for mode, streamed in MODES:
+            results.append(dict(run_mode(app, page, streamed, args.requests), path=page, mode=mode))
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": {"requests": args.requests, "latency_ms": args.latency_ms, "volumes": volumes,
+                                  "seed": args.seed}, "results": results}, f, indent=2)
+        print(f"Wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
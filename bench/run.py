@@ -0,0 +1,230 @@
+"""Benchmark the HRM and PM routes against a seeded SQLite database.
+
+    python -m bench.run --requests 200 --concurrency 4 --json results.json
+    python -m bench.run --compare results.json      # show change vs. an earlier run
+
+Every list / add / edit / disable route is driven through the Flask test
+client (one per worker thread). Per route we report throughput and
+p50 / p95 / p99 latency; --json writes the same numbers for regression
+comparison.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.seed import seed, volume_args, volumes_from
+
+
+def use_sqlite(path, pool_size, replicas=()):
+    """Point final_project_db at the benchmark database (and `replicas`, copies of
+    it standing in for read replicas) and return the Flask app."""
+    import final_project_db
+    final_project_db.DB_BACKEND = "sqlite"
+    final_project_db.SQLITE_PATH = path
+    final_project_db.SQLITE_REPLICA_PATHS = list(replicas)
+    final_project_db.POOL_CONFIG["size"] = pool_size
+    final_project_db.reset_pool()
+
+    from app import app
+    return app
+
+
+def scenarios(v):
+    """(name, method, url, form data) factories for each benchmarked route."""
+    counter = itertools.count(1)
+
+    def rid(n):
+        return random.randint(1, n)
+
+    def employee_form(i):
+        return {"employee_number": f"B{i:08d}", "first_name": "Bench", "last_name": f"Mark{i}",
+                "email": f"bench{i}@example.com", "phone": "", "hire_date": "2024-01-01",
+                "department_id": rid(v["departments"]), "job_title_id": rid(v["job_titles"]),
+                "is_active": "1"}
+
+    def client_form(i):
+        return {"client_name": f"Bench Client {i}", "contact_name": "", "contact_email": "",
+                "contact_phone": "", "is_active": "1"}
+
+    def project_form(i):
+        return {"client_id": rid(v["clients"]), "project_code": f"B{i:08d}", "project_name": f"Bench {i}",
+                "start_date": "2024-01-01", "end_date": "", "status": "Active", "is_active": "1"}
+
+    def task_form(i):
+        return {"project_id": rid(v["projects"]), "employee_id": rid(v["employees"]),
+                "task_name": f"Bench task {i}", "task_status": "To Do", "due_date": "2025-06-01",
+                "is_active": "1"}
+
+    return [
+        ("hrm_employees_list", "GET", lambda: "/hrm/employees", None),
+        ("hrm_employees_list_all", "GET", lambda: "/hrm/employees?show=all", None),
+        ("hrm_employee_add_form", "GET", lambda: "/hrm/employees/add", None),
+        ("hrm_employee_add", "POST", lambda: "/hrm/employees/add", employee_form),
+        ("hrm_employee_edit_form", "GET", lambda: f"/hrm/employees/{rid(v['employees'])}/edit", None),
+        ("hrm_employee_edit", "POST", lambda: f"/hrm/employees/{rid(v['employees'])}/edit", employee_form),
+        ("hrm_employee_disable", "POST", lambda: f"/hrm/employees/{rid(v['employees'])}/disable", None),
+        ("pm_clients_list", "GET", lambda: "/pm/clients", None),
+        ("pm_client_add", "POST", lambda: "/pm/clients/add", client_form),
+        ("pm_client_edit_form", "GET", lambda: f"/pm/clients/{rid(v['clients'])}/edit", None),
+        ("pm_client_edit", "POST", lambda: f"/pm/clients/{rid(v['clients'])}/edit", client_form),
+        ("pm_client_disable", "POST", lambda: f"/pm/clients/{rid(v['clients'])}/disable", None),
+        ("pm_projects_list", "GET", lambda: "/pm/projects", None),
+        ("pm_project_add_form", "GET", lambda: "/pm/projects/add", None),
+        ("pm_project_add", "POST", lambda: "/pm/projects/add", project_form),
+        ("pm_project_edit_form", "GET", lambda: f"/pm/projects/{rid(v['projects'])}/edit", None),
+        ("pm_project_edit", "POST", lambda: f"/pm/projects/{rid(v['projects'])}/edit", project_form),
+        ("pm_project_disable", "POST", lambda: f"/pm/projects/{rid(v['projects'])}/disable", None),
+        ("pm_project_members", "GET", lambda: f"/pm/projects/{rid(v['projects'])}/members", None),
+        ("pm_project_member_add", "POST", lambda: f"/pm/projects/{rid(v['projects'])}/members",
+         lambda i: {"employee_id": rid(v["employees"])}),
+        ("pm_project_members_bulk", "POST", lambda: f"/pm/projects/{rid(v['projects'])}/members/bulk",
+         lambda i: {"mode": "set", "employee_ids": [rid(v["employees"]) for _ in range(20)]}),
+        ("pm_project_member_remove", "POST",
+         lambda: f"/pm/projects/{rid(v['projects'])}/members/{rid(v['employees'])}/remove", None),
+        ("pm_tasks_list", "GET", lambda: "/pm/tasks", None),
+        ("dashboard", "GET", lambda: "/dashboard", None),
+        ("pm_tasks_list_project", "GET", lambda: f"/pm/tasks?project_id={rid(v['projects'])}", None),
+        ("pm_task_add_form", "GET", lambda: "/pm/tasks/add", None),
+        ("pm_task_add", "POST", lambda: "/pm/tasks/add", task_form),
+        ("pm_task_edit_form", "GET", lambda: f"/pm/tasks/{rid(v['tasks'])}/edit", None),
+        ("pm_task_edit", "POST", lambda: f"/pm/tasks/{rid(v['tasks'])}/edit", task_form),
+        ("pm_task_disable", "POST", lambda: f"/pm/tasks/{rid(v['tasks'])}/disable", None),
+        ("timeline_overdue", "GET", lambda: "/pm/timeline/overdue.json", None),
+        ("timeline_upcoming", "GET", lambda: f"/hrm/employees/{rid(v['employees'])}/upcoming.json", None),
+        ("pm_calendar", "GET", lambda: "/pm/calendar", None),
+    ], counter
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def run_scenario(app, method, url_fn, form_fn, counter, requests, concurrency):
+    """Fire `requests` calls across `concurrency` threads; returns (latencies, errors, wall seconds)."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_thread = [requests // concurrency + (1 if i < requests % concurrency else 0)
+                  for i in range(concurrency)]
+
+    def worker(n):
+        client = app.test_client()
+        local, failed = [], 0
+        for _ in range(n):
+            url = url_fn()
+            data = form_fn(next(counter)) if form_fn else None
+            start = time.perf_counter()
+            response = client.open(url, method=method, data=data)
+            local.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, per_thread))
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def summarize(latencies, errors, wall):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def print_table(results, baseline=None):
+    header = f"{'route':32} {'req':>6} {'err':>4} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        line = (f"{name:32} {r['requests']:>6} {r['errors']:>4} {r['throughput_rps']:>9.1f} "
+                f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+        base = (baseline or {}).get(name)
+        if base and base["p95_ms"]:
+            line += f" {(r['p95_ms'] / base['p95_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HRM and PM routes.")
+    parser.add_argument("--db", help="SQLite file to seed (default: a temporary file)")
+    parser.add_argument("--reuse", action="store_true", help="use --db as is instead of reseeding it")
+    parser.add_argument("--requests", type=int, default=100, help="requests per route (default 100)")
+    parser.add_argument("--concurrency", type=int, default=1, help="worker threads (default 1)")
+    parser.add_argument("--pool-size", type=int, default=10, help="connection pool size (default 10)")
+    parser.add_argument("--replicas", type=int, default=0,
+                        help="copies of the seeded file to route list reads to (default 0)")
+    parser.add_argument("--only", action="append", default=[], help="benchmark only routes containing this text")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--compare", help="earlier --json output to compare p95 latency against")
+    volume_args(parser)
+    args = parser.parse_args(argv)
+
+    volumes = volumes_from(args)
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite3")
+    if not args.reuse:
+        started = time.perf_counter()
+        seed(path, volumes, args.seed)
+        print(f"Seeded {path} in {time.perf_counter() - started:.1f}s")
+
+    random.seed(args.seed)
+    replicas = [f"{path}.replica{i}" for i in range(1, args.replicas + 1)]
+    for replica in replicas:
+        shutil.copyfile(path, replica)
+    app = use_sqlite(path, args.pool_size, replicas)
+    plan, counter = scenarios(volumes)
+
+    results = {}
+    for name, method, url_fn, form_fn in plan:
+        if args.only and not any(o in name for o in args.only):
+            continue
+        latencies, errors, wall = run_scenario(app, method, url_fn, form_fn, counter,
+                                               args.requests, args.concurrency)
+        results[name] = summarize(latencies, errors, wall)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    if args.json:
+        report = {
+            "config": {"requests": args.requests, "concurrency": args.concurrency,
+                       "pool_size": args.pool_size, "volumes": volumes, "seed": args.seed,
+                       "python": platform.python_version(),
+                       "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+    return 0 if all(r["errors"] == 0 for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
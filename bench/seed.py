@@ -0,0 +1,144 @@
+"""Create and fill a SQLite benchmark database.
+
+    python -m bench.seed bench.sqlite3 --employees 10000 --tasks 100000
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+
+import sqlite_backend
+import summaries
+from migrate import migrate
+
+DEFAULT_VOLUMES = {
+    "departments": 20,
+    "job_titles": 40,
+    "employees": 2000,
+    "clients": 200,
+    "projects": 500,
+    "members": 5,        # per project
+    "tasks": 10000,
+}
+
+FIRST_NAMES = ["Ann", "Bob", "Carla", "Dev", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jon",
+               "Kemal", "Lena", "Marco", "Nia", "Omar", "Priya", "Quinn", "Rosa", "Sam", "Tara"]
+LAST_NAMES = ["Adams", "Brown", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jones",
+              "Khan", "Lopez", "Murphy", "Nguyen", "Okafor", "Patel", "Rossi", "Smith", "Tanaka", "Weber"]
+TASK_WORDS = ["Design", "Review", "Deploy", "Test", "Document", "Plan", "Migrate", "Audit", "Refactor", "Train"]
+TASK_STATUSES = ["To Do", "In Progress", "Blocked", "Done", "Planning"]
+
+
+def create_schema(path):
+    """Run the migrations against the SQLite file at `path`."""
+    conn = sqlite_backend.connect(path)
+    try:
+        migrate(conn, dialect="sqlite", log=None)
+    finally:
+        conn.close()
+
+
+def _day(rng, start, span_days):
+    return (start + datetime.timedelta(days=rng.randrange(span_days))).isoformat()
+
+
+def seed(path, volumes=None, seed_value=42):
+    """(Re)create the database at `path` with the given row volumes."""
+    v = dict(DEFAULT_VOLUMES, **(volumes or {}))
+    rng = random.Random(seed_value)
+    if os.path.exists(path):
+        os.remove(path)
+
+    create_schema(path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")  # lets readers run while a writer commits
+
+    conn.executemany("INSERT INTO departments (department_name) VALUES (?)",
+                     [(f"Department {i:03d}",) for i in range(1, v["departments"] + 1)])
+    conn.executemany("INSERT INTO job_titles (title_name) VALUES (?)",
+                     [(f"Title {i:03d}",) for i in range(1, v["job_titles"] + 1)])
+
+    base = datetime.date(2015, 1, 1)
+    conn.executemany("""
+        INSERT INTO employees
+        (employee_number, first_name, last_name, email, phone, hire_date, department_id, job_title_id, is_active)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        (f"E{i:07d}", rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f"employee{i}@example.com",
+         f"555-{i % 10000:04d}", _day(rng, base, 3650), rng.randint(1, v["departments"]),
+         rng.randint(1, v["job_titles"]), 1 if rng.random() < 0.9 else 0)
+        for i in range(1, v["employees"] + 1)
+    ))
+
+    conn.executemany("""
+        INSERT INTO clients (client_name, contact_name, contact_email, contact_phone, is_active)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        (f"Client {i:05d}", f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+         f"contact{i}@client.example", None, 1 if rng.random() < 0.9 else 0)
+        for i in range(1, v["clients"] + 1)
+    ))
+
+    conn.executemany("""
+        INSERT INTO projects (client_id, project_code, project_name, start_date, end_date, status, is_active)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (
+        (rng.randint(1, v["clients"]), f"P{i:06d}", f"Project {i}", _day(rng, base, 3000), None,
+         "Active", 1 if rng.random() < 0.9 else 0)
+        for i in range(1, v["projects"] + 1)
+    ))
+
+    members = set()
+    for project_id in range(1, v["projects"] + 1):
+        for _ in range(min(v["members"], v["employees"])):
+            members.add((project_id, rng.randint(1, v["employees"])))
+    conn.executemany("INSERT INTO project_members (project_id, employee_id) VALUES (?, ?)", sorted(members))
+
+    today = datetime.date.today()
+    conn.executemany("""
+        INSERT INTO tasks (project_id, employee_id, task_name, task_status, due_date, is_active)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        (rng.randint(1, v["projects"]),
+         rng.randint(1, v["employees"]) if rng.random() < 0.8 else None,
+         f"{rng.choice(TASK_WORDS)} item {i}", rng.choice(TASK_STATUSES),
+         _day(rng, today - datetime.timedelta(days=180), 360) if rng.random() < 0.85 else None,
+         1 if rng.random() < 0.9 else 0)
+        for i in range(1, v["tasks"] + 1)
+    ))
+    conn.execute("UPDATE tasks SET project_code = "
+                 "(SELECT p.project_code FROM projects p WHERE p.project_id = tasks.project_id)")
+
+    conn.commit()
+    conn.close()
+
+    conn = sqlite_backend.connect(path)
+    summaries.rebuild(conn)
+    conn.cursor().execute("ANALYZE")
+    conn.close()
+    return v
+
+
+def volume_args(parser):
+    for name, default in DEFAULT_VOLUMES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default, dest=name,
+                            help=f"rows to create (default {default})")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+
+
+def volumes_from(args):
+    return {name: getattr(args, name) for name in DEFAULT_VOLUMES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="SQLite file to create")
+    volume_args(parser)
+    args = parser.parse_args()
+    v = seed(args.path, volumes_from(args), args.seed)
+    print(f"Seeded {args.path}: " + ", ".join(f"{k}={n}" for k, n in v.items()))
+
+
+if __name__ == "__main__":
+    main()
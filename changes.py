@@ -0,0 +1,170 @@
+"""Append-only change log, so copies of the data can sync incrementally.
+
+Every write path records the rows it changed in change_log, in the same
+transaction as the change (call before commit):
+
+    changes.record(conn, "tasks", changes.UPDATE, [task_id])
+    changes.record(conn, "project_members", changes.DELETE, [(project_id, employee_id)])
+    changes.record_where(conn, "tasks", changes.DISABLE, "project_id IN (%s, %s) AND is_active = 1", [3, 4])
+
+An entry names the table, the row's key and what happened to it, not the
+row's values; GET /api/changes (see api.py) pages through the entries in
+change_id order and can attach the rows as they are now.
+
+Ids come from an auto-increment counter and are taken when a transaction
+logs, not when it commits, so a reader can see id 11 committed while id 10
+is still in flight. The cursor since() hands out therefore carries, besides
+the highest id read, the ranges of ids below it that were missing, and
+every later call reads those again until they show up or are older than
+CHANGE_LOG_GAP_TIMEOUT (then they were rolled back, or were never used).
+A late commit is returned after entries with higher ids.
+"""
+import os
+import time
+
+from pagination import decode_token, encode_token
+from queries import Query, fetch_all
+
+CHANGE_LOG_GAP_TIMEOUT = float(os.environ.get("CHANGE_LOG_GAP_TIMEOUT", 300))  # seconds a missing id is awaited
+MAX_GAPS = 100  # missing id ranges a cursor carries; the oldest are dropped beyond it
+LATEST_GAP_WINDOW = 1000  # ids below the newest checked for in-flight transactions by latest()
+RECORD_BATCH_SIZE = 500  # entries per INSERT
+
+INSERT = "insert"
+UPDATE = "update"
+DISABLE = "disable"
+UNASSIGN = "unassign"  # a task's employee_id set to NULL by disabling the employee
+DELETE = "delete"
+
+# logged table -> its key columns
+KEYS = {
+    "employees": ("employee_id",),
+    "clients": ("client_id",),
+    "projects": ("project_id",),
+    "tasks": ("task_id",),
+    "project_members": ("project_id", "employee_id"),
+}
+
+SINCE = Query("change_log.since", """
+    SELECT change_id, table_name, operation, pk, pk2, changed_at
+    FROM change_log
+""")
+RECENT_IDS = Query("change_log.recent_ids", "SELECT change_id FROM change_log WHERE change_id > %s")
+LATEST = Query("change_log.latest", "SELECT MAX(change_id) FROM change_log")
+
+
+def record(conn, table, operation, keys):
+    """Log `operation` on the rows of `table` with these keys (ids, or
+    (project_id, employee_id) pairs for project_members)."""
+    rows = [(table, operation) + _key(table, key) + (time.time(),) for key in keys]
+    cur = conn.cursor()
+    try:
+        for start in range(0, len(rows), RECORD_BATCH_SIZE):
+            chunk = rows[start:start + RECORD_BATCH_SIZE]
+            values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(chunk))
+            cur.execute(f"INSERT INTO change_log (table_name, operation, pk, pk2, changed_at) VALUES {values}",
+                        [value for row in chunk for value in row])
+    finally:
+        cur.close()
+
+
+def record_where(conn, table, operation, where, params):
+    """Log `operation` on every row of `table` matching `where`, with one
+    INSERT ... SELECT. Call before a DELETE."""
+    columns = KEYS[table]
+    second = columns[1] if len(columns) > 1 else "NULL"
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            INSERT INTO change_log (table_name, operation, pk, pk2, changed_at)
+            SELECT %s, %s, {columns[0]}, {second}, %s FROM {table} WHERE {where}
+        """, [table, operation, time.time()] + list(params))
+    finally:
+        cur.close()
+
+
+def _key(table, key):
+    if len(KEYS[table]) == 1:
+        return int(key), None
+    first, second = key
+    return int(first), int(second)
+
+
+def since(conn, cursor, limit, tables=None):
+    """(entries, more, cursor): up to `limit` log entries after `cursor` (from
+    latest() or an earlier call; "0" reads from the start), oldest first, then
+    the cursor to continue from. With `tables`, other tables' entries are read
+    but left out, so a batch can come back short or empty while `more` is true.
+    Each entry is a dict with change_id, table_name, operation, key (tuple)
+    and changed_at. Raises ValueError for a malformed cursor."""
+    after, gaps = _decode(cursor)
+    now = time.time()
+    gaps = [gap for gap in gaps if now - gap[2] < CHANGE_LOG_GAP_TIMEOUT]
+
+    where, params = "change_id > %s", [after]
+    if gaps:
+        # led by a bound on the lowest gap: the OR'd ranges alone are not a seek in SQLite
+        where = "change_id >= %s AND (change_id > %s" + " OR change_id BETWEEN %s AND %s" * len(gaps) + ")"
+        params = [min(gap[0] for gap in gaps), after] + [value for low, high, _ in gaps for value in (low, high)]
+    sql = f"{SINCE.sql} WHERE {where} ORDER BY change_id LIMIT %s"
+    params.append(limit + 1)
+    rows = fetch_all(conn, SINCE, params, sql=sql)
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    read = [row["change_id"] for row in rows]
+    newer = [change_id for change_id in read if change_id > after]
+    gaps = [hole for gap in gaps for hole in _holes(gap[0], gap[1], read, gap[2])]
+    if newer:
+        gaps.extend(_holes(after + 1, newer[-1], newer, now))
+        after = newer[-1]
+
+    entries = [{"change_id": row["change_id"], "table_name": row["table_name"], "operation": row["operation"],
+                "key": (row["pk"],) if row["pk2"] is None else (row["pk"], row["pk2"]),
+                "changed_at": row["changed_at"]}
+               for row in rows if not tables or row["table_name"] in tables]
+    return entries, more, _encode(after, gaps)
+
+
+def latest(conn):
+    """The cursor of the log's current end: the newest change_id (0 for an
+    empty log) and the ids below it still in flight. Take it before copying
+    the tables in full, then sync from it."""
+    newest = int(fetch_all(conn, LATEST, dictionary=False)[0][0] or 0)
+    start = max(newest - LATEST_GAP_WINDOW, 0)
+    present = sorted(row[0] for row in fetch_all(conn, RECENT_IDS, (start,), dictionary=False))
+    return _encode(newest, list(_holes(start + 1, newest, present, time.time())))
+
+
+def _holes(low, high, present, seen):
+    """[low, high, seen] ranges of the ids low..high not in `present` (sorted)."""
+    for change_id in present:
+        if change_id < low:
+            continue
+        if change_id > high:
+            break
+        if change_id > low:
+            yield [low, change_id - 1, seen]
+        low = change_id + 1
+    if low <= high:
+        yield [low, high, seen]
+
+
+def _encode(after, gaps):
+    if not gaps:
+        return str(after)
+    gaps = sorted(gaps, key=lambda gap: gap[2])[-MAX_GAPS:]
+    return encode_token([after, [[low, high, int(seen)] for low, high, seen in sorted(gaps)]])
+
+
+def _decode(cursor):
+    """(after, [[low, high, seen], ...]) of a cursor; a plain number has no gaps."""
+    cursor = str(cursor)
+    if cursor.isdigit():
+        return int(cursor), []
+    values = decode_token(cursor, 2)
+    try:
+        after, gaps = int(values[0]), [[int(low), int(high), float(seen)] for low, high, seen in values[1]]
+    except (TypeError, ValueError):
+        raise ValueError(f"Malformed change log cursor {cursor!r}.")
+    return after, gaps
@@ -0,0 +1,219 @@
+"""Bulk employee import from CSV or JSON.
+
+Rows are validated up front, department / job title names are resolved
+through lookup maps loaded once, and the valid rows are inserted with
+executemany() in chunked transactions. Rows that clash with the unique
+employee_number / email constraints are reported back individually instead
+of aborting the load.
+"""
+import csv
+import datetime
+import io
+
+import changes
+import http_cache
+import summaries
+from refdata import lookup
+
+IMPORT_CHUNK_SIZE = 500
+
+REQUIRED_FIELDS = ("employee_number", "first_name", "last_name", "email", "hire_date")
+
+INSERT_SQL = """
+    INSERT INTO employees
+    (employee_number, first_name, last_name, email, phone, hire_date, department_id, job_title_id, is_active)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1)
+"""
+
+
+def read_csv(file_storage):
+    """Parse an uploaded CSV file (header row required) into a list of dicts."""
+    text = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig", newline="")
+    return list(csv.DictReader(text))
+
+
+def _clean(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _resolve(raw, name_key, id_key, by_name, valid_ids, label, errors):
+    """Map a row's department/title (by name or by id) to an id."""
+    name = _clean(raw.get(name_key))
+    if name:
+        found = by_name.get(name.lower())
+        if found is None:
+            errors.append(f"Unknown {label} '{name}'.")
+        return found
+
+    raw_id = _clean(raw.get(id_key))
+    if not raw_id:
+        errors.append(f"{name_key} or {id_key} is required.")
+        return None
+    try:
+        value = int(raw_id)
+    except ValueError:
+        errors.append(f"{id_key} must be a number.")
+        return None
+    if value not in valid_ids:
+        errors.append(f"Unknown {label} id {value}.")
+        return None
+    return value
+
+
+def validate(rows, cur):
+    """Split input rows into insertable tuples and per-row failures.
+
+    Returns (valid, failures) where valid is a list of (row_number, params)
+    and failures a list of {"row", "employee_number", "errors"} dicts.
+    """
+    departments = lookup("departments", cur)
+    job_titles = lookup("job_titles", cur)
+    dept_by_name = {d["department_name"].lower(): d["department_id"] for d in departments}
+    title_by_name = {j["title_name"].lower(): j["job_title_id"] for j in job_titles}
+    dept_ids = set(dept_by_name.values())
+    title_ids = set(title_by_name.values())
+
+    valid, failures = [], []
+    seen_numbers, seen_emails = {}, {}
+
+    for row_number, raw in enumerate(rows, start=1):
+        errors = []
+        if not isinstance(raw, dict):
+            failures.append({"row": row_number, "employee_number": None,
+                             "errors": ["Row must be an object."]})
+            continue
+
+        fields = {f: _clean(raw.get(f)) for f in REQUIRED_FIELDS}
+        for f in REQUIRED_FIELDS:
+            if not fields[f]:
+                errors.append(f"{f} is required.")
+
+        hire_date = fields["hire_date"]
+        if hire_date:
+            try:
+                datetime.date.fromisoformat(hire_date)
+            except ValueError:
+                errors.append("hire_date must be YYYY-MM-DD.")
+
+        department_id = _resolve(raw, "department_name", "department_id", dept_by_name, dept_ids,
+                                 "department", errors)
+        job_title_id = _resolve(raw, "title_name", "job_title_id", title_by_name, title_ids,
+                                "job title", errors)
+
+        number, email = fields["employee_number"], fields["email"].lower()
+        if number in seen_numbers:
+            errors.append(f"Duplicate employee_number in upload (row {seen_numbers[number]}).")
+        if email and email in seen_emails:
+            errors.append(f"Duplicate email in upload (row {seen_emails[email]}).")
+
+        if errors:
+            failures.append({"row": row_number, "employee_number": number or None, "errors": errors})
+            continue
+
+        seen_numbers[number] = row_number
+        seen_emails[email] = row_number
+        phone = _clean(raw.get("phone")) or None
+        valid.append((row_number, (number, fields["first_name"], fields["last_name"], fields["email"],
+                                   phone, hire_date, department_id, job_title_id)))
+
+    return valid, failures
+
+
+def _existing(cur, chunk):
+    """Employee numbers and emails in `chunk` that are already taken."""
+    numbers = [params[0] for _, params in chunk]
+    emails = [params[3] for _, params in chunk]
+    marks_n = ", ".join(["%s"] * len(numbers))
+    marks_e = ", ".join(["%s"] * len(emails))
+    cur.execute(f"""
+        SELECT employee_number, email FROM employees
+        WHERE employee_number IN ({marks_n}) OR email IN ({marks_e})
+    """, numbers + emails)
+    taken_numbers, taken_emails = set(), set()
+    for number, email in cur.fetchall():
+        taken_numbers.add(number)
+        taken_emails.add(email.lower())
+    return taken_numbers, taken_emails
+
+
+def _duplicate_message(error):
+    msg = str(error)
+    if "employee_number" in msg:
+        return "Employee number already exists."
+    if "email" in msg:
+        return "Email address already exists."
+    return f"Database error: {error}"
+
+
+def _summary_row(params):
+    return {"department_id": params[6], "job_title_id": params[7], "is_active": 1}
+
+
+def import_employees(conn, rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """Validate and insert `rows`; returns a report dict."""
+    cur = conn.cursor(dictionary=True)
+    try:
+        valid, failures = validate(rows, cur)
+    finally:
+        cur.close()
+
+    inserted = 0
+    chunks = 0
+    cur = conn.cursor()
+    try:
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            chunks += 1
+
+            taken_numbers, taken_emails = _existing(cur, chunk)
+            batch = []
+            for row_number, params in chunk:
+                errors = []
+                if params[0] in taken_numbers:
+                    errors.append("Employee number already exists.")
+                if params[3].lower() in taken_emails:
+                    errors.append("Email address already exists.")
+                if errors:
+                    failures.append({"row": row_number, "employee_number": params[0], "errors": errors})
+                else:
+                    batch.append((row_number, params))
+            if not batch:
+                continue
+
+            try:
+                cur.executemany(INSERT_SQL, [params for _, params in batch])
+                summaries.employees_changed(conn, after=[_summary_row(params) for _, params in batch])
+                numbers = [params[0] for _, params in batch]
+                changes.record_where(conn, "employees", changes.INSERT,
+                                     f"employee_number IN ({', '.join(['%s'] * len(numbers))})", numbers)
+                http_cache.bump(conn, "employees")
+                conn.commit()
+                inserted += len(batch)
+            except Exception:
+                # something changed under us (e.g. a concurrent insert); redo this chunk row by row
+                conn.rollback()
+                for row_number, params in batch:
+                    try:
+                        cur.execute(INSERT_SQL, params)
+                        summaries.employees_changed(conn, after=[_summary_row(params)])
+                        changes.record(conn, "employees", changes.INSERT, [cur.lastrowid])
+                        http_cache.bump(conn, "employees")
+                        conn.commit()
+                        inserted += 1
+                    except Exception as e:
+                        conn.rollback()
+                        failures.append({"row": row_number, "employee_number": params[0],
+                                         "errors": [_duplicate_message(e)]})
+    finally:
+        cur.close()
+
+    failures.sort(key=lambda f: f["row"])
+    return {
+        "total": len(rows),
+        "inserted": inserted,
+        "failed": len(failures),
+        "chunks": chunks,
+        "failures": failures,
+    }
@@ -0,0 +1,179 @@
+"""Read-through cache of single rows for the edit pages.
+
+Rows are keyed by (table, primary key), filled on the first read and evicted
+by the app's UPDATE and disable routes. The default backend is a size-bounded
+in-process LRU; ENTITY_CACHE=redis shares the cache between processes through
+any Redis-compatible server at REDIS_URL (requires the `redis` package), and
+ENTITY_CACHE=off disables caching.
+
+Each row is stored with its table's table_versions counter, read before the
+row. A hit whose counter no longer matches is reloaded, so a write made by
+another worker retires the rows of that table here within
+HTTP_CACHE_VERSION_TTL seconds (the age of http_cache.primary_versions, a
+per-process snapshot of the counters on the primary), not only the row it
+evicted in its own process.
+"""
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+ENTITY_CACHE = os.environ.get("ENTITY_CACHE", "lru")  # lru | redis | off
+ENTITY_CACHE_SIZE = int(os.environ.get("ENTITY_CACHE_SIZE", 10000))
+ENTITY_CACHE_TTL = int(os.environ.get("ENTITY_CACHE_TTL", 3600))  # seconds, redis only
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+
+PRIMARY_KEYS = {
+    "employees": "employee_id",
+    "clients": "client_id",
+    "projects": "project_id",
+    "tasks": "task_id",
+}
+
+
+class LRUBackend:
+    """Bounded least-recently-used map."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            row = self._data.get(key)
+            if row is not None:
+                self._data.move_to_end(key)
+            return row
+
+    def set(self, key, row):
+        with self._lock:
+            self._data[key] = row
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def size(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """Redis-compatible shared backend; eviction is left to the server's maxmemory policy."""
+
+    def __init__(self, url, ttl):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("ENTITY_CACHE=redis requires the 'redis' package.")
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.evictions = 0
+
+    @staticmethod
+    def _key(key):
+        return f"entity:{key[0]}:{key[1]}"
+
+    def get(self, key):
+        raw = self._client.get(self._key(key))
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, row):
+        self._client.set(self._key(key), pickle.dumps(row), ex=self.ttl)
+
+    def delete(self, key):
+        self._client.delete(self._key(key))
+
+    def size(self):
+        return None
+
+
+class EntityCache:
+    """Read-through row cache with hit / miss / eviction counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._writes = 0  # bumped by invalidate(); a load that overlaps a write is not stored
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # hits dropped because their table changed since they were stored
+        self.invalidations = 0
+
+    def get(self, cur, table, pk):
+        """The row of `table` with primary key `pk` (None if missing), via `cur`."""
+        key = (table, pk)
+        version = None
+        if self.backend is not None:
+            version = _table_version(table, cur)
+            entry = self.backend.get(key)
+            if entry is not None and entry[0] == version:
+                with self._lock:
+                    self.hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                with self._lock:
+                    self.stale += 1
+
+        with self._lock:
+            self.misses += 1
+            writes = self._writes
+        cur.execute(f"SELECT * FROM {table} WHERE {PRIMARY_KEYS[table]} = %s;", (pk,))
+        row = cur.fetchone()
+        if row is not None and self.backend is not None:
+            with self._lock:
+                fresh = writes == self._writes
+            if fresh:
+                self.backend.set(key, (version, dict(row)))
+        return row
+
+    def invalidate(self, table, pk):
+        with self._lock:
+            self._writes += 1
+            self.invalidations += 1
+        if self.backend is not None:
+            self.backend.delete((table, pk))
+
+    def stats(self):
+        backend = self.backend
+        return {
+            "backend": ENTITY_CACHE,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "invalidations": self.invalidations,
+            "evictions": backend.evictions if backend is not None else 0,
+            "size": backend.size() if backend is not None else 0,
+        }
+
+
+def _table_version(table, cur):
+    import http_cache  # it imports LRUBackend from here
+    # reloaded on the route's own (primary) cursor: a second checkout could starve the pool
+    return http_cache.primary_versions.get(cur).get(table, (0, 0.0))[0]
+
+
+def _make_backend():
+    if ENTITY_CACHE == "redis":
+        return RedisBackend(REDIS_URL, ENTITY_CACHE_TTL)
+    if ENTITY_CACHE == "off":
+        return None
+    return LRUBackend(ENTITY_CACHE_SIZE)
+
+
+cache = EntityCache(_make_backend())
+
+
+def get_entity(cur, table, pk):
+    """Cached `SELECT * FROM table WHERE pk = ...` for the edit pages (needs a dictionary cursor)."""
+    return cache.get(cur, table, pk)
+
+
+def invalidate_entity(table, pk):
+    """Drop a row from the cache after it has been written."""
+    cache.invalidate(table, pk)
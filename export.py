@@ -0,0 +1,103 @@
+"""Streaming CSV / NDJSON export of list queries.
+
+Rows are read through an unbuffered cursor in fetchmany() batches and
+encoded batch by batch, so memory stays flat however large the table is.
+"""
+import csv
+import datetime
+import decimal
+import io
+import json
+
+from final_project_db import get_connection
+
+EXPORT_BATCH_SIZE = 1000
+
+MIMETYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", "replace")
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_chunks(columns, batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.getvalue()
+    for rows in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(rows)
+        yield buf.getvalue()
+
+
+def _ndjson_chunks(columns, batches):
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=json_default, separators=(",", ":")) + "\n"
+            for row in rows
+        )
+
+
+def stream_query(select_sql, where_parts, params, order_by, fmt, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """Generator yielding `select_sql` (filtered and ordered) encoded as `fmt`.
+
+    The connection is borrowed when iteration starts and returned when it
+    finishes or the client goes away. `progress`, if given, is called with
+    the number of rows read so far after each batch.
+    """
+    where_clause = ""
+    if where_parts:
+        where_clause = "WHERE " + " AND ".join(where_parts)
+
+    conn = get_connection()
+    cur = conn.cursor(buffered=False)  # stream rows from the server instead of loading them all
+    try:
+        cur.execute(f"""
+            {select_sql}
+            {where_clause}
+            ORDER BY {order_by}
+        """, params)
+        columns = list(cur.column_names)
+
+        def batches():
+            done = 0
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    return
+                done += len(rows)
+                if progress is not None:
+                    progress(done)
+                yield rows
+
+        encode = _csv_chunks if fmt == "csv" else _ndjson_chunks
+        yield from encode(columns, batches())
+    finally:
+        cur.close(); conn.close()
+
+
+def count_query(select_sql, where_parts, params):
+    """Number of rows stream_query() would export (for progress reporting)."""
+    where_clause = ""
+    if where_parts:
+        where_clause = "WHERE " + " AND ".join(where_parts)
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"SELECT COUNT(*) FROM ({select_sql} {where_clause}) AS export_rows", params)
+        return cur.fetchone()[0]
+    finally:
+        cur.close(); conn.close()
@@ -1,6 +1,16 @@
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
 import mysql.connector
 from mysql.connector import Error
 
+import instrumentation
+import sqlite_backend
+
 DB_CONFIG = {
     "host": "192.168.1.36",
     "port": 3306,
@@ -9,10 +19,561 @@ DB_CONFIG = {
     "database": "final_project_db",
 }
 
+# "mysql" talks to DB_CONFIG; "sqlite" uses a local file as a stand-in server
+DB_BACKEND = os.environ.get("DB_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "final_project_db.sqlite3")
+
+POOL_CONFIG = {
+    "size": int(os.environ.get("DB_POOL_SIZE", 10)),              # max open connections
+    "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),      # seconds to wait for a free one
+    "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800)),  # recycle after N seconds
+    "health_check": os.environ.get("DB_POOL_HEALTH_CHECK", "1") == "1",  # ping on borrow
+}
+STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100))  # prepared statements per connection
+
+# Read replicas for the SELECT-only routes (see get_read_connection): "host[:port],..." sharing
+# DB_CONFIG's user, password and database, or for the SQLite stand-in a list of files
+REPLICA_HOSTS = [h for h in os.environ.get("DB_REPLICAS", "").split(",") if h.strip()]
+SQLITE_REPLICA_PATHS = [p for p in os.environ.get("SQLITE_REPLICA_PATHS", "").split(",") if p.strip()]
+REPLICA_CONFIG = {
+    "retry_after": float(os.environ.get("DB_REPLICA_RETRY_AFTER", 30)),     # seconds a failed replica is skipped
+    "check_interval": float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", 5)),  # seconds between lag checks
+    "max_lag": float(os.environ.get("DB_REPLICA_MAX_LAG", 5)),              # seconds behind before it is skipped
+}
+READ_YOUR_WRITES = float(os.environ.get("DB_READ_YOUR_WRITES", 5))  # seconds a session reads the primary after writing
+
+
+class PoolTimeoutError(RuntimeError):
+    """No pooled connection became free within the checkout timeout."""
+
+
+def _connect():
+    """Open a new raw connection to the configured backend."""
+    if DB_BACKEND == "sqlite":
+        return sqlite_backend.connect(SQLITE_PATH)
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def _replica_connectors():
+    """[(name, connect function)] for the configured replicas."""
+    if DB_BACKEND == "sqlite":
+        return [(path, lambda path=path: sqlite_backend.connect(path)) for path in SQLITE_REPLICA_PATHS]
+    found = []
+    for entry in REPLICA_HOSTS:
+        host, _, port = entry.strip().partition(":")
+        config = dict(DB_CONFIG, host=host, port=int(port or DB_CONFIG["port"]))
+        found.append((entry.strip(), lambda config=config: mysql.connector.connect(**config)))
+    return found
+
+
+class StatementCache:
+    """Prepared-statement cursors of one connection, least recently used first.
+
+    Lives as long as the connection, across checkouts; evicting a cursor
+    closes it, which deallocates the statement on the server.
+    """
+
+    def __init__(self, raw, size):
+        self._raw = raw
+        self.size = size
+        self._cursors = OrderedDict()  # (sql, dictionary) -> (sql, cursor)
+
+    def get(self, sql, dictionary=False):
+        """(cursor, sql to run on it, True if the statement is new to this connection).
+
+        Always execute the returned sql string: mysql.connector only skips
+        re-preparing when it is the very object executed last time.
+        """
+        key = (sql, dictionary)
+        entry = self._cursors.get(key)
+        if entry is not None:
+            self._cursors.move_to_end(key)
+            return entry[1], entry[0], False
+        cursor = self._raw.cursor(prepared=True, dictionary=dictionary)
+        self._cursors[key] = (sql, cursor)
+        while len(self._cursors) > self.size:
+            _, (_, evicted) = self._cursors.popitem(last=False)
+            try:
+                evicted.close()
+            except Exception:
+                pass
+        return cursor, sql, True
+
+    def __len__(self):
+        return len(self._cursors)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections."""
+
+    def __init__(self, connect, size=10, timeout=10.0, max_lifetime=1800.0, health_check=True,
+                 statement_cache_size=STATEMENT_CACHE_SIZE):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+        self.statement_cache_size = statement_cache_size
+        self._statements = {}  # id(raw connection) -> StatementCache
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (raw connection, created_at), most recently used on the right
+        self._open = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._failed_checks = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self):
+        """Borrow a connection, waiting up to `timeout` seconds for one to free up."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        while True:
+            raw, created_at = self._checkout(deadline)
+            if raw is None:
+                # we reserved a slot; open the connection outside the lock
+                try:
+                    raw = self._connect()
+                except Exception:
+                    self._give_back_slot()
+                    raise
+                created_at = time.monotonic()
+                with self._cond:
+                    self._created += 1
+            elif not self._usable(raw, created_at):
+                self._discard(raw)
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            return PooledConnection(self, raw, created_at)
+
+    def _checkout(self, deadline):
+        """Take an idle connection, or reserve a slot for a new one (returns None)."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+                if self._idle:
+                    self._in_use += 1
+                    return self._idle.pop()
+                if self._open < self.size:
+                    self._open += 1
+                    self._in_use += 1
+                    return None, None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout:.1f}s "
+                        f"(pool size {self.size})."
+                    )
+                self._waiters += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+    def _usable(self, raw, created_at):
+        if time.monotonic() - created_at > self.max_lifetime:
+            with self._cond:
+                self._recycled += 1
+            return False
+        if self.health_check:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._failed_checks += 1
+                return False
+        return True
+
+    def _give_back_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    def statements(self, raw):
+        """The prepared-statement cache of a connection borrowed from this pool."""
+        with self._cond:
+            cache = self._statements.get(id(raw))
+            if cache is None:
+                cache = self._statements[id(raw)] = StatementCache(raw, self.statement_cache_size)
+            return cache
+
+    def _discard(self, raw):
+        with self._cond:
+            self._statements.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+        self._give_back_slot()
+
+    def release(self, raw, created_at):
+        """Return a borrowed connection; broken or expired ones are closed instead."""
+        try:
+            # never hand the next borrower a half-finished transaction or unread rows
+            if getattr(raw, "unread_result", False):
+                raw.consume_results()
+            raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+
+        if self._closed or time.monotonic() - created_at > self.max_lifetime:
+            if not self._closed:
+                with self._cond:
+                    self._recycled += 1
+            self._discard(raw)
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((raw, created_at))
+            self._cond.notify()
+
+    def close(self):
+        """Close idle connections; borrowed ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for raw, _ in idle:
+            with self._cond:
+                self._statements.pop(id(raw), None)
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Snapshot of pool usage counters."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiters": self._waiters,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "failed_health_checks": self._failed_checks,
+                "wait_time_total": self._wait_total,
+                "wait_time_max": self._wait_max,
+                "wait_time_avg": self._wait_total / self._checkouts if self._checkouts else 0.0,
+                "prepared_statements": sum(len(c) for c in self._statements.values()),
+            }
+
+
+class PooledConnection:
+    """Proxy handed out by the pool; close() returns the connection instead of closing it."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise RuntimeError("Connection has already been returned to the pool.")
+        return getattr(raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return instrumentation.InstrumentedCursor(self._raw.cursor(*args, **kwargs))
+
+    def commit(self):
+        self._raw.commit()
+        if self._pool is _pool:
+            _wrote.set(True)  # see wrote_in_request()
+
+    @property
+    def statements(self):
+        """This connection's prepared-statement cache (see queries.py)."""
+        if self._raw is None:
+            raise RuntimeError("Connection has already been returned to the pool.")
+        return self._pool.statements(self._raw)
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # safety net for code paths that return without closing
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class Replica:
+    """One read replica: its pool and health."""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.down_until = 0.0  # skipped until then after a failure
+        self.checked_at = 0.0
+        self.lag = None
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaSet:
+    """The read replicas of this process, tried in a fixed order per process.
+
+    Each worker process prefers a different replica (the order is rotated by
+    pid) and stays on it while it is healthy, so a list page and the table
+    versions its ETag is built from are read from the same server. A replica
+    that cannot be reached, or that is more than `max_lag` seconds behind,
+    is skipped for `retry_after` seconds; with none left, reads go to the
+    primary.
+
+    The order and health rules live here; acquire() and _try() are the only
+    parts that touch a connection, and async_db.AsyncReplicaSet awaits its
+    own versions of them.
+    """
+
+    def __init__(self, connectors, retry_after=30.0, check_interval=5.0, max_lag=5.0):
+        self.replicas = [Replica(name, self._new_pool(connect)) for name, connect in connectors]
+        self.retry_after = retry_after
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._lock = threading.Lock()
+        self.fallbacks = 0
+
+    def _new_pool(self, connect):
+        return ConnectionPool(connect, **POOL_CONFIG)
+
+    def acquire(self):
+        """A connection to a healthy replica, or None if there is none."""
+        for replica in self._candidates():
+            conn = self._try(replica)
+            if conn is not None:
+                return conn
+        self._fell_back()
+        return None
+
+    def _try(self, replica):
+        try:
+            conn = replica.pool.acquire()
+        except PoolTimeoutError:
+            return None  # busy, not broken
+        except Exception:
+            self._mark_down(replica)
+            return None
+        if self._check_due(replica):
+            try:
+                lag = _replication_lag(conn)
+            except Exception:
+                lag = None
+            if not self._checked(replica, lag):
+                conn.close()
+                return None
+        self._served(replica)
+        return conn
+
+    def _candidates(self):
+        """The replicas to try, in this process's order, less those marked down."""
+        if not self.replicas:
+            return []
+        start = os.getpid() % len(self.replicas)
+        now = time.monotonic()
+        return [r for r in self.replicas[start:] + self.replicas[:start] if r.down_until <= now]
+
+    def _check_due(self, replica):
+        return time.monotonic() - replica.checked_at >= self.check_interval
+
+    def _checked(self, replica, lag):
+        """Record a lag reading (None: unknown); False, and the replica marked down, if it is too far behind."""
+        replica.lag = lag
+        replica.checked_at = time.monotonic()
+        if lag is None or lag > self.max_lag:
+            self._mark_down(replica)
+            return False
+        return True
+
+    def _mark_down(self, replica):
+        with self._lock:
+            replica.failures += 1
+            replica.down_until = time.monotonic() + self.retry_after
+
+    def _served(self, replica):
+        with self._lock:
+            replica.reads += 1
+
+    def _fell_back(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def close(self):
+        for replica in self.replicas:
+            replica.pool.close()
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "fallbacks": self.fallbacks,
+            "replicas": [{"name": r.name, "healthy": r.down_until <= now, "lag": r.lag, "reads": r.reads,
+                          "failures": r.failures, "pool": r.pool.stats()} for r in self.replicas],
+        }
+
+
+def _lag_statement():
+    """The statement whose first row gives a replica's lag (see _lag_from)."""
+    if DB_BACKEND == "sqlite":
+        # the stand-ins are plain copies; this fails on a missing file (opened empty)
+        return "SELECT COUNT(*) AS tables FROM table_versions"
+    return "SHOW REPLICA STATUS"
+
+
+def _lag_from(row):
+    """Seconds behind the primary, from the first row of _lag_statement() (None: replication stopped)."""
+    if DB_BACKEND == "sqlite" or row is None:
+        return 0.0  # a copy, or not a replica (e.g. pointed at the primary itself)
+    return row.get("Seconds_Behind_Source")
+
+
+def _replication_lag(conn):
+    """Seconds the replica behind `conn` is behind its primary (None: replication stopped)."""
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute(_lag_statement())
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+    return _lag_from(rows[0] if rows else None)
+
+
+_pool = None
+_replicas = None
+_pool_lock = threading.Lock()
+_pinned = contextvars.ContextVar("read_from_primary", default=False)
+_wrote = contextvars.ContextVar("wrote_to_primary", default=False)
+
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect, **POOL_CONFIG)
+    return _pool
+
+
+def get_replicas():
+    """Return the process-wide ReplicaSet (empty when none are configured)."""
+    global _replicas
+    if _replicas is None:
+        with _pool_lock:
+            if _replicas is None:
+                _replicas = ReplicaSet(_replica_connectors(), **REPLICA_CONFIG)
+    return _replicas
+
+
+def reset_pool():
+    """Close the current pools so the next get_connection() builds fresh ones
+    (e.g. after changing POOL_CONFIG or in a forked worker)."""
+    global _pool, _replicas
+    with _pool_lock:
+        old, _pool = _pool, None
+        old_replicas, _replicas = _replicas, None
+    if old is not None:
+        old.close()
+    if old_replicas is not None:
+        old_replicas.close()
+
+
+def after_fork():
+    """Forget pools inherited through fork() without closing them: their
+    sockets still belong to the parent. Call first thing in a forked worker."""
+    global _pool, _replicas, _pool_lock
+    _pool = None
+    _replicas = None
+    _pool_lock = threading.Lock()
+
+
+def pool_stats(create=True):
+    """Usage counters for the process-wide pool (None if there is none yet and not `create`)."""
+    if _pool is None and not create:
+        return None
+    return get_pool().stats()
+
+
+def replica_stats():
+    """Health and usage of the read replicas (None when none are configured)."""
+    replicas = get_replicas()
+    return replicas.stats() if replicas.replicas else None
+
+
 def get_connection():
-    """Establish and return a MySQL database connection."""
+    """Borrow a database connection from the pool. Call close() to return it."""
+    start = time.perf_counter()
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except Error as e:
-        raise RuntimeError(f"MySQL connection error: {e}")
+        conn = get_pool().acquire()
+    except PoolTimeoutError:
+        raise
+    except (Error, sqlite3.Error) as e:
+        raise RuntimeError(f"Database connection error: {e}")
+    instrumentation.record_acquire(time.perf_counter() - start)
+    return conn
+
+
+def get_read_connection():
+    """Borrow a connection for SELECTs only: a replica when one is configured and
+    healthy and this request is not pinned to the primary, else the primary."""
+    if not _pinned.get():
+        start = time.perf_counter()
+        conn = get_replicas().acquire()
+        if conn is not None:
+            instrumentation.record_acquire(time.perf_counter() - start)
+            return conn
+    return get_connection()
+
+
+def start_request(pinned=False):
+    """Reset the per-request routing state; `pinned` sends this request's reads
+    to the primary (the session wrote within READ_YOUR_WRITES seconds)."""
+    _pinned.set(pinned)
+    _wrote.set(False)
+
+
+def has_replicas():
+    """True if read replicas are configured."""
+    return bool(get_replicas().replicas)
+
+
+def pinned():
+    """True if this request was pinned to the primary by start_request()."""
+    return _pinned.get()
+
+
+def wrote_in_request():
+    """True once a primary connection committed in this request."""
+    return _wrote.get()
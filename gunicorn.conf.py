@@ -0,0 +1,61 @@
+"""Production settings for serving app.py with pre-forked gunicorn workers.
+
+    python serve.py                 # or: gunicorn -c gunicorn.conf.py
+    kill -HUP <master pid>          # graceful reload: new workers, old ones finish their requests
+
+The app is imported once in the master (preload_app) and forked into
+WEB_WORKERS processes; each worker opens its own connection pool after the
+fork. Workers are replaced after about WEB_MAX_REQUESTS requests.
+"""
+import multiprocessing
+import os
+
+import final_project_db
+import jobs
+import worker_stats
+
+wsgi_app = "app:app"
+bind = os.environ.get("WEB_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("WEB_THREADS", 1))  # >1 switches to the gthread worker
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = True
+
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 5000))  # 0 disables recycling
+max_requests_jitter = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", max_requests // 10))
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("WEB_KEEPALIVE", 5))
+
+accesslog = os.environ.get("WEB_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.environ.get("WEB_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    worker_stats.clear()
+
+
+def pre_fork(server, worker):
+    # nothing the master opened may be shared with a child
+    final_project_db.reset_pool()
+
+
+def post_fork(server, worker):
+    final_project_db.after_fork()
+    worker_stats.current.start(age=worker.age, max_requests=worker.max_requests or None)
+
+
+def post_request(worker, req, environ, resp):
+    worker_stats.current.request_finished(resp.status_code)
+
+
+def worker_exit(server, worker):
+    jobs.queue.shutdown(wait=True)  # running jobs get until the graceful timeout
+    worker_stats.current.stop()
+    final_project_db.reset_pool()
+
+
+def child_exit(server, worker):
+    # also covers workers killed without running worker_exit
+    worker_stats.remove(worker.pid)
@@ -0,0 +1,180 @@
+"""Conditional GETs for the list pages.
+
+Every write route bumps a counter per changed table (table_versions, in the
+same transaction as the change). A list page's weak ETag is derived from the
+counters of the tables it reads, so a request whose If-None-Match still
+matches is answered 304 without running the list query or rendering.
+
+Counters are read through a per-process snapshot that is refreshed at most
+every HTTP_CACHE_VERSION_TTL seconds and dropped after this process's own
+writes: another worker's write can take up to the TTL to show up here. The
+snapshot is read where the list pages read (a replica when one is configured,
+see final_project_db.get_read_connection); a request pinned to the primary
+after its session wrote reads the counters from the primary, uncached, so its
+page and its ETag agree. A second snapshot, always read from the primary,
+validates the rows cached by entity_cache.py.
+
+With HTTP_PAGE_CACHE_SIZE > 0 the rendered pages are also kept in an LRU
+keyed by (route, query arguments, counters), so a browser without the page
+is served without querying either.
+"""
+import contextvars
+import hashlib
+import os
+import threading
+import time
+
+from entity_cache import LRUBackend
+import final_project_db
+from queries import Query, fetch_all
+
+HTTP_CACHE_VERSION_TTL = float(os.environ.get("HTTP_CACHE_VERSION_TTL", 1.0))  # seconds
+HTTP_PAGE_CACHE_SIZE = int(os.environ.get("HTTP_PAGE_CACHE_SIZE", 0))  # rendered pages; 0 = off
+
+TRACKED_TABLES = ("employees", "clients", "projects", "tasks")
+
+READ_VERSIONS = Query("table_versions.read", "SELECT table_name, version, changed_at FROM table_versions")
+
+
+class TableVersions:
+    """Per-process snapshot of table_versions with a generation guard like refdata.py's.
+
+    Read through `connect`, or where the list pages read when it is None.
+    """
+
+    def __init__(self, ttl=HTTP_CACHE_VERSION_TTL, connect=None):
+        self.ttl = ttl
+        self.connect = connect
+        self._lock = threading.Lock()
+        self._snapshot = None  # {table: (version, changed_at)}
+        self._expires = 0.0
+        self._generation = 0
+        self.reloads = 0
+
+    def get(self, cur=None):
+        """{table: (version, changed_at)}, reloaded when expired or invalidated.
+
+        A caller already holding a connection to the snapshot's server passes a
+        dictionary cursor on it, so the reload does not borrow a second one.
+        """
+        if self.connect is None and final_project_db.pinned():
+            return self._load(final_project_db.get_connection)
+        with self._lock:
+            if self._snapshot is not None and self._expires > time.monotonic():
+                return self._snapshot
+            generation = self._generation
+        if cur is not None:
+            cur.execute(READ_VERSIONS.sql)
+            snapshot = {row["table_name"]: (int(row["version"]), float(row["changed_at"])) for row in cur.fetchall()}
+        else:
+            snapshot = self._load(self.connect or final_project_db.get_read_connection)
+        with self._lock:
+            self.reloads += 1
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._expires = time.monotonic() + self.ttl
+        return snapshot
+
+    @staticmethod
+    def _load(connect):
+        conn = connect()
+        try:
+            rows = fetch_all(conn, READ_VERSIONS, dictionary=False)
+        finally:
+            conn.close()
+        return {name: (int(version), float(changed_at)) for name, version, changed_at in rows}
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+
+versions = TableVersions()
+primary_versions = TableVersions(connect=final_project_db.get_connection)  # entity_cache.py's check
+pages = LRUBackend(HTTP_PAGE_CACHE_SIZE) if HTTP_PAGE_CACHE_SIZE > 0 else None
+page_hits = 0
+page_misses = 0
+_counter_lock = threading.Lock()
+_bumped = contextvars.ContextVar("tables_bumped", default=False)
+
+
+def bump(conn, *tables):
+    """Record a change to `tables` in the caller's transaction. Call before commit;
+    the local snapshot is dropped by changes_committed() once the commit is done."""
+    _bumped.set(True)
+    cur = conn.cursor()
+    try:
+        marks = ", ".join(["%s"] * len(tables))
+        cur.execute(f"UPDATE table_versions SET version = version + 1, changed_at = %s WHERE table_name IN ({marks})",
+                    (time.time(),) + tables)
+    finally:
+        cur.close()
+
+
+def changes_committed():
+    """After a request that called bump(): forget the local snapshot so this
+    process's next page sees its own writes."""
+    if _bumped.get():
+        _bumped.set(False)
+        versions.invalidate()
+        primary_versions.invalidate()
+
+
+def _release():
+    """(fingerprint, newest mtime) of the code and templates, so a deploy changes every validator."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(root, "app.py")]
+    for folder, _, files in sorted(os.walk(os.path.join(root, "templates"))):
+        paths.extend(os.path.join(folder, name) for name in sorted(files))
+    stats = [(path, os.stat(path)) for path in paths]
+    raw = "|".join(f"{os.path.relpath(path, root)}:{st.st_size}:{st.st_mtime_ns}" for path, st in stats)
+    return hashlib.sha1(raw.encode()).hexdigest()[:8], max(st.st_mtime for _, st in stats)
+
+
+RELEASE, RELEASE_TIME = _release()
+
+
+def validator(endpoint, tables):
+    """(weak etag, last modified Unix time or None) for a page reading `tables`."""
+    snapshot = versions.get()
+    state = [snapshot.get(t, (0, 0.0)) for t in tables]
+    raw = f"{RELEASE}:{endpoint}:" + ",".join(f"{t}={v}" for t, (v, _) in zip(tables, state))
+    changed_at = max([RELEASE_TIME] + [c for _, c in state])
+    # a timestamp from the current second may still move without changing its HTTP date
+    if time.time() - changed_at < 1:
+        changed_at = None
+    return hashlib.sha1(raw.encode()).hexdigest()[:20], changed_at
+
+
+def page_key(endpoint, args, etag):
+    return (endpoint, tuple(sorted(args.items(multi=True))), etag)
+
+
+def cached_page(key):
+    """The rendered page stored under `key`, or None (also when the page cache is off)."""
+    global page_hits, page_misses
+    if pages is None:
+        return None
+    body = pages.get(key)
+    with _counter_lock:
+        if body is None:
+            page_misses += 1
+        else:
+            page_hits += 1
+    return body
+
+
+def store_page(key, body):
+    if pages is not None:
+        pages.set(key, body)
+
+
+def stats():
+    return {
+        "version_reloads": versions.reloads,
+        "page_cache_size": pages.size() if pages is not None else 0,
+        "page_hits": page_hits,
+        "page_misses": page_misses,
+        "page_evictions": pages.evictions if pages is not None else 0,
+    }
@@ -0,0 +1,178 @@
+"""Per-request SQL instrumentation and slow-query log.
+
+Cursors handed out by final_project_db are wrapped in InstrumentedCursor,
+which times every statement, counts the rows fetched and files them under the
+current request (see begin_request / end_request, driven by app.py).
+Statements slower than SLOW_QUERY_MS are written to the slow-query log with a
+normalized fingerprint so repeats of the same query group together.
+"""
+import contextvars
+import logging
+import os
+import re
+import time
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", "slow_queries.log")
+
+slow_log = logging.getLogger("final_project_db.slow_queries")
+_slow_log_ready = False
+
+_current = contextvars.ContextVar("query_stats", default=None)
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalize a statement so that calls differing only in literals match."""
+    fp = _STRING_RE.sub("?", sql)
+    fp = _NUMBER_RE.sub("?", fp)
+    fp = _PLACEHOLDER_RE.sub("?", fp)
+    fp = _SPACE_RE.sub(" ", fp).strip().rstrip(";").strip()
+    fp = _IN_LIST_RE.sub("(...)", fp)
+    return fp.lower()
+
+
+class RequestStats:
+    """Statements, timings and connection waits for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []          # dicts: sql, duration, rows
+        self.acquire_time = 0.0
+        self.connections = 0
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def db_time(self):
+        return sum(q["duration"] for q in self.queries)
+
+    @property
+    def rows(self):
+        return sum(q["rows"] for q in self.queries)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Value for the Server-Timing response header (durations in ms)."""
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.query_count} queries, {self.rows} rows"',
+            f'db-acquire;dur={self.acquire_time * 1000:.2f};desc="{self.connections} connections"',
+            f"total;dur={self.elapsed() * 1000:.2f}",
+        ])
+
+
+def begin_request():
+    """Start collecting stats for the current request; returns a reset token."""
+    return _current.set(RequestStats())
+
+
+def end_request(token):
+    """Stop collecting; returns the finished RequestStats."""
+    stats = _current.get()
+    _current.reset(token)
+    return stats
+
+
+def current():
+    """RequestStats for the request in progress, or None outside a request."""
+    return _current.get()
+
+
+def record_acquire(seconds):
+    stats = _current.get()
+    if stats is not None:
+        stats.acquire_time += seconds
+        stats.connections += 1
+
+
+def record_query(sql, params, duration, rows=0):
+    """File one statement under the current request and the slow-query log;
+    returns the record so rows fetched later can be added to it."""
+    record = {"sql": sql, "duration": duration, "rows": rows}
+    stats = _current.get()
+    if stats is not None:
+        stats.queries.append(record)
+    if duration * 1000 >= SLOW_QUERY_MS:
+        _log_slow(sql, params, duration)
+    return record
+
+
+def _log_slow(sql, params, duration):
+    global _slow_log_ready
+    if not _slow_log_ready:
+        if not slow_log.handlers and SLOW_QUERY_LOG:
+            handler = logging.FileHandler(SLOW_QUERY_LOG)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            slow_log.addHandler(handler)
+            slow_log.setLevel(logging.INFO)
+            slow_log.propagate = False
+        _slow_log_ready = True
+    slow_log.info("%.1fms fingerprint=%s sql=%s params=%r",
+                  duration * 1000, fingerprint(sql), _SPACE_RE.sub(" ", sql).strip(), params)
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times statements and counts fetched rows."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._record = None
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _run(self, method, sql, params):
+        start = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            self._record = record_query(sql, params, time.perf_counter() - start)
+
+    def execute(self, sql, params=()):
+        return self._run(self._raw.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        return self._run(self._raw.executemany, sql, seq_of_params)
+
+    def _fetched(self, start, count):
+        if self._record is not None:
+            self._record["duration"] += time.perf_counter() - start
+            self._record["rows"] += count
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._raw.fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=1):
+        start = time.perf_counter()
+        rows = self._raw.fetchmany(size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._raw.fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        return self._raw.close()
@@ -0,0 +1,266 @@
+"""Background jobs: expensive operations run off the request path.
+
+    job = jobs.queue.submit("export", {"table": "tasks", "fmt": "csv"})
+    jobs.queue.get(job["id"])        # status, progress, result
+
+Jobs run on a pool of JOB_WORKERS threads per process, so at most that many
+run at once, and are recorded in a SQLite job table (JOBS_DB) shared by all
+worker processes: any of them can report a job's status, and a job survives
+a restart as a failed "interrupted" entry instead of vanishing. File results
+(exports) are written to JOBS_DIR. Finished jobs older than JOB_RETENTION
+hours are purged at startup.
+
+A job function takes (ctx, **params). It reports progress through
+ctx.progress(done, total, message), which also raises JobCancelled once a
+cancel was requested, and returns a JSON-serializable result.
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOBS_DB = os.environ.get("JOBS_DB", os.path.join(tempfile.gettempdir(), "final_project_db_jobs.sqlite3"))
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(tempfile.gettempdir(), "final_project_db_jobs"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))  # concurrent jobs per process
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", 24))  # hours
+JOB_PROGRESS_INTERVAL = 0.5  # seconds between progress writes
+
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED = ("done", "failed", "cancelled")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id               TEXT PRIMARY KEY,
+        kind             TEXT NOT NULL,
+        params           TEXT NOT NULL,
+        status           TEXT NOT NULL,
+        progress         REAL NOT NULL DEFAULT 0,
+        message          TEXT,
+        result           TEXT,
+        result_file      TEXT,
+        error            TEXT,
+        pid              INTEGER,
+        cancel_requested INTEGER NOT NULL DEFAULT 0,
+        created_at       REAL NOT NULL,
+        started_at       REAL,
+        finished_at      REAL
+    );
+    CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised by JobContext.progress() when the job was asked to stop."""
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobContext:
+    """Handed to a running job: progress reporting, cancellation, result files."""
+
+    def __init__(self, queue, job_id):
+        self._queue = queue
+        self.job_id = job_id
+        self.result_file = None
+        self._written = 0.0
+
+    def progress(self, done, total=None, message=None):
+        """Record progress (done / total); raises JobCancelled if a cancel was requested."""
+        now = time.monotonic()
+        if now - self._written < JOB_PROGRESS_INTERVAL and (total is None or done < total):
+            return
+        self._written = now
+        fraction = min(done / total, 1.0) if total else 0.0
+        with self._queue._db() as db:
+            db.execute("UPDATE jobs SET progress = ?, message = ? WHERE id = ?", (fraction, message, self.job_id))
+            cancel = db.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (self.job_id,)).fetchone()[0]
+        if cancel:
+            raise JobCancelled()
+
+    def file(self, filename):
+        """Path to write this job's file result to (served by the result endpoint as `filename`)."""
+        self.result_file = os.path.join(self._queue.directory, f"{self.job_id}-{filename}")
+        return self.result_file
+
+
+class JobQueue:
+    """Job table plus a bounded thread pool."""
+
+    def __init__(self, path=JOBS_DB, directory=JOBS_DIR, workers=JOB_WORKERS):
+        self.path = path
+        self.directory = directory
+        self.workers = workers
+        self.kinds = {}  # kind -> (function, validate)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._ready_pid = None
+
+    def register(self, kind, validate=None):
+        """Decorator declaring a job kind; `validate(params)` raises ValueError for bad input."""
+        def wrap(fn):
+            self.kinds[kind] = (fn, validate)
+            return fn
+        return wrap
+
+    @contextlib.contextmanager
+    def _db(self):
+        """A connection for one transaction (committed unless it raises), closed afterwards."""
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _ready(self):
+        """Create the table and threads on first use in this process (not in a pre-fork master)."""
+        if self._ready_pid == os.getpid():
+            return
+        with self._lock:
+            if self._ready_pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with self._db() as db:
+                db.execute("PRAGMA journal_mode = WAL")
+                db.executescript(SCHEMA)
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            self._ready_pid = os.getpid()
+            self.recover()
+            self.purge()
+
+    def submit(self, kind, params=None):
+        """Queue a job; returns its record. Raises ValueError for an unknown kind or bad params."""
+        if kind not in self.kinds:
+            raise ValueError(f"Unknown job kind {kind!r}; expected one of {', '.join(sorted(self.kinds))}.")
+        params = dict(params or {})
+        fn, validate = self.kinds[kind]
+        if validate is not None:
+            params = validate(params)
+        self._ready()
+        job_id = uuid.uuid4().hex
+        with self._db() as db:
+            db.execute("INSERT INTO jobs (id, kind, params, status, pid, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                       (job_id, kind, json.dumps(params), os.getpid(), time.time()))
+        self._executor.submit(self._run, job_id, fn, params)
+        return self.get(job_id)
+
+    def _run(self, job_id, fn, params):
+        with self._db() as db:
+            updated = db.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+                                 (time.time(), job_id)).rowcount
+        if not updated:
+            return  # cancelled while queued
+        ctx = JobContext(self, job_id)
+        status, result, error = "done", None, None
+        try:
+            result = fn(ctx, **params)
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        if status != "done" and ctx.result_file:
+            if os.path.exists(ctx.result_file):
+                os.remove(ctx.result_file)  # a partial file
+            ctx.result_file = None
+        with self._db() as db:
+            db.execute("""
+                UPDATE jobs SET status = ?, result = ?, result_file = ?, error = ?, finished_at = ?,
+                                progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END
+                WHERE id = ?
+            """, (status, json.dumps(result) if result is not None else None, ctx.result_file, error, time.time(),
+                  status, job_id))
+
+    def get(self, job_id):
+        """The job's record as a dict, or None."""
+        self._ready()
+        with self._db() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._record(row) if row else None
+
+    def recent(self, limit=50, status=None):
+        self._ready()
+        sql, params = "SELECT * FROM jobs", []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        with self._db() as db:
+            rows = db.execute(sql + " ORDER BY created_at DESC LIMIT ?", params + [limit]).fetchall()
+        return [self._record(row) for row in rows]
+
+    def cancel(self, job_id):
+        """Cancel a queued job now, or ask a running one to stop at its next progress report."""
+        self._ready()
+        with self._db() as db:
+            db.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                       (time.time(), job_id))
+            db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def recover(self):
+        """Fail the unfinished jobs of processes that no longer exist."""
+        with self._db() as db:
+            rows = db.execute("SELECT id, pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+            lost = [row["id"] for row in rows if not _alive(row["pid"])]
+            db.executemany("UPDATE jobs SET status = 'failed', error = 'Interrupted: its process exited.', "
+                           "finished_at = ? WHERE id = ?", [(time.time(), job_id) for job_id in lost])
+        return len(lost)
+
+    def purge(self, hours=JOB_RETENTION):
+        """Delete finished jobs (and their files) older than `hours`."""
+        cutoff = time.time() - hours * 3600
+        with self._db() as db:
+            rows = db.execute("SELECT id, result_file FROM jobs WHERE status IN ('done', 'failed', 'cancelled') "
+                              "AND created_at < ?", (cutoff,)).fetchall()
+            for row in rows:
+                if row["result_file"] and os.path.exists(row["result_file"]):
+                    os.remove(row["result_file"])
+            db.executemany("DELETE FROM jobs WHERE id = ?", [(row["id"],) for row in rows])
+        return len(rows)
+
+    def shutdown(self, wait=False):
+        """Stop taking jobs in this process; queued ones are cancelled, running ones finish."""
+        if self._executor is None or self._ready_pid != os.getpid():
+            return
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        with self._db() as db:
+            db.execute("UPDATE jobs SET status = 'cancelled', error = 'Worker shut down before the job started.', "
+                       "finished_at = ? WHERE status = 'queued' AND pid = ?", (time.time(), os.getpid()))
+
+    def stats(self):
+        """Job counts by status (all processes)."""
+        self._ready()
+        with self._db() as db:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    @staticmethod
+    def _record(row):
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        job["has_file"] = bool(job.pop("result_file"))
+        return job
+
+    def result_file(self, job_id):
+        """Path of a finished job's file result, or None."""
+        with self._db() as db:
+            row = db.execute("SELECT result_file FROM jobs WHERE id = ? AND status = 'done'", (job_id,)).fetchone()
+        return row["result_file"] if row else None
+
+
+queue = JobQueue()
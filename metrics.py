@@ -0,0 +1,235 @@
+"""Per-route request metrics in Prometheus text format.
+
+Each worker thread writes to its own shard of counters, so recording a
+request takes no locks; shards are only summed when /metrics is scraped,
+and a thread's shard is folded into a shared total when the thread ends.
+"""
+import bisect
+import threading
+import weakref
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _RouteStats:
+    __slots__ = ("statuses", "buckets", "count", "seconds", "db_seconds", "render_seconds", "queries")
+
+    def __init__(self):
+        self.statuses = {}
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.seconds = 0.0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.queries = 0
+
+
+class _ShardOwner:
+    """Kept in a thread's local storage: collected when the thread ends."""
+
+
+class Metrics:
+    """Registry of per-thread shards keyed by endpoint.
+
+    When a thread ends its shard is folded into a shared total, so threads
+    that come and go (the dev server, executors) leave no shard behind.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}  # id -> shard of a live thread
+        self._retired = {}  # endpoint -> _RouteStats of threads that have ended
+        self._shards_lock = threading.Lock()  # only taken the first and last time a thread records
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            self._local.owner = owner = _ShardOwner()
+            with self._shards_lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        with self._shards_lock:
+            self._shards.pop(id(shard), None)
+            _merge(self._retired, shard)
+
+    def observe(self, endpoint, status, seconds, db_seconds=0.0, render_seconds=0.0, queries=0):
+        """Record one finished request."""
+        shard = self._shard()
+        stats = shard.get(endpoint)
+        if stats is None:
+            stats = shard[endpoint] = _RouteStats()
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        stats.count += 1
+        stats.seconds += seconds
+        stats.db_seconds += db_seconds
+        stats.render_seconds += render_seconds
+        stats.queries += queries
+
+    def snapshot(self):
+        """Sum all shards into {endpoint: _RouteStats}."""
+        merged = {}
+        with self._shards_lock:
+            # under the lock, so a shard retired meanwhile is counted once
+            shards = list(self._shards.values())
+            _merge(merged, self._retired)
+        for shard in shards:
+            _merge(merged, shard)
+        return merged
+
+    def reset(self):
+        with self._shards_lock:
+            self._retired.clear()
+            for shard in self._shards.values():
+                shard.clear()
+
+
+def _merge(totals, shard):
+    """Add the counters of `shard` into `totals` (both {endpoint: _RouteStats})."""
+    for endpoint, stats in list(shard.items()):
+        total = totals.get(endpoint)
+        if total is None:
+            total = totals[endpoint] = _RouteStats()
+        for status, n in list(stats.statuses.items()):
+            total.statuses[status] = total.statuses.get(status, 0) + n
+        for i, n in enumerate(stats.buckets):
+            total.buckets[i] += n
+        total.count += stats.count
+        total.seconds += stats.seconds
+        total.db_seconds += stats.db_seconds
+        total.render_seconds += stats.render_seconds
+        total.queries += stats.queries
+
+
+registry = Metrics()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render(pool=None, refdata=None, entity=None, http=None, statements=None, jobs=None, replicas=None):
+    """Prometheus exposition text for the request metrics plus optional pool,
+    reference-cache, entity-cache, list page cache, prepared statement, job and read replica stats dicts."""
+    routes = registry.snapshot()
+    out = []
+
+    def family(name, kind, help_text):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+
+    family("app_requests_total", "counter", "Requests handled, by endpoint and HTTP status.")
+    for endpoint, s in sorted(routes.items()):
+        for status, n in sorted(s.statuses.items()):
+            out.append(f'app_requests_total{{endpoint="{_label(endpoint)}",status="{status}"}} {n}')
+
+    family("app_request_duration_seconds", "histogram", "Request latency, by endpoint.")
+    for endpoint, s in sorted(routes.items()):
+        ep = _label(endpoint)
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), s.buckets):
+            cumulative += n
+            out.append(f'app_request_duration_seconds_bucket{{endpoint="{ep}",le="{bound}"}} {cumulative}')
+        out.append(f'app_request_duration_seconds_sum{{endpoint="{ep}"}} {_fmt(s.seconds)}')
+        out.append(f'app_request_duration_seconds_count{{endpoint="{ep}"}} {s.count}')
+
+    family("app_request_db_seconds_total", "counter", "Time spent in SQL statements, by endpoint.")
+    for endpoint, s in sorted(routes.items()):
+        out.append(f'app_request_db_seconds_total{{endpoint="{_label(endpoint)}"}} {_fmt(s.db_seconds)}')
+
+    family("app_request_render_seconds_total", "counter", "Time spent rendering templates, by endpoint.")
+    for endpoint, s in sorted(routes.items()):
+        out.append(f'app_request_render_seconds_total{{endpoint="{_label(endpoint)}"}} {_fmt(s.render_seconds)}')
+
+    family("app_request_queries_total", "counter", "SQL statements issued, by endpoint.")
+    for endpoint, s in sorted(routes.items()):
+        out.append(f'app_request_queries_total{{endpoint="{_label(endpoint)}"}} {s.queries}')
+
+    if pool is not None:
+        family("db_pool_connections", "gauge", "Pooled connections, by state.")
+        for state in ("open", "idle", "in_use"):
+            out.append(f'db_pool_connections{{state="{state}"}} {pool[state]}')
+        family("db_pool_size", "gauge", "Maximum pool size.")
+        out.append(f"db_pool_size {pool['size']}")
+        family("db_pool_waiters", "gauge", "Threads waiting for a connection.")
+        out.append(f"db_pool_waiters {pool['waiters']}")
+        family("db_pool_checkouts_total", "counter", "Connections handed out.")
+        out.append(f"db_pool_checkouts_total {pool['checkouts']}")
+        family("db_pool_timeouts_total", "counter", "Checkouts that timed out.")
+        out.append(f"db_pool_timeouts_total {pool['timeouts']}")
+        family("db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection.")
+        out.append(f"db_pool_wait_seconds_total {_fmt(pool['wait_time_total'])}")
+        if "prepared_statements" in pool:
+            family("db_pool_prepared_statements", "gauge", "Prepared statements cached on pooled connections.")
+            out.append(f"db_pool_prepared_statements {pool['prepared_statements']}")
+
+    if replicas is not None:
+        family("db_replica_healthy", "gauge", "1 if the read replica is in rotation, 0 while it is skipped.")
+        for r in replicas["replicas"]:
+            out.append(f'db_replica_healthy{{replica="{_label(r["name"])}"}} {int(r["healthy"])}')
+        family("db_replica_reads_total", "counter", "Read connections handed out, by replica.")
+        for r in replicas["replicas"]:
+            out.append(f'db_replica_reads_total{{replica="{_label(r["name"])}"}} {r["reads"]}')
+        family("db_replica_failures_total", "counter", "Times a replica was taken out of rotation.")
+        for r in replicas["replicas"]:
+            out.append(f'db_replica_failures_total{{replica="{_label(r["name"])}"}} {r["failures"]}')
+        family("db_replica_fallbacks_total", "counter", "Reads sent to the primary because no replica was usable.")
+        out.append(f"db_replica_fallbacks_total {replicas['fallbacks']}")
+
+    if refdata is not None:
+        family("refdata_cache_requests_total", "counter", "Dropdown lookup cache requests, by list and result.")
+        for name, s in sorted(refdata.items()):
+            out.append(f'refdata_cache_requests_total{{list="{name}",result="hit"}} {s["hits"]}')
+            out.append(f'refdata_cache_requests_total{{list="{name}",result="miss"}} {s["misses"]}')
+
+    if entity is not None:
+        family("entity_cache_requests_total", "counter", "Edit page row cache requests, by result.")
+        out.append(f'entity_cache_requests_total{{result="hit"}} {entity["hits"]}')
+        out.append(f'entity_cache_requests_total{{result="miss"}} {entity["misses"]}')
+        family("entity_cache_stale_total", "counter", "Cached rows reloaded because their table changed since.")
+        out.append(f"entity_cache_stale_total {entity['stale']}")
+        family("entity_cache_evictions_total", "counter", "Rows evicted to stay within the size bound.")
+        out.append(f"entity_cache_evictions_total {entity['evictions']}")
+        family("entity_cache_invalidations_total", "counter", "Rows dropped after a write.")
+        out.append(f"entity_cache_invalidations_total {entity['invalidations']}")
+        if entity["size"] is not None:
+            family("entity_cache_size", "gauge", "Rows currently cached in this process.")
+            out.append(f"entity_cache_size {entity['size']}")
+
+    if statements is not None:
+        family("db_statement_executions_total", "counter", "Executions of declared statements, by statement.")
+        for name, s in sorted(statements.items()):
+            out.append(f'db_statement_executions_total{{statement="{_label(name)}"}} {s["executions"]}')
+        family("db_statement_prepares_total", "counter", "Statements prepared on a connection for the first time.")
+        for name, s in sorted(statements.items()):
+            out.append(f'db_statement_prepares_total{{statement="{_label(name)}"}} {s["prepares"]}')
+        family("db_statement_seconds_total", "counter", "Time spent executing declared statements.")
+        for name, s in sorted(statements.items()):
+            out.append(f'db_statement_seconds_total{{statement="{_label(name)}"}} {_fmt(s["seconds"])}')
+
+    if http is not None:
+        family("http_table_version_reloads_total", "counter", "Reads of the table version counters.")
+        out.append(f"http_table_version_reloads_total {http['version_reloads']}")
+        family("http_page_cache_requests_total", "counter", "Rendered list page cache requests, by result.")
+        out.append(f'http_page_cache_requests_total{{result="hit"}} {http["page_hits"]}')
+        out.append(f'http_page_cache_requests_total{{result="miss"}} {http["page_misses"]}')
+        family("http_page_cache_size", "gauge", "Rendered list pages currently cached in this process.")
+        out.append(f"http_page_cache_size {http['page_cache_size']}")
+
+    if jobs is not None:
+        family("jobs", "gauge", "Background jobs in the job table, by status (all processes).")
+        for status, n in jobs.items():
+            out.append(f'jobs{{status="{status}"}} {n}')
+
+    return "\n".join(out) + "\n"
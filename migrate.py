@@ -0,0 +1,130 @@
+"""Versioned schema migrations.
+
+    python migrate.py              # apply pending migrations to the configured database
+    python migrate.py status       # list applied / pending migrations
+    python migrate.py check        # EXPLAIN the app's queries (see query_plans.py)
+
+Migrations live in migrations/ as NNNN_name.sql, or as NNNN_name.mysql.sql /
+NNNN_name.sqlite.sql where the dialects differ. Statements are separated by a
+`;` at the end of a line. Applied versions are recorded in schema_migrations.
+"""
+import os
+import re
+import sys
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+_FILE_RE = re.compile(r"^(\d{4})_(\w+?)(?:\.(mysql|sqlite))?\.sql$")
+
+SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version    INT NOT NULL PRIMARY KEY,
+        name       VARCHAR(100) NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _dialect():
+    import final_project_db
+    return "sqlite" if final_project_db.DB_BACKEND == "sqlite" else "mysql"
+
+
+def available(dialect):
+    """[(version, name, path)] of the migrations for `dialect`, in order."""
+    found = {}
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = _FILE_RE.match(filename)
+        if not match:
+            continue
+        version, name, file_dialect = int(match.group(1)), match.group(2), match.group(3)
+        if file_dialect not in (None, dialect):
+            continue
+        if version in found and file_dialect is None:
+            continue  # the dialect-specific file wins
+        found[version] = (version, name, os.path.join(MIGRATIONS_DIR, filename))
+    return [found[v] for v in sorted(found)]
+
+
+def statements(path):
+    """The statements of a migration file, without comments."""
+    with open(path) as f:
+        lines = [line for line in f.read().splitlines() if not line.strip().startswith("--")]
+    parts = re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _already_exists(sql, error):
+    # lets an index migration run against a database that already has the index
+    msg = str(error)
+    return (sql.upper().startswith(("CREATE INDEX", "CREATE UNIQUE INDEX"))
+            and ("already exists" in msg or "Duplicate key name" in msg))
+
+
+def applied(conn):
+    """{version: name} of the migrations recorded in schema_migrations."""
+    cur = conn.cursor()
+    try:
+        cur.execute(SCHEMA_MIGRATIONS_SQL)
+        conn.commit()
+        cur.execute("SELECT version, name FROM schema_migrations ORDER BY version")
+        return {row[0]: row[1] for row in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+def migrate(conn, dialect=None, target=None, log=print):
+    """Apply the pending migrations (up to `target`) in order; returns the versions applied."""
+    dialect = dialect or _dialect()
+    done = applied(conn)
+    ran = []
+    cur = conn.cursor()
+    try:
+        for version, name, path in available(dialect):
+            if version in done or (target is not None and version > target):
+                continue
+            for sql in statements(path):
+                try:
+                    cur.execute(sql)
+                except Exception as e:
+                    if not _already_exists(sql, e):
+                        conn.rollback()
+                        raise RuntimeError(f"Migration {version:04d}_{name} failed: {e}") from e
+            cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()  # MySQL commits DDL implicitly; this records the version
+            ran.append(version)
+            if log:
+                log(f"Applied {version:04d}_{name}")
+    finally:
+        cur.close()
+    return ran
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "up"
+    if command == "check":
+        import query_plans
+        return query_plans.main(argv[1:])
+    if command not in ("up", "status"):
+        print(__doc__.strip())
+        return 2
+
+    from final_project_db import get_connection
+    conn = get_connection()
+    try:
+        if command == "status":
+            done = applied(conn)
+            for version, name, _ in available(_dialect()):
+                print(f"{version:04d}_{name:40} {'applied' if version in done else 'pending'}")
+            return 0
+        ran = migrate(conn)
+        if not ran:
+            print("Database is up to date.")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+-- Base schema. IF NOT EXISTS lets an existing database adopt the migrations.
+CREATE TABLE IF NOT EXISTS departments (
+    department_id   INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    department_name VARCHAR(100) NOT NULL,
+    is_active       TINYINT(1) NOT NULL DEFAULT 1,
+    UNIQUE KEY department_name (department_name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS job_titles (
+    job_title_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    title_name   VARCHAR(100) NOT NULL,
+    is_active    TINYINT(1) NOT NULL DEFAULT 1,
+    UNIQUE KEY title_name (title_name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id     INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    employee_number VARCHAR(20) NOT NULL,
+    first_name      VARCHAR(50) NOT NULL,
+    last_name       VARCHAR(50) NOT NULL,
+    email           VARCHAR(100) NOT NULL,
+    phone           VARCHAR(20) NULL,
+    hire_date       DATE NOT NULL,
+    department_id   INT NOT NULL,
+    job_title_id    INT NOT NULL,
+    is_active       TINYINT(1) NOT NULL DEFAULT 1,
+    UNIQUE KEY employee_number (employee_number),
+    UNIQUE KEY email (email),
+    CONSTRAINT fk_employees_department FOREIGN KEY (department_id) REFERENCES departments (department_id),
+    CONSTRAINT fk_employees_job_title FOREIGN KEY (job_title_id) REFERENCES job_titles (job_title_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS clients (
+    client_id     INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    client_name   VARCHAR(100) NOT NULL,
+    contact_name  VARCHAR(100) NULL,
+    contact_email VARCHAR(100) NULL,
+    contact_phone VARCHAR(20) NULL,
+    is_active     TINYINT(1) NOT NULL DEFAULT 1,
+    created_at    TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY client_name (client_name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS projects (
+    project_id   INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    client_id    INT NOT NULL,
+    project_code VARCHAR(20) NOT NULL,
+    project_name VARCHAR(100) NOT NULL,
+    start_date   DATE NOT NULL,
+    end_date     DATE NULL,
+    status       VARCHAR(20) NOT NULL DEFAULT 'Active',
+    is_active    TINYINT(1) NOT NULL DEFAULT 1,
+    UNIQUE KEY project_code (project_code),
+    CONSTRAINT fk_projects_client FOREIGN KEY (client_id) REFERENCES clients (client_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS project_members (
+    project_id  INT NOT NULL,
+    employee_id INT NOT NULL,
+    PRIMARY KEY (project_id, employee_id),
+    CONSTRAINT fk_project_members_project FOREIGN KEY (project_id) REFERENCES projects (project_id),
+    CONSTRAINT fk_project_members_employee FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id     INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    project_id  INT NOT NULL,
+    employee_id INT NULL,
+    task_name   VARCHAR(150) NOT NULL,
+    task_status VARCHAR(20) NOT NULL DEFAULT 'To Do',
+    due_date    DATE NULL,
+    is_active   TINYINT(1) NOT NULL DEFAULT 1,
+    CONSTRAINT fk_tasks_project FOREIGN KEY (project_id) REFERENCES projects (project_id),
+    CONSTRAINT fk_tasks_employee FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,62 @@
+-- Base schema (SQLite stand-in / benchmark database).
+CREATE TABLE IF NOT EXISTS departments (
+    department_id   INTEGER PRIMARY KEY,
+    department_name VARCHAR(100) NOT NULL UNIQUE,
+    is_active       TINYINT NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS job_titles (
+    job_title_id INTEGER PRIMARY KEY,
+    title_name   VARCHAR(100) NOT NULL UNIQUE,
+    is_active    TINYINT NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id     INTEGER PRIMARY KEY,
+    employee_number VARCHAR(20) NOT NULL UNIQUE,
+    first_name      VARCHAR(50) NOT NULL,
+    last_name       VARCHAR(50) NOT NULL,
+    email           VARCHAR(100) NOT NULL UNIQUE,
+    phone           VARCHAR(20),
+    hire_date       DATE NOT NULL,
+    department_id   INTEGER NOT NULL REFERENCES departments (department_id),
+    job_title_id    INTEGER NOT NULL REFERENCES job_titles (job_title_id),
+    is_active       TINYINT NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS clients (
+    client_id     INTEGER PRIMARY KEY,
+    client_name   VARCHAR(100) NOT NULL UNIQUE,
+    contact_name  VARCHAR(100),
+    contact_email VARCHAR(100),
+    contact_phone VARCHAR(20),
+    is_active     TINYINT NOT NULL DEFAULT 1,
+    created_at    TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    project_id   INTEGER PRIMARY KEY,
+    client_id    INTEGER NOT NULL REFERENCES clients (client_id),
+    project_code VARCHAR(20) NOT NULL UNIQUE,
+    project_name VARCHAR(100) NOT NULL,
+    start_date   DATE NOT NULL,
+    end_date     DATE,
+    status       VARCHAR(20) NOT NULL DEFAULT 'Active',
+    is_active    TINYINT NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS project_members (
+    project_id  INTEGER NOT NULL REFERENCES projects (project_id),
+    employee_id INTEGER NOT NULL REFERENCES employees (employee_id),
+    PRIMARY KEY (project_id, employee_id)
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id     INTEGER PRIMARY KEY,
+    project_id  INTEGER NOT NULL REFERENCES projects (project_id),
+    employee_id INTEGER REFERENCES employees (employee_id),
+    task_name   VARCHAR(150) NOT NULL,
+    task_status VARCHAR(20) NOT NULL DEFAULT 'To Do',
+    due_date    DATE,
+    is_active   TINYINT NOT NULL DEFAULT 1
+);
@@ -0,0 +1,26 @@
+-- Per-group counts behind the dashboard (see summaries.py); fill with `python -m summaries rebuild`.
+CREATE TABLE IF NOT EXISTS summary_task_status (
+    project_id  INT NOT NULL,
+    task_status VARCHAR(20) NOT NULL,
+    task_count  INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, task_status)
+);
+
+CREATE TABLE IF NOT EXISTS summary_task_due (
+    due_date   DATE NOT NULL,
+    project_id INT NOT NULL,
+    task_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (due_date, project_id)
+);
+
+CREATE TABLE IF NOT EXISTS summary_headcount (
+    dimension VARCHAR(20) NOT NULL,
+    group_id  INT NOT NULL,
+    headcount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, group_id)
+);
+
+CREATE TABLE IF NOT EXISTS summary_project_members (
+    project_id   INT NOT NULL PRIMARY KEY,
+    member_count INT NOT NULL DEFAULT 0
+);
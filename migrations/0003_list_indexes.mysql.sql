@@ -0,0 +1,23 @@
+-- Indexes matching the WHERE + ORDER BY of every list page, export and dropdown
+-- (see query_plans.py). A list reads its page straight off the index, in order,
+-- with no filesort; the dropdowns are answered from the index alone.
+-- The tasks indexes use a functional key part, which needs MySQL 8.0.13 or later.
+-- Foreign-key columns (tasks.employee_id, project_members.employee_id, ...) are
+-- already indexed by their FOREIGN KEY constraints.
+
+-- employees list (show=active / all, ORDER BY last_name, first_name, employee_id) and dropdown
+CREATE INDEX idx_employees_active_name
+    ON employees (is_active, last_name, first_name, employee_id, employee_number);
+CREATE INDEX idx_employees_name ON employees (last_name, first_name, employee_id);
+
+-- dropdowns
+CREATE INDEX idx_departments_active_name ON departments (is_active, department_name);
+CREATE INDEX idx_job_titles_active_name ON job_titles (is_active, title_name);
+CREATE INDEX idx_clients_active_name ON clients (is_active, client_name);
+CREATE INDEX idx_projects_active_code ON projects (is_active, project_code, project_name);
+
+-- tasks list: per project in (due date, no-due-date last, name, id) order
+CREATE INDEX idx_tasks_project_due
+    ON tasks (project_id, (due_date IS NULL), due_date, task_name, task_id);
+CREATE INDEX idx_tasks_project_active_due
+    ON tasks (project_id, is_active, (due_date IS NULL), due_date, task_name, task_id);
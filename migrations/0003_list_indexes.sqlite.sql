@@ -0,0 +1,27 @@
+-- Indexes matching the WHERE + ORDER BY of every list page, export and dropdown
+-- (see query_plans.py). A list reads its page straight off the index, in order,
+-- with no sort; the dropdowns are answered from the index alone.
+
+-- employees list (show=active / all, ORDER BY last_name, first_name, employee_id) and dropdown
+CREATE INDEX IF NOT EXISTS idx_employees_active_name
+    ON employees (is_active, last_name, first_name, employee_id, employee_number);
+CREATE INDEX IF NOT EXISTS idx_employees_name ON employees (last_name, first_name, employee_id);
+CREATE INDEX IF NOT EXISTS idx_employees_department ON employees (department_id);
+CREATE INDEX IF NOT EXISTS idx_employees_job_title ON employees (job_title_id);
+
+-- dropdowns
+CREATE INDEX IF NOT EXISTS idx_departments_active_name ON departments (is_active, department_name);
+CREATE INDEX IF NOT EXISTS idx_job_titles_active_name ON job_titles (is_active, title_name);
+CREATE INDEX IF NOT EXISTS idx_clients_active_name ON clients (is_active, client_name);
+CREATE INDEX IF NOT EXISTS idx_projects_active_code ON projects (is_active, project_code, project_name);
+CREATE INDEX IF NOT EXISTS idx_projects_client ON projects (client_id);
+
+-- tasks list: per project in (due date, no-due-date last, name, id) order
+CREATE INDEX IF NOT EXISTS idx_tasks_project_due
+    ON tasks (project_id, due_date IS NULL, due_date, task_name, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_project_active_due
+    ON tasks (project_id, is_active, due_date IS NULL, due_date, task_name, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_employee ON tasks (employee_id);
+
+-- members by employee (the primary key covers lookups by project)
+CREATE INDEX IF NOT EXISTS idx_project_members_employee ON project_members (employee_id);
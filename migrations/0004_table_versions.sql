@@ -0,0 +1,9 @@
+-- Per-table change counters behind the list pages' ETags (see http_cache.py).
+-- changed_at is a Unix timestamp; 0 until the table's first change through the app.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version    BIGINT NOT NULL DEFAULT 0,
+    changed_at DOUBLE NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_versions (table_name) VALUES ('employees'), ('clients'), ('projects'), ('tasks');
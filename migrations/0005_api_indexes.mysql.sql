@@ -0,0 +1,4 @@
+-- Nothing to add for the JSON API's filtered lists on MySQL: they are sorted by
+-- primary key, and the FOREIGN KEY indexes on tasks.project_id and
+-- project_members.employee_id already return their rows in primary key order
+-- (InnoDB secondary indexes end with the primary key).
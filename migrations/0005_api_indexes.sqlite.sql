@@ -0,0 +1,11 @@
+-- Indexes for the JSON API's filtered lists, which are sorted by primary key
+-- (see api.py and query_plans.py). A SQLite index ends with the rowid, so an
+-- index on the filter column alone returns the rows in primary key order.
+
+-- /api/tasks?project_id= (ORDER BY task_id)
+CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks (project_id);
+
+-- /api/members?employee_id= (ORDER BY project_id, employee_id); replaces the
+-- employee_id-only index, which also serves the cascading disable
+DROP INDEX IF EXISTS idx_project_members_employee;
+CREATE INDEX IF NOT EXISTS idx_project_members_employee_project ON project_members (employee_id, project_id);
@@ -0,0 +1,11 @@
+-- Append-only log of the rows each write changed, for incremental sync (see changes.py).
+-- pk2 is the second key column of project_members (employee_id); NULL elsewhere.
+-- AUTOINCREMENT: change_ids are never reused, even after old entries are purged.
+CREATE TABLE IF NOT EXISTS change_log (
+    change_id  INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name VARCHAR(64) NOT NULL,
+    operation  VARCHAR(16) NOT NULL,
+    pk         BIGINT NOT NULL,
+    pk2        BIGINT NULL,
+    changed_at DOUBLE NOT NULL
+);
@@ -0,0 +1,9 @@
+-- Date-range indexes for the task timeline (see timeline.py and query_plans.py).
+-- Both are read as a range on due_date in (due_date, task_id) order: the
+-- primary key that ends every secondary index supplies the task_id.
+
+-- overdue / due this week / calendar, all assignees
+CREATE INDEX idx_tasks_active_due ON tasks (is_active, due_date);
+
+-- one employee's overdue and upcoming tasks and calendar
+CREATE INDEX idx_tasks_employee_active_due ON tasks (employee_id, is_active, due_date);
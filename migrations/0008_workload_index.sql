@@ -0,0 +1,4 @@
+-- Covering index for the workload report's open tasks per (employee, status)
+-- (see workload.py and query_plans.py): the grouped read runs over the index
+-- alone, already in group order, without touching the table or sorting.
+CREATE INDEX idx_tasks_active_employee_status ON tasks (is_active, employee_id, task_status, due_date);
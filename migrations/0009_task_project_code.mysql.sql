@@ -0,0 +1,20 @@
+-- The tasks list and export are ordered by project code, then due date, name
+-- and id. MySQL can only read an ORDER BY off an index when every column comes
+-- from the first table of the join, so the project code is copied onto tasks
+-- (kept in step by the task add / edit routes and the project edit route) and
+-- the list indexes lead with it. See query_plans.py.
+ALTER TABLE tasks ADD COLUMN project_code VARCHAR(20) NOT NULL DEFAULT '';
+UPDATE tasks t JOIN projects p ON t.project_id = p.project_id SET t.project_code = p.project_code;
+
+DROP INDEX idx_tasks_project_due ON tasks;
+DROP INDEX idx_tasks_project_active_due ON tasks;
+
+-- every task (show=all, and show=active with is_active checked on the way)
+CREATE INDEX idx_tasks_code_due
+    ON tasks (project_code, (due_date IS NULL), due_date, task_name, task_id);
+-- show=active
+CREATE INDEX idx_tasks_active_code_due
+    ON tasks (is_active, project_code, (due_date IS NULL), due_date, task_name, task_id);
+-- ?project_id=: one project's tasks, in the same order
+CREATE INDEX idx_tasks_project_code_due
+    ON tasks (project_id, project_code, (due_date IS NULL), due_date, task_name, task_id);
@@ -0,0 +1,19 @@
+-- The tasks list and export are ordered by project code, then due date, name
+-- and id. The project code is copied onto tasks (kept in step by the task
+-- add / edit routes and the project edit route) so one index covers the whole
+-- ORDER BY, as MySQL needs. See query_plans.py.
+ALTER TABLE tasks ADD COLUMN project_code VARCHAR(20) NOT NULL DEFAULT '';
+UPDATE tasks SET project_code = (SELECT p.project_code FROM projects p WHERE p.project_id = tasks.project_id);
+
+DROP INDEX IF EXISTS idx_tasks_project_due;
+DROP INDEX IF EXISTS idx_tasks_project_active_due;
+
+-- every task (show=all, and show=active with is_active checked on the way)
+CREATE INDEX IF NOT EXISTS idx_tasks_code_due
+    ON tasks (project_code, due_date IS NULL, due_date, task_name, task_id);
+-- show=active
+CREATE INDEX IF NOT EXISTS idx_tasks_active_code_due
+    ON tasks (is_active, project_code, due_date IS NULL, due_date, task_name, task_id);
+-- ?project_id=: one project's tasks, in the same order
+CREATE INDEX IF NOT EXISTS idx_tasks_project_code_due
+    ON tasks (project_id, project_code, due_date IS NULL, due_date, task_name, task_id);
@@ -0,0 +1,215 @@
+"""Keyset (seek) pagination for the list pages.
+
+Instead of OFFSET, each page remembers the sort key of its first and last row
+in an opaque token. The next page is fetched with a WHERE clause that seeks
+past that key, so the database can jump straight to it through the index no
+matter how deep into the list we are.
+"""
+import base64
+import datetime
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def page_size(raw):
+    """Clamp a user-supplied page size to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(raw)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_token(values):
+    """Pack a row's sort key into a URL-safe token."""
+    raw = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token, width):
+    """Unpack a token produced by encode_token; returns None if it is malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != width:
+        return None
+    return values
+
+
+def _group(expr):
+    # `x IS NULL > 1` would parse as `x IS (NULL > 1)` in SQLite
+    return f"({expr})" if " " in expr else expr
+
+
+class Keyset:
+    """An ORDER BY made of (sql expression, row value[, type]) columns.
+
+    `value` is either the result-column name holding the expression's value or
+    a callable taking the row dict. The key must be unique across rows, so the
+    last column is normally the primary key. With a `type` (str for dates, as
+    tokens carry them as ISO strings), a token whose value has another type is
+    treated as malformed rather than compared against the column.
+    """
+
+    def __init__(self, *columns):
+        self.columns = columns
+
+    def key(self, row):
+        return [v(row) if callable(v) else row[v] for _, v, *_ in self.columns]
+
+    def accepts(self, values):
+        """True if every typed column's value in `values` has its type (or is None)."""
+        for (_, _, *kind), value in zip(self.columns, values):
+            if value is None or not kind:
+                continue
+            if isinstance(value, bool) or not isinstance(value, kind[0]):
+                return False
+        return True
+
+    def order_by(self, reverse=False):
+        direction = " DESC" if reverse else ""
+        return ", ".join(expr + direction for expr, *_ in self.columns)
+
+    def seek(self, values, reverse=False):
+        """WHERE fragment selecting rows strictly after (or before) `values`.
+
+        Expands the row comparison into OR-ed prefixes, led by a redundant
+        `first column >= value` bound: the OR alone is not sargable in SQLite
+        (nor reliably in MySQL), the bound turns the seek into an index range.
+        A NULL in the key only ever appears after an `x IS NULL` flag column,
+        so it is matched with IS NULL and never compared.
+        """
+        op = "<" if reverse else ">"
+        terms, params = [], []
+        for i, (expr, *_) in enumerate(self.columns):
+            if values[i] is None:
+                continue
+            eq_sql, eq_params = self._equal_prefix(values[:i])
+            terms.append(" AND ".join(eq_sql + [f"{_group(expr)} {op} %s"]))
+            params.extend(eq_params + [values[i]])
+        if not terms:
+            return "1 = 0", []
+        seek = "(" + " OR ".join(f"({t})" for t in terms) + ")"
+        first = self.columns[0][0]
+        if values[0] is None:
+            return seek, params
+        return f"{_group(first)} {op}= %s AND {seek}", [values[0]] + params
+
+    def _equal_prefix(self, values):
+        sql, params = [], []
+        for (expr, *_), value in zip(self.columns, values):
+            if value is None:
+                sql.append(f"{_group(expr)} IS NULL")
+            else:
+                sql.append(f"{_group(expr)} = %s")
+                params.append(value)
+        return sql, params
+
+
+def _decode_key(token, keyset):
+    # a token from another keyset (e.g. one issued before the order changed) reads as malformed
+    values = decode_token(token, len(keyset.columns))
+    return values if values is not None and keyset.accepts(values) else None
+
+
+def page_query(select_sql, where_parts, params, keyset, limit, after=None, before=None):
+    """Build the statement for one page of `select_sql` (a SELECT ... FROM ... JOIN ...
+    with no WHERE/ORDER BY).
+
+    Returns (sql, params, state); pass the fetched rows and `state` to page_rows().
+    """
+    after_key = _decode_key(after, keyset)
+    before_key = _decode_key(before, keyset) if after_key is None else None
+    reverse = before_key is not None
+
+    where_parts = list(where_parts)
+    params = list(params)
+    cursor_key = before_key if reverse else after_key
+    if cursor_key is not None:
+        seek_sql, seek_params = keyset.seek(cursor_key, reverse=reverse)
+        where_parts.append(seek_sql)
+        params.extend(seek_params)
+
+    where_clause = ""
+    if where_parts:
+        where_clause = "WHERE " + " AND ".join(where_parts)
+
+    # one extra row tells us whether another page exists in this direction
+    sql = f"""
+        {select_sql}
+        {where_clause}
+        ORDER BY {keyset.order_by(reverse=reverse)}
+        LIMIT %s
+    """
+    state = {"limit": limit, "reverse": reverse, "after": after_key is not None}
+    return sql, params + [limit + 1], state
+
+
+def page_rows(rows, keyset, state):
+    """Trim the rows fetched for page_query() to the page; returns (rows, page)
+    where page holds the page size and the `next` / `prev` tokens (None when
+    there is nothing in that direction)."""
+    limit, reverse = state["limit"], state["reverse"]
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if reverse:
+        rows.reverse()
+    first, last = (rows[0], rows[-1]) if rows else (None, None)
+    return rows, _page(keyset, state, first, last, more)
+
+
+def stream_page_rows(rows, keyset, state):
+    """page_rows() for an iterator of rows: returns (rows, page) where rows is a
+    generator and `page` is an empty dict, filled in once the generator is
+    exhausted. Pages fetched backwards (?before=) come off the database in
+    reverse, so those are read in full before the first row is yielded."""
+    page = {}
+
+    def generate():
+        if state["reverse"]:
+            trimmed, found = page_rows(list(rows), keyset, state)
+            yield from trimmed
+            page.update(found)
+            return
+        first = last = None
+        count = 0
+        for row in rows:  # read to the end (the extra row included) so the cursor is done
+            count += 1
+            if count > state["limit"]:
+                continue
+            if first is None:
+                first = row
+            last = row
+            yield row
+        page.update(_page(keyset, state, first, last, count > state["limit"]))
+    return generate(), page
+
+
+def _page(keyset, state, first, last, more):
+    reverse = state["reverse"]
+    has_next = (more and not reverse) or reverse
+    has_prev = (more and reverse) or state["after"]
+    return {
+        "limit": state["limit"],
+        "next": encode_token(keyset.key(last)) if last is not None and has_next else None,
+        "prev": encode_token(keyset.key(first)) if first is not None and has_prev else None,
+    }
+
+
+def fetch_page(cur, select_sql, where_parts, params, keyset, limit, after=None, before=None):
+    """Run one page of `select_sql` on `cur`; returns (rows, page) as page_rows() does."""
+    sql, params, state = page_query(select_sql, where_parts, params, keyset, limit, after, before)
+    cur.execute(sql, params)
+    return page_rows(cur.fetchall(), keyset, state)
@@ -0,0 +1,137 @@
+"""Set-based project member changes.
+
+apply_members() compares the wanted members of a project with the current
+ones and applies the difference in one transaction: a multi-row
+INSERT IGNORE for the additions and a single DELETE ... IN (...) for the
+removals, instead of one round-trip and commit per employee.
+
+The current members are read with FOR UPDATE. If an INSERT or DELETE still
+touches fewer rows than the diff planned (another request got there first),
+the transaction is rolled back and the diff recomputed. The change log and
+member counts therefore only record rows this request changed.
+"""
+
+import changes
+import summaries
+
+MEMBER_BATCH_SIZE = 1000
+MEMBER_ATTEMPTS = 3  # a diff made stale by a concurrent change is rolled back and recomputed
+
+MODES = ("add", "remove", "set")
+
+
+class MembersChanged(RuntimeError):
+    """Concurrent changes to the project's members outlasted MEMBER_ATTEMPTS tries."""
+
+
+def parse_ids(values):
+    """Turn form / JSON values into a set of ints; returns (ids, bad values)."""
+    ids, bad = set(), []
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            bad.append(value)
+    return ids, bad
+
+
+def _marks(n):
+    return ", ".join(["%s"] * n)
+
+
+def _chunks(items, size=MEMBER_BATCH_SIZE):
+    items = sorted(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def current_members(cur, project_id, lock=False):
+    """Employee ids on the project; `lock` holds its member rows (and the gaps
+    between them) until the transaction ends."""
+    cur.execute("SELECT employee_id FROM project_members WHERE project_id = %s" + (" FOR UPDATE" if lock else ""),
+                (project_id,))
+    return {row[0] for row in cur.fetchall()}
+
+
+def _active_employees(cur, ids):
+    found = set()
+    for chunk in _chunks(ids):
+        cur.execute(f"""
+            SELECT employee_id FROM employees
+            WHERE is_active = 1 AND employee_id IN ({_marks(len(chunk))})
+        """, chunk)
+        found.update(row[0] for row in cur.fetchall())
+    return found
+
+
+def apply_members(conn, project_id, employee_ids, mode="set"):
+    """Add, remove or replace (`mode`) the members of a project in one transaction.
+
+    Returns {"added": [...], "removed": [...], "unchanged": n, "skipped": [...]}
+    where skipped lists requested ids that are not active employees.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    wanted = set(employee_ids)
+
+    for _ in range(MEMBER_ATTEMPTS):
+        cur = conn.cursor()
+        try:
+            result = _apply(conn, cur, project_id, wanted, mode)
+            if result is not None:
+                conn.commit()
+                return result
+            conn.rollback()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    raise MembersChanged(f"The members of project {project_id} kept changing; try again.")
+
+
+def _apply(conn, cur, project_id, wanted, mode):
+    """Apply the difference on `cur`; returns None (nothing logged) if a concurrent
+    change made an INSERT or DELETE touch other rows than the ones diffed."""
+    current = current_members(cur, project_id, lock=True)
+    if mode == "add":
+        to_add, to_remove = wanted - current, set()
+    elif mode == "remove":
+        to_add, to_remove = set(), wanted & current
+    else:
+        to_add, to_remove = wanted - current, current - wanted
+
+    skipped = set()
+    if to_add:
+        valid = _active_employees(cur, to_add)
+        skipped = to_add - valid
+        to_add = valid
+
+    for chunk in _chunks(to_add):
+        values = ", ".join(["(%s, %s)"] * len(chunk))
+        params = []
+        for employee_id in chunk:
+            params.extend((project_id, employee_id))
+        # IGNORE: a concurrent request may have added the same member already
+        cur.execute(f"INSERT IGNORE INTO project_members (project_id, employee_id) VALUES {values}", params)
+        if cur.rowcount != len(chunk):
+            return None
+
+    for chunk in _chunks(to_remove):
+        cur.execute(f"""
+            DELETE FROM project_members
+            WHERE project_id = %s AND employee_id IN ({_marks(len(chunk))})
+        """, [project_id] + chunk)
+        if cur.rowcount != len(chunk):
+            return None
+
+    # every statement touched exactly the diffed rows, so they are what changed
+    summaries.members_changed(conn, project_id, len(to_add) - len(to_remove))
+    changes.record(conn, "project_members", changes.INSERT, [(project_id, e) for e in sorted(to_add)])
+    changes.record(conn, "project_members", changes.DELETE, [(project_id, e) for e in sorted(to_remove)])
+    return {
+        "added": sorted(to_add),
+        "removed": sorted(to_remove),
+        "unchanged": len(current - to_remove),
+        "skipped": sorted(skipped),
+    }
@@ -0,0 +1,220 @@
+"""The app's read queries, declared once and run as prepared statements.
+
+    rows = queries.fetch_all(conn, queries.PROJECT_MEMBERS, (project_id,))
+
+Each statement is prepared once per pooled connection (mysql.connector's
+server-side prepared statements, see final_project_db.StatementCache) and
+re-executed with new parameters after that, so the server skips parsing
+and planning. SQLite compiles statements once per connection by itself.
+
+Optional list filters are built by Filters from fixed SQL conditions; request
+values only ever travel as bound parameters. Executions, first-time
+prepares and time are counted per statement name (see stats() and /metrics).
+"""
+import threading
+import time
+
+import instrumentation
+
+REGISTRY = {}  # name -> Query
+ITER_BATCH_SIZE = 100  # rows per fetch in iter_rows()
+
+
+class Query:
+    """A named SQL statement with %s placeholders."""
+
+    def __init__(self, name, sql):
+        if name in REGISTRY:
+            raise ValueError(f"Query {name!r} is declared twice.")
+        self.name = name
+        self.sql = sql
+        REGISTRY[name] = self
+
+    def __repr__(self):
+        return f"Query({self.name!r})"
+
+
+class Filters:
+    """The optional WHERE conditions a list accepts, one fixed SQL condition per name.
+
+        TASK_FILTERS = Filters(project_id="t.project_id = %s", is_active="t.is_active = %s")
+        where_parts, params = TASK_FILTERS.build(project_id=7, is_active=None)  # None: not filtered
+    """
+
+    def __init__(self, **conditions):
+        self.conditions = conditions
+
+    def build(self, **values):
+        """(where_parts, params) for the conditions given a non-None value."""
+        unknown = set(values) - set(self.conditions)
+        if unknown:
+            raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+        where_parts, params = [], []
+        for name, condition in self.conditions.items():
+            value = values.get(name)
+            if value is not None:
+                where_parts.append(condition)
+                params.append(value)
+        return where_parts, params
+
+
+# -----------------------------------------
+# Execution
+# -----------------------------------------
+_lock = threading.Lock()
+_stats = {}  # name -> {"executions", "prepares", "seconds"}
+
+
+def _count(name, prepared, seconds):
+    with _lock:
+        s = _stats.get(name)
+        if s is None:
+            s = _stats[name] = {"executions": 0, "prepares": 0, "seconds": 0.0}
+        s["executions"] += 1
+        s["prepares"] += prepared
+        s["seconds"] += seconds
+
+
+def _run(conn, query, params, sql, dictionary):
+    cursor, sql, new = conn.statements.get(sql or query.sql, dictionary)
+    params = tuple(params)
+    rows = None
+    start = time.perf_counter()
+    try:
+        cursor.execute(sql, params)
+        if cursor.description:
+            rows = cursor.fetchall()  # read to the end: the connection's next statement needs it
+    finally:
+        elapsed = time.perf_counter() - start
+        _count(query.name, new, elapsed)
+        instrumentation.record_query(sql, params, elapsed, len(rows) if rows else 0)
+    return cursor, rows
+
+
+def fetch_all(conn, query, params=(), sql=None, dictionary=True):
+    """All rows of `query` (or of `sql`, a variant of it built per request, counted under its name)."""
+    return _run(conn, query, params, sql, dictionary)[1]
+
+
+def iter_rows(conn, query, params=(), sql=None, dictionary=True, batch_size=ITER_BATCH_SIZE):
+    """Like fetch_all(), but yields the rows as they are fetched, `batch_size` at a time.
+
+    Read it to the end (or close it) before running anything else on `conn`:
+    closing it early reads and discards the rest of the result.
+    """
+    cursor, sql, new = conn.statements.get(sql or query.sql, dictionary)
+    params = tuple(params)
+    start = time.perf_counter()
+    try:
+        cursor.execute(sql, params)
+    finally:
+        elapsed = time.perf_counter() - start
+        record = instrumentation.record_query(sql, params, elapsed)
+    try:
+        while True:
+            start = time.perf_counter()
+            rows = cursor.fetchmany(batch_size)
+            fetched = time.perf_counter() - start
+            elapsed += fetched
+            record["duration"] += fetched
+            record["rows"] += len(rows)
+            if not rows:
+                return
+            yield from rows
+    except GeneratorExit:
+        cursor.fetchall()  # closed early: the connection's next statement needs the result read
+        raise
+    finally:
+        _count(query.name, new, elapsed)
+
+
+def fetch_one(conn, query, params=(), dictionary=True):
+    """The first row of `query`, or None."""
+    rows = _run(conn, query, params, None, dictionary)[1]
+    return rows[0] if rows else None
+
+
+def execute(conn, query, params=()):
+    """Run a write; returns (rowcount, lastrowid)."""
+    cursor, _ = _run(conn, query, params, None, False)
+    return cursor.rowcount, cursor.lastrowid
+
+
+def stats():
+    """{name: {"executions", "prepares", "seconds"}} for this process."""
+    with _lock:
+        return {name: dict(s) for name, s in _stats.items()}
+
+
+# -----------------------------------------
+# List queries, shared by the list pages and the exports (WHERE / ORDER BY added per request)
+# -----------------------------------------
+EMPLOYEES_LIST = Query("employees.list", """
+    SELECT
+        e.employee_id,
+        e.employee_number,
+        e.first_name,
+        e.last_name,
+        e.email,
+        e.phone,
+        e.hire_date,
+        e.is_active,
+        d.department_name,
+        j.title_name
+    FROM employees e
+    JOIN departments d ON e.department_id = d.department_id
+    JOIN job_titles j ON e.job_title_id = j.job_title_id
+""")
+EMPLOYEE_FILTERS = Filters(is_active="e.is_active = %s")
+
+CLIENTS_LIST = Query("clients.list", """
+    SELECT client_id, client_name, contact_name, contact_email, contact_phone, is_active, created_at
+    FROM clients
+""")
+CLIENT_FILTERS = Filters(is_active="is_active = %s")
+
+PROJECTS_LIST = Query("projects.list", """
+    SELECT
+        p.project_id, p.project_code, p.project_name, p.start_date, p.end_date, p.status, p.is_active,
+        c.client_name
+    FROM projects p
+    JOIN clients c ON p.client_id = c.client_id
+""")
+PROJECT_FILTERS = Filters(is_active="p.is_active = %s")
+
+TASKS_LIST = Query("tasks.list", """
+    SELECT
+        t.task_id, t.task_name, t.task_status, t.due_date, t.is_active,
+        p.project_code, p.project_name,
+        e.first_name, e.last_name
+    FROM tasks t
+    JOIN projects p ON t.project_id = p.project_id
+    LEFT JOIN employees e ON t.employee_id = e.employee_id
+""")
+TASK_FILTERS = Filters(project_id="t.project_id = %s", is_active="t.is_active = %s")
+
+
+def active_only(show):
+    """The is_active filter value for ?show=active|all."""
+    return 1 if show == "active" else None
+
+
+# -----------------------------------------
+# Members page
+# -----------------------------------------
+PROJECT_HEADER = Query("projects.header", """
+    SELECT p.project_id, p.project_code, p.project_name, c.client_name
+    FROM projects p
+    JOIN clients c ON p.client_id = c.client_id
+    WHERE p.project_id=%s
+""")
+
+PROJECT_MEMBERS = Query("projects.members", """
+    SELECT e.employee_id, e.employee_number, e.first_name, e.last_name
+    FROM project_members pm
+    JOIN employees e ON pm.employee_id = e.employee_id
+    WHERE pm.project_id = %s
+    ORDER BY e.last_name, e.first_name
+""")
+
+PROJECT_EXISTS = Query("projects.exists", "SELECT project_id FROM projects WHERE project_id=%s;")
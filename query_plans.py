@@ -0,0 +1,285 @@
+"""EXPLAIN every query the app issues and flag full scans and sorts.
+
+    python migrate.py check              # against the configured database
+    python migrate.py check --bench      # against a freshly seeded benchmark database
+
+Each statement shape (list pages with their filters, first / next / previous
+page seeks, exports, dropdown lookups, row loads, member and summary updates,
+dashboard reads) is explained with representative parameters. A plan fails on
+a table scan, on an index scan where the query should seek, or on a sort
+(filesort / temp B-tree). The few intended exceptions are listed with the
+reason next to them.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+SCAN = "full scan"
+INDEX_SCAN = "index scan"  # reading an index from the start: fine for a LIMITed first page
+SORT = "sort"
+
+_SQLITE_SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX .*)?$")
+
+
+def _page_shapes(name, select_sql, where_parts, params, keyset, sample_key):
+    """First, next and previous page of a list query."""
+    from pagination import encode_token, page_query
+    token = encode_token(sample_key)
+    yield f"{name} (first page)", page_query(select_sql, where_parts, params, keyset, 50)[:2], {INDEX_SCAN}
+    yield f"{name} (next page)", page_query(select_sql, where_parts, params, keyset, 50, after=token)[:2], set()
+    yield f"{name} (previous page)", page_query(select_sql, where_parts, params, keyset, 50, before=token)[:2], set()
+
+
+def _seek_shapes(name, select_sql, where_parts, params, keyset, sample_key):
+    """Like _page_shapes, for lists whose filters bound the index range: no page may scan."""
+    for label, statement, _ in _page_shapes(name, select_sql, where_parts, params, keyset, sample_key):
+        yield label, statement, set()
+
+
+def queries():
+    """(name, (sql, params), allowed problems) for each statement shape the app runs."""
+    import api
+    import app
+    import changes
+    import entity_cache
+    import http_cache
+    import queries
+    import refdata
+    import search_index
+    import soft_delete
+    import summaries
+    import timeline
+    import workload
+
+    lists = [
+        ("employees", queries.EMPLOYEES_LIST.sql, app.employee_filters, app.EMPLOYEE_KEYSET,
+         ["Smith", "Ann", 100]),
+        ("clients", queries.CLIENTS_LIST.sql, app.client_filters, app.CLIENT_KEYSET, ["Client 00100"]),
+        ("projects", queries.PROJECTS_LIST.sql, app.project_filters, app.PROJECT_KEYSET, ["P000100"]),
+    ]
+    for name, select_sql, filters, keyset, sample in lists:
+        for show in ("active", "all"):
+            where_parts, params = filters(show)
+            yield from _page_shapes(f"{name} list, show={show}", select_sql, where_parts, params, keyset, sample)
+            yield (f"{name} export, show={show}",
+                   (f"{select_sql} {_where(where_parts)} ORDER BY {keyset.order_by()}", params), {INDEX_SCAN})
+
+    for project_id in (None, 7):
+        for show in ("active", "all"):
+            where_parts, params = app.task_filters(project_id, show)
+            label = f"tasks list, project_id={project_id}, show={show}"
+            for sample in (["P000007", 0, "2025-01-01", "Review item 5", 5000],
+                           ["P000007", 1, None, "Review item 5", 5000]):
+                due = "due date" if sample[2] else "no due date"
+                for shape in _page_shapes(label, queries.TASKS_LIST.sql, where_parts, params, app.TASK_KEYSET, sample):
+                    yield (f"{shape[0]} after {due}" if "first" not in shape[0] else shape[0]), shape[1], shape[2]
+            yield (f"tasks export, project_id={project_id}, show={show}",
+                   (f"{queries.TASKS_LIST.sql} {_where(where_parts)} ORDER BY {app.TASK_KEYSET.order_by()}", params),
+                   {INDEX_SCAN})
+
+    # API lists are sorted by primary key: a first page unfiltered or filtered on a column
+    # without its own index reads the table in key order and stops at the page size
+    for name, resource in api.RESOURCES.items():
+        sample = [7] * len(resource.key)
+        for arg, (condition, kind) in [(None, (None, None))] + list(resource.filters.items()):
+            value = 1 if kind is int else "Done"
+            where_parts, params = ([condition], [value]) if arg else ([], [])
+            for label, statement, allowed in _page_shapes(f"api {name}" + (f", {arg}=" if arg else ""),
+                                                          resource.select(resource.default_fields),
+                                                          where_parts, params, resource.keyset, sample):
+                yield label, statement, allowed | ({SCAN} if "first page" in label else set())
+
+    yield "changes since cursor", (changes.SINCE.sql + " WHERE change_id > %s ORDER BY change_id LIMIT %s",
+                                   [100, 51]), set()
+    yield "changes since cursor, with gaps", (
+        changes.SINCE.sql + " WHERE change_id >= %s AND (change_id > %s OR change_id BETWEEN %s AND %s"
+                            " OR change_id BETWEEN %s AND %s) ORDER BY change_id LIMIT %s",
+        [40, 100, 40, 42, 90, 90, 51]), set()
+    yield "latest change", (changes.LATEST.sql, []), set()
+    yield "recent change ids", (changes.RECENT_IDS.sql, [0]), set()
+    for name, resource in api.RESOURCES.items():
+        columns = [resource.fields[f][0] for f in resource.key]
+        if len(columns) == 1:
+            yield f"api changed {name} rows", (f"{resource.select(resource.default_fields)} "
+                                               f"WHERE {columns[0]} IN (%s, %s)", [1, 2]), set()
+        else:
+            yield f"api changed {name} rows", (f"{resource.select(resource.default_fields)} "
+                                               f"WHERE ({columns[0]} = %s AND {columns[1]} = %s) "
+                                               f"OR ({columns[0]} = %s AND {columns[1]} = %s)",
+                                               [1, 2, 3, 4]), set()
+    yield "log imported employees", (
+        "SELECT employee_id FROM employees WHERE employee_number IN (%s, %s)", ["E0000001", "E0000002"]), set()
+
+    for name, sql in refdata.LOOKUPS.items():
+        yield f"lookup {name}", (sql, []), set()
+
+    for table, pk in entity_cache.PRIMARY_KEYS.items():
+        yield f"load {table} row", (f"SELECT * FROM {table} WHERE {pk} = %s;", [1]), set()
+
+    for table in soft_delete.CASCADES:
+        for action, step_table, where, lock, change in soft_delete.statements(table, 3):
+            label = f"disable {table}: {action} {step_table}"
+            yield f"{label} (lock)", (lock, [1, 2, 3]), set()
+            if action != "unassign" and step_table in summaries.GROUPS:
+                columns = summaries.GROUPS[step_table][0]
+                # groups the few locked rows by their summary columns
+                yield f"{label} (summary groups)", (
+                    f"SELECT {columns}, COUNT(*) AS row_count FROM {step_table} WHERE {where} GROUP BY {columns}",
+                    [1, 2, 3]), {SORT}
+            yield f"{label} (log)", (f"SELECT {', '.join(changes.KEYS[step_table])} FROM {step_table} "
+                                     f"WHERE {where}", [1, 2, 3]), set()
+            yield label, (change, [1, 2, 3]), set()
+
+    for kind, source in search_index.SOURCES.items():
+        yield f"reindex {kind} row", (source["sql"] + f" WHERE {source['pk']} = %s", [1]), set()
+
+    for employee_id in (None, 7):
+        who = f", employee_id={employee_id}" if employee_id else ""
+        where_parts, params = timeline.FILTERS.build(is_active=1, employee_id=employee_id, due_before="2025-01-01",
+                                                     not_status=summaries.DONE_STATUS)
+        yield from _seek_shapes(f"timeline overdue{who}", timeline.TASKS.sql, where_parts, params,
+                                timeline.KEYSET, ["2024-12-01", 5000])
+        where_parts, params = timeline.FILTERS.build(is_active=1, employee_id=employee_id, due_from="2025-01-06",
+                                                     due_before="2025-01-13")
+        yield (f"timeline week{who}", (f"{timeline.TASKS.sql} {_where(where_parts)} "
+                                       f"ORDER BY {timeline.KEYSET.order_by()}", params), set())
+    where_parts, params = timeline.FILTERS.build(is_active=1, employee_id=7, due_from="2025-01-01",
+                                                 due_before="2025-01-31", not_status=summaries.DONE_STATUS)
+    yield from _seek_shapes("timeline upcoming, employee_id=7", timeline.TASKS.sql, where_parts, params,
+                            timeline.KEYSET, ["2025-01-10", 5000])
+    # groups the overdue range by assignee: O(overdue tasks), not O(tasks)
+    yield "timeline overdue by employee", (timeline.OVERDUE_BY_EMPLOYEE.sql, ["2025-01-01", "Done"]), {SORT}
+
+    # the workload report reads every active employee, membership and open task on purpose,
+    # each in the order of an index so that nothing is sorted
+    yield "workload employees", (workload.EMPLOYEES.sql, []), set()
+    yield "workload memberships", (workload.MEMBERSHIPS.sql, []), {INDEX_SCAN}
+    yield "workload open tasks", (workload.OPEN_TASKS.sql, ["2025-01-01", "Done"]), set()
+
+    yield "members page header", (queries.PROJECT_HEADER.sql, [7]), set()
+    # sorts one project's members (tens of rows) by name after fetching them through the primary key
+    yield "members page members", (queries.PROJECT_MEMBERS.sql, [7]), {SORT}
+    yield "project exists", (queries.PROJECT_EXISTS.sql, [7]), set()
+    yield "current members", ("SELECT employee_id FROM project_members WHERE project_id = %s", [7]), set()
+    yield "lock current members", (
+        "SELECT employee_id FROM project_members WHERE project_id = %s FOR UPDATE", [7]), set()
+    yield "active employees among ids", (
+        "SELECT employee_id FROM employees WHERE is_active = 1 AND employee_id IN (%s, %s, %s)", [1, 2, 3]), set()
+    yield "remove members", (
+        "DELETE FROM project_members WHERE project_id = %s AND employee_id IN (%s, %s)", [7, 1, 2]), set()
+    yield "import duplicate check", ("""
+        SELECT employee_number, email FROM employees
+        WHERE employee_number IN (%s, %s) OR email IN (%s, %s)
+    """, ["E0000001", "E0000002", "employee1@example.com", "x@example.com"]), set()
+
+    yield "lock task for summaries", (
+        "SELECT project_id, task_status, due_date, is_active FROM tasks WHERE task_id = %s FOR UPDATE", [1]), set()
+    yield "lock employee for summaries", (
+        "SELECT department_id, job_title_id, is_active FROM employees WHERE employee_id = %s FOR UPDATE", [1]), set()
+    for table, (columns, count_column, _) in summaries.SUMMARIES.items():
+        where = " AND ".join(f"{c} = %s" for c in columns)
+        sample = {"project_id": 7, "task_status": "Done", "due_date": "2025-01-01", "dimension": "department",
+                  "group_id": 1}
+        yield (f"bump {table}", (f"UPDATE {table} SET {count_column} = {count_column} + %s WHERE {where}",
+                                 [1] + [sample[c] for c in columns]), set())
+
+    yield "bump table versions", ("UPDATE table_versions SET version = version + 1, changed_at = %s "
+                                  "WHERE table_name IN (%s, %s)", [0, "tasks", "projects"]), set()
+    # one row per tracked table, read at most once per HTTP_CACHE_VERSION_TTL
+    yield "read table versions", (http_cache.READ_VERSIONS.sql, []), {SCAN}
+
+    # the dashboard reads every summary group on purpose: that is the O(groups) it is built on
+    yield "dashboard task statuses", (summaries.TASK_STATUS.sql, []), {SCAN}
+    yield "dashboard overdue", (summaries.OVERDUE.sql, ["2025-01-01"]), set()
+    yield "dashboard member counts", (summaries.MEMBER_COUNTS.sql, []), {SCAN}
+    yield "dashboard headcount by department", (summaries.DEPARTMENT_HEADCOUNT.sql, []), {INDEX_SCAN}
+    yield "dashboard headcount by job title", (summaries.JOB_TITLE_HEADCOUNT.sql, []), {INDEX_SCAN}
+
+
+def _where(where_parts):
+    return "WHERE " + " AND ".join(where_parts) if where_parts else ""
+
+
+def explain(cur, sql, params, dialect):
+    """[(plan line, problem or None)] for one statement."""
+    found = []
+    if dialect == "sqlite":
+        cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+        for row in cur.fetchall():
+            detail = row[3]
+            problem = None
+            match = _SQLITE_SCAN_RE.match(detail)
+            if match:
+                problem = INDEX_SCAN if match.group(2) else SCAN
+            elif "USE TEMP B-TREE" in detail:
+                problem = SORT
+            found.append((detail, problem))
+        return found
+
+    cur.execute("EXPLAIN " + sql, params)
+    columns = cur.column_names
+    for values in cur.fetchall():
+        row = dict(zip(columns, values))
+        extra = row.get("Extra") or ""
+        problem = None
+        if row.get("type") == "ALL":
+            problem = SCAN
+        elif row.get("type") == "index":
+            problem = INDEX_SCAN
+        if "Using filesort" in extra or "Using temporary" in extra:
+            problem = SORT
+        found.append((f"{row.get('table')}: type={row.get('type')} key={row.get('key')} {extra}".strip(), problem))
+    return found
+
+
+def check(conn, dialect, verbose=False, out=print):
+    """Explain every query; returns the number of queries with a disallowed plan."""
+    failures = 0
+    cur = conn.cursor()
+    try:
+        for name, (sql, params), allowed in queries():
+            plan = explain(cur, sql, list(params), dialect)
+            bad = [(line, problem) for line, problem in plan if problem and problem not in allowed]
+            if bad:
+                failures += 1
+            if bad or verbose:
+                out(f"{'FAIL' if bad else 'ok  '} {name}")
+                for line, problem in plan:
+                    flag = f"   <-- {problem}" if problem and problem not in allowed else ""
+                    out(f"       {line}{flag}")
+    finally:
+        cur.close()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="migrate.py check", description="EXPLAIN the app's queries.")
+    parser.add_argument("--bench", action="store_true",
+                        help="seed a temporary SQLite benchmark database (default volumes) and check that")
+    parser.add_argument("--db", help="with --bench: SQLite file to seed instead of a temporary one")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan, not just failures")
+    args = parser.parse_args(argv)
+
+    import final_project_db
+    if args.bench:
+        from bench.run import use_sqlite
+        from bench.seed import seed
+        path = args.db or os.path.join(tempfile.mkdtemp(prefix="explain-"), "bench.sqlite3")
+        seed(path)
+        use_sqlite(path, 1)
+    dialect = "sqlite" if final_project_db.DB_BACKEND == "sqlite" else "mysql"
+
+    conn = final_project_db.get_connection()
+    try:
+        failures = check(conn, dialect, verbose=args.verbose)
+    finally:
+        conn.close()
+    total = sum(1 for _ in queries())
+    print(f"{total - failures}/{total} queries have acceptable plans.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""In-process cache for the dropdown lookup lists used by the form pages.
+
+Entries expire after REFDATA_TTL seconds, and the app's own write routes call
+invalidate() after committing so a change shows up on the next page load.
+A route holding a primary connection passes its cursor and the list is
+reloaded on it. Routes that read from a replica call lookup() before they
+borrow their connection: the reload then borrows one of its own, from a
+replica when the TTL ran out and from the primary after an invalidation,
+which a replica may not have caught up with yet. Either way a request never
+holds two pooled connections at once for a reload.
+"""
+import os
+import threading
+import time
+
+import async_db
+from final_project_db import get_connection, get_read_connection, has_replicas
+
+REFDATA_TTL = float(os.environ.get("REFDATA_TTL", 300))  # seconds
+
+LOOKUPS = {
+    "departments": "SELECT department_id, department_name FROM departments WHERE is_active = 1 ORDER BY department_name;",
+    "job_titles": "SELECT job_title_id, title_name FROM job_titles WHERE is_active = 1 ORDER BY title_name;",
+    "clients": "SELECT client_id, client_name FROM clients WHERE is_active=1 ORDER BY client_name;",
+    "projects": "SELECT project_id, project_code, project_name FROM projects WHERE is_active=1 ORDER BY project_code;",
+    "employees": """
+        SELECT employee_id, employee_number, first_name, last_name
+        FROM employees
+        WHERE is_active=1
+        ORDER BY last_name, first_name
+    """,
+}
+
+
+class RefDataCache:
+    """TTL cache of lookup lists with explicit invalidation and hit/miss counters."""
+
+    def __init__(self, ttl=REFDATA_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}      # name -> (rows, expires_at)
+        self._generation = {}   # name -> bumped by invalidate(), guards against stale reloads
+        self._invalidated = set()  # names to reload from the primary
+        self._hits = {}
+        self._misses = {}
+        self._invalidations = {}
+
+    def get(self, name, cur=None):
+        """Return the rows for lookup `name`, querying only on a miss.
+
+        Pass the route's own dictionary cursor, on the primary, to reload
+        through it; without one a connection is borrowed for the reload, so
+        call it before the route borrows its own.
+        """
+        rows, generation = self._cached(name)
+        if rows is not None:
+            return rows
+        rows = self._load(name, cur, primary=name in self._invalidated)
+        self._store(name, rows, generation)
+        return rows
+
+    async def aget(self, name, conn=None):
+        """get() for the ASGI mode: reloads through an async_db connection on the
+        primary, or without one through a connection borrowed like _load() does."""
+        rows, generation = self._cached(name)
+        if rows is not None:
+            return rows
+        if conn is not None:
+            rows = await conn.fetchall(LOOKUPS[name])
+        else:
+            primary = name in self._invalidated or not has_replicas()
+            own = await (async_db.get_connection() if primary else async_db.get_read_connection())
+            try:
+                rows = await own.fetchall(LOOKUPS[name])
+            finally:
+                await own.close()
+        self._store(name, rows, generation)
+        return rows
+
+    def _cached(self, name):
+        """(rows, None) on a hit, (None, generation to store under) on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry[1] > now:
+                self._hits[name] = self._hits.get(name, 0) + 1
+                return entry[0], None
+            self._misses[name] = self._misses.get(name, 0) + 1
+            return None, self._generation.get(name, 0)
+
+    def _store(self, name, rows, generation):
+        with self._lock:
+            # skip the store if a write invalidated this list while we were loading it
+            if self._generation.get(name, 0) == generation:
+                self._entries[name] = (rows, time.monotonic() + self.ttl)
+                self._invalidated.discard(name)
+
+    def _load(self, name, cur, primary=False):
+        sql = LOOKUPS[name]
+        if cur is not None:
+            cur.execute(sql)
+            return cur.fetchall()
+
+        conn = get_connection() if primary or not has_replicas() else get_read_connection()
+        own_cur = conn.cursor(dictionary=True)
+        try:
+            own_cur.execute(sql)
+            return own_cur.fetchall()
+        finally:
+            own_cur.close(); conn.close()
+
+    def invalidate(self, *names):
+        """Evict the named lookups (all of them if no names are given)."""
+        with self._lock:
+            for name in names or list(LOOKUPS):
+                self._entries.pop(name, None)
+                self._generation[name] = self._generation.get(name, 0) + 1
+                self._invalidated.add(name)
+                self._invalidations[name] = self._invalidations.get(name, 0) + 1
+
+    def stats(self):
+        """Per-lookup hit, miss and invalidation counts."""
+        with self._lock:
+            return {
+                name: {
+                    "hits": self._hits.get(name, 0),
+                    "misses": self._misses.get(name, 0),
+                    "invalidations": self._invalidations.get(name, 0),
+                    "cached": name in self._entries,
+                }
+                for name in LOOKUPS
+            }
+
+
+cache = RefDataCache()
+
+
+def lookup(name, cur=None):
+    """Cached rows for one of the LOOKUPS lists."""
+    return cache.get(name, cur)
+
+
+def invalidate(*names):
+    """Evict lookup lists after a write that changes them."""
+    cache.invalidate(*names)
@@ -0,0 +1,325 @@
+"""In-process inverted index for searching employees, clients, projects and tasks.
+
+The index is built from the database on the first search and then kept up
+to date by the app's own write routes (refresh / set_active after commit), so a
+search is a few dictionary lookups instead of a LIKE scan over every table.
+Writes made by other processes are picked up by a full rebuild once the index
+is SEARCH_REBUILD_SECONDS old. That rebuild runs on a background thread while
+searches keep using the current index; the reindexes made meanwhile are
+replayed onto the new index before it is swapped in.
+"""
+import bisect
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+from final_project_db import get_connection
+
+SEARCH_REBUILD_SECONDS = float(os.environ.get("SEARCH_REBUILD_SECONDS", 300))
+
+log = logging.getLogger("final_project_db.search")
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+# kind -> how to load it: SELECT (filtered by WHERE pk = %s when reindexing one row),
+# primary key, searchable fields with their weights, and the display fields
+SOURCES = {
+    "employees": {
+        "sql": """
+            SELECT employee_id, employee_number, first_name, last_name, email, is_active
+            FROM employees
+        """,
+        "pk": "employee_id",
+        "fields": {"first_name": 3.0, "last_name": 3.0, "employee_number": 2.0, "email": 1.0},
+        "title": lambda r: f"{r['last_name']}, {r['first_name']}",
+        "subtitle": lambda r: f"{r['employee_number']} · {r['email']}",
+    },
+    "clients": {
+        "sql": """
+            SELECT client_id, client_name, contact_name, is_active
+            FROM clients
+        """,
+        "pk": "client_id",
+        "fields": {"client_name": 3.0, "contact_name": 1.0},
+        "title": lambda r: r["client_name"],
+        "subtitle": lambda r: r["contact_name"] or "",
+    },
+    "projects": {
+        "sql": """
+            SELECT project_id, project_code, project_name, is_active
+            FROM projects
+        """,
+        "pk": "project_id",
+        "fields": {"project_code": 3.0, "project_name": 2.0},
+        "title": lambda r: f"{r['project_code']} - {r['project_name']}",
+        "subtitle": lambda r: "",
+    },
+    "tasks": {
+        "sql": """
+            SELECT t.task_id, t.task_name, t.is_active, p.project_code
+            FROM tasks t
+            JOIN projects p ON t.project_id = p.project_id
+        """,
+        "pk": "t.task_id",
+        "fields": {"task_name": 2.0},
+        "title": lambda r: r["task_name"],
+        "subtitle": lambda r: r["project_code"],
+    },
+}
+
+
+def tokenize(text):
+    if text is None:
+        return []
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class SearchIndex:
+    """Token -> {(kind, id): weight} postings plus a sorted vocabulary for prefix lookups."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()  # one rebuild at a time
+        self._postings = {}
+        self._vocabulary = []      # sorted tokens, for prefix matches
+        self._docs = {}            # (kind, id) -> {"title", "subtitle", "is_active", "tokens"}
+        self._built_at = None
+        self._generation = 0       # bumped by invalidate()
+        self._journal = None       # changes made while a rebuild reads, replayed before its swap
+        self._rebuilding = False   # a background rebuild is queued or running
+
+    # ---- maintenance ----
+
+    def _add(self, kind, row):
+        source = SOURCES[kind]
+        key = (kind, row[source["pk"].split(".")[-1]])
+        weights = {}
+        for field, weight in source["fields"].items():
+            for token in tokenize(row.get(field)):
+                weights[token] = weights.get(token, 0.0) + weight
+
+        self._remove(key)
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+            postings[key] = weight
+        self._docs[key] = {
+            "title": source["title"](row),
+            "subtitle": source["subtitle"](row),
+            "is_active": bool(row["is_active"]),
+            "tokens": tuple(weights),
+        }
+
+    def _remove(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for token in doc["tokens"]:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[token]
+                    i = bisect.bisect_left(self._vocabulary, token)
+                    if i < len(self._vocabulary) and self._vocabulary[i] == token:
+                        del self._vocabulary[i]
+
+    def _set_active(self, key, is_active):
+        doc = self._docs.get(key)
+        if doc is not None:
+            doc["is_active"] = bool(is_active)
+
+    def _apply(self, change):
+        """Apply one ("add", kind, row) / ("remove", key) / ("active", key, is_active) change."""
+        if change[0] == "add":
+            self._add(change[1], change[2])
+        elif change[0] == "remove":
+            self._remove(change[1])
+        else:
+            self._set_active(change[1], change[2])
+
+    def _record(self, change):
+        with self._lock:
+            self._apply(change)
+            if self._journal is not None:
+                self._journal.append(change)
+
+    def rebuild(self, cur=None):
+        """Reload every searchable row from the database."""
+        with self._build_lock:
+            self._rebuild(cur)
+
+    def _rebuild(self, cur=None):
+        # start the journal before reading: a write committed after our SELECT
+        # has to be replayed, or the new index would bring its old row back
+        with self._lock:
+            self._journal = []
+            generation = self._generation
+        try:
+            conn = None
+            if cur is None:
+                conn = get_connection()
+                cur = conn.cursor(dictionary=True)
+            try:
+                loaded = []
+                for kind, source in SOURCES.items():
+                    cur.execute(source["sql"])
+                    loaded.append((kind, cur.fetchall()))
+            finally:
+                if conn is not None:
+                    cur.close(); conn.close()
+
+            fresh = SearchIndex()
+            for kind, rows in loaded:
+                for row in rows:
+                    fresh._add(kind, row)
+
+            with self._lock:
+                for change in self._journal:
+                    fresh._apply(change)
+                self._postings, self._vocabulary, self._docs = fresh._postings, fresh._vocabulary, fresh._docs
+                # invalidated while reading: the rows may predate it, so build again on the next search
+                self._built_at = time.monotonic() if generation == self._generation else None
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def _rebuild_in_background(self):
+        try:
+            with self._build_lock:
+                if self._stale():
+                    self._rebuild()
+        except Exception:
+            log.exception("Search index rebuild failed; keeping the current index.")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def _stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > SEARCH_REBUILD_SECONDS
+
+    def _ensure_built(self):
+        if self._built_at is None:
+            # nothing to search yet: this request waits for the build
+            with self._build_lock:
+                if self._built_at is None:
+                    self._rebuild()
+        elif self._stale():
+            with self._lock:
+                start = not self._rebuilding
+                self._rebuilding = True
+            if start:
+                threading.Thread(target=self._rebuild_in_background, name="search-rebuild", daemon=True).start()
+
+    def reindex(self, kind, pk, conn):
+        """Refresh one row after an insert or update, reading it on the caller's connection."""
+        if self._built_at is None and self._journal is None:
+            return  # nothing built or being built; the first search loads everything
+        source = SOURCES[kind]
+        cur = conn.cursor(dictionary=True)
+        try:
+            cur.execute(source["sql"] + f" WHERE {source['pk']} = %s", (pk,))
+            row = cur.fetchone()
+        finally:
+            cur.close()
+        self._record(("remove", (kind, pk)) if row is None else ("add", kind, row))
+
+    def set_active(self, kind, pk, is_active):
+        """Record a soft delete / restore without touching the database."""
+        self._record(("active", (kind, pk), is_active))
+
+    def invalidate(self):
+        """Force a full rebuild on the next search (e.g. after a bulk load)."""
+        with self._lock:
+            self._generation += 1
+            self._built_at = None
+
+    # ---- queries ----
+
+    def _matches(self, term):
+        """{key: score} for documents containing `term` exactly or as a prefix."""
+        scores = {}
+        exact = self._postings.get(term, {})
+        for key, weight in exact.items():
+            scores[key] = weight
+        i = bisect.bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(term):
+            token = self._vocabulary[i]
+            if token != term:
+                for key, weight in self._postings[token].items():
+                    # prefix hits count for half, and only the best one per document
+                    scores[key] = max(scores.get(key, 0.0), weight * 0.5)
+            i += 1
+        return scores
+
+    def search(self, query, kinds=None, include_inactive=False, limit=20, offset=0):
+        """Ranked matches for all terms of `query`; returns (total, results)."""
+        terms = tokenize(query)
+        if not terms:
+            return 0, []
+        self._ensure_built()
+
+        with self._lock:
+            total_docs = max(len(self._docs), 1)
+            combined = None
+            for term in terms:
+                matches = self._matches(term)
+                idf = math.log(1 + total_docs / (1 + len(matches)))
+                if combined is None:
+                    combined = {k: s * idf for k, s in matches.items()}
+                else:
+                    combined = {k: combined[k] + s * idf for k, s in matches.items() if k in combined}
+                if not combined:
+                    return 0, []
+
+            hits = []
+            for key, score in combined.items():
+                if kinds and key[0] not in kinds:
+                    continue
+                doc = self._docs[key]
+                if not include_inactive and not doc["is_active"]:
+                    continue
+                hits.append((-score, doc["title"].lower(), key, doc))
+
+        hits.sort()
+        results = [
+            {"type": key[0], "id": key[1], "title": doc["title"], "subtitle": doc["subtitle"],
+             "is_active": doc["is_active"], "score": round(-neg_score, 4)}
+            for neg_score, _, key, doc in hits[offset:offset + limit]
+        ]
+        return len(hits), results
+
+
+index = SearchIndex()
+
+
+def search(query, kinds=None, include_inactive=False, limit=20, offset=0):
+    return index.search(query, kinds, include_inactive, limit, offset)
+
+
+def reindex(kind, pk, conn):
+    index.reindex(kind, pk, conn)
+
+
+def refresh(kind, pk, conn):
+    """reindex() for a row whose change is already committed: a failure is
+    logged and the index rebuilt on the next search, rather than raised into
+    the route that saved it."""
+    try:
+        index.reindex(kind, pk, conn)
+    except Exception:
+        log.exception("Reindexing %s %s failed; rebuilding the search index on the next search.", kind, pk)
+        index.invalidate()
+
+
+def set_active(kind, pk, is_active):
+    index.set_active(kind, pk, is_active)
+
+
+def invalidate():
+    index.invalidate()
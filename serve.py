@@ -0,0 +1,24 @@
+"""Production launcher: app.py on pre-forked gunicorn workers.
+
+    python serve.py                     # settings from gunicorn.conf.py / WEB_* variables
+    python serve.py --workers 8         # any gunicorn option overrides them
+
+`python app.py` remains the single-process development server.
+"""
+import os
+import sys
+
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")
+
+
+def main():
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        raise SystemExit("serve.py requires the 'gunicorn' package.")
+    sys.argv = [sys.argv[0], "-c", CONFIG] + sys.argv[1:]
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Cascading soft deletes, one set-based statement per step.
+
+    report = soft_delete.disable(conn, "clients", [3, 4])              # commits
+    report = soft_delete.disable(conn, "clients", [3, 4], dry_run=True)  # rolls back
+
+Disabling a row also disables or detaches what hangs off it:
+
+    clients    -> their projects -> those projects' tasks
+    projects   -> their tasks
+    employees  -> unassigned from their open (not Done) tasks, removed from project_members
+
+Each step locks its rows with one SELECT, takes them out of the summary tables
+with one grouped read, logs them with one INSERT ... SELECT (see changes.py)
+and changes them with one UPDATE / DELETE, all in one transaction, however
+many rows are involved. Rows that are already inactive
+are left alone, so repeating a disable changes nothing; the dependants of an
+already inactive parent are still cascaded to.
+
+A dry run executes the same statements and rolls back, so its counts and
+timings are those of the real thing.
+"""
+import time
+
+import changes
+import http_cache
+import refdata
+import search_index
+import summaries
+from entity_cache import PRIMARY_KEYS, invalidate_entity
+
+IDS = "{ids}"  # replaced by one %s per id
+
+# action -> (extra condition, change statement)
+ACTIONS = {
+    "disable": ("is_active = 1", "UPDATE {table} SET is_active = 0 WHERE {where}"),
+    "unassign": (f"task_status <> '{summaries.DONE_STATUS}'", "UPDATE {table} SET employee_id = NULL WHERE {where}"),
+    "remove": (None, "DELETE FROM {table} WHERE {where}"),
+}
+
+# action -> the operation it is recorded as in the change log
+LOGGED = {"disable": changes.DISABLE, "unassign": changes.UNASSIGN, "remove": changes.DELETE}
+
+# table disabled -> steps (action, table, key column, condition on the ids)
+CASCADES = {
+    "clients": (
+        ("disable", "clients", "client_id", f"client_id IN ({IDS})"),
+        ("disable", "projects", "project_id", f"client_id IN ({IDS})"),
+        ("disable", "tasks", "task_id", f"project_id IN (SELECT project_id FROM projects WHERE client_id IN ({IDS}))"),
+    ),
+    "projects": (
+        ("disable", "projects", "project_id", f"project_id IN ({IDS})"),
+        ("disable", "tasks", "task_id", f"project_id IN ({IDS})"),
+    ),
+    "tasks": (
+        ("disable", "tasks", "task_id", f"task_id IN ({IDS})"),
+    ),
+    "employees": (
+        ("disable", "employees", "employee_id", f"employee_id IN ({IDS})"),
+        ("unassign", "tasks", "task_id", f"employee_id IN ({IDS})"),
+        ("remove", "project_members", "project_id", f"employee_id IN ({IDS})"),
+    ),
+}
+
+
+def statements(table, count):
+    """(action, step table, where, lock SQL, change SQL) for each step of disabling
+    `count` rows of `table`; every statement takes the ids as its parameters."""
+    for action, step_table, key, condition in CASCADES[table]:
+        extra, change = ACTIONS[action]
+        where = condition.replace(IDS, ", ".join(["%s"] * count))
+        if extra:
+            where = f"{where} AND {extra}"
+        # rows are locked in the order the index is read, the same for any concurrent disable
+        lock = f"SELECT {key} FROM {step_table} WHERE {where} FOR UPDATE"
+        yield action, step_table, where, lock, change.format(table=step_table, where=where)
+
+
+def disable(conn, table, ids, dry_run=False):
+    """Disable the `ids` of `table` with their cascade in one transaction, then
+    commit (or roll back for a dry run). Returns a report:
+
+        {"table", "ids", "dry_run", "ms",
+         "steps": [{"action", "table", "rows", "ms"}, ...]}
+    """
+    ids = sorted({int(i) for i in ids})
+    report = {"table": table, "ids": ids, "dry_run": dry_run, "steps": [], "ms": 0.0}
+    if not ids:
+        return report
+    changed = []  # (action, table, keys)
+    started = time.perf_counter()
+    cur = conn.cursor()
+    try:
+        for action, step_table, where, lock, change in statements(table, len(ids)):
+            step_started = time.perf_counter()
+            cur.execute(lock, ids)
+            keys = [row[0] for row in cur.fetchall()]
+            if keys:
+                if action != "unassign" and step_table in summaries.GROUPS:
+                    summaries.rows_removed(conn, step_table, where, ids)
+                changes.record_where(conn, step_table, LOGGED[action], where, ids)
+                cur.execute(change, ids)
+            report["steps"].append({"action": action, "table": step_table, "rows": len(keys),
+                                    "ms": round((time.perf_counter() - step_started) * 1000, 2)})
+            changed.append((action, step_table, keys))
+        touched = sorted({t for _, t, keys in changed if keys and t in http_cache.TRACKED_TABLES})
+        if touched:
+            http_cache.bump(conn, *touched)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    report["ms"] = round((time.perf_counter() - started) * 1000, 2)
+    if not dry_run:
+        _forget(changed)
+    return report
+
+
+def _forget(changed):
+    """Drop this process's cached copies of the rows a committed disable() changed."""
+    for action, table, keys in changed:
+        if not keys or table not in PRIMARY_KEYS:
+            continue
+        if action == "disable" and table in refdata.LOOKUPS:
+            refdata.invalidate(table)
+        for pk in keys:
+            invalidate_entity(table, pk)
+            if action == "disable":
+                search_index.set_active(table, pk, False)
+
+
+def summary(report):
+    """'2 projects disabled, 40 tasks disabled' for the rows a report cascaded to (beyond the first step)."""
+    words = {"disable": "{n} {table} disabled", "unassign": "{n} {table} unassigned",
+             "remove": "{n} project memberships removed"}
+    parts = [words[s["action"]].format(n=s["rows"], table=s["table"]) for s in report["steps"][1:] if s["rows"]]
+    return ", ".join(parts)
@@ -0,0 +1,140 @@
+"""Local SQLite stand-in for the MySQL server.
+
+Lets the app (and the connection pool) run against a plain SQLite file when
+no MySQL server is available. The wrappers accept the same `%s` placeholders
+and `cursor(dictionary=True)` calls that app.py uses with mysql.connector.
+"""
+import functools
+import os
+import re
+import sqlite3
+import time
+
+# Added to every statement to mimic the network round trip to a MySQL server (benchmarks)
+LATENCY = float(os.environ.get("SQLITE_LATENCY_MS", 0)) / 1000.0
+
+_UNIQUE_RE = re.compile(r"UNIQUE constraint failed: (\S+)")
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql):
+    """Rewrite the MySQL-isms used by this app into SQLite syntax (memoized, the
+    app issues a bounded set of statement texts)."""
+    sql = sql.replace("%s", "?")
+    sql = re.sub(r"\bINSERT\s+IGNORE\b", "INSERT OR IGNORE", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\s+FOR\s+UPDATE\b", "", sql, flags=re.IGNORECASE)  # writes are serialized anyway
+    return sql
+
+
+def _duplicate_error(e):
+    """Re-word SQLite UNIQUE failures like MySQL's 'Duplicate entry' errors,
+    so the route error handling that looks for 'Duplicate' keeps working."""
+    match = _UNIQUE_RE.search(str(e))
+    if not match:
+        return e
+    columns = [c.split(".")[-1] for c in match.group(1).rstrip(",").split(",")]
+    return sqlite3.IntegrityError(
+        f"Duplicate entry for key '{'_'.join(columns)}' ({e})"
+    )
+
+
+class SQLiteCursor:
+    """Cursor wrapper mimicking the parts of MySQLCursor the app relies on."""
+
+    def __init__(self, raw, dictionary=False):
+        self._raw = raw
+        self._dictionary = dictionary
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._raw.description or ())
+
+    @property
+    def description(self):
+        return self._raw.description
+
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._raw.lastrowid
+
+    def execute(self, sql, params=()):
+        if LATENCY:
+            time.sleep(LATENCY)
+        try:
+            self._raw.execute(translate(sql), tuple(params or ()))
+        except sqlite3.IntegrityError as e:
+            raise _duplicate_error(e) from e
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        if LATENCY:
+            time.sleep(LATENCY)
+        try:
+            self._raw.executemany(translate(sql), [tuple(p) for p in seq_of_params])
+        except sqlite3.IntegrityError as e:
+            raise _duplicate_error(e) from e
+        return self
+
+    def fetchone(self):
+        return self._row(self._raw.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(r) for r in self._raw.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(r) for r in self._raw.fetchall()]
+
+    def __iter__(self):
+        return (self._row(r) for r in self._raw)
+
+    def close(self):
+        self._raw.close()
+
+
+class SQLiteConnection:
+    """Connection wrapper mimicking the parts of MySQLConnection the app relies on."""
+
+    def __init__(self, path):
+        self._raw = sqlite3.connect(
+            path,
+            check_same_thread=False,  # pooled connections move between threads
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        self._raw.execute("PRAGMA foreign_keys = ON")
+
+    def cursor(self, dictionary=False, **kwargs):
+        # prepared=True needs nothing extra: sqlite3 keeps compiled statements per connection
+        return SQLiteCursor(self._raw.cursor(), dictionary=dictionary)
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self._raw.execute("SELECT 1").fetchone()
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._raw.close()
+
+
+def connect(path):
+    """Open a SQLite stand-in connection."""
+    return SQLiteConnection(path)
@@ -0,0 +1,291 @@
+"""Summary tables behind the dashboard.
+
+Per-group counts of the base tables, kept current by the task, employee and
+member write routes in the same transaction as their change, so the dashboard
+reads O(groups) rows instead of counting O(rows):
+
+    summary_task_status      active tasks per (project, task_status)
+    summary_task_due         active, not Done tasks per (due_date, project);
+                             overdue = the groups with due_date < today
+    summary_headcount        active employees per department / job title
+    summary_project_members  members per project
+
+The tables are created by migrations/0002_summary_tables.sql.
+
+    python -m summaries rebuild      # recount everything
+"""
+import datetime
+import sys
+from collections import Counter
+
+from queries import Query, fetch_all
+
+TASK_STATUSES = ("To Do", "In Progress", "Blocked", "Done", "Planning")
+DONE_STATUS = "Done"
+
+# table -> (group columns, count column, full recount query)
+SUMMARIES = {
+    "summary_task_status": (("project_id", "task_status"), "task_count", """
+        SELECT project_id, task_status, COUNT(*) FROM tasks
+        WHERE is_active = 1
+        GROUP BY project_id, task_status
+    """),
+    "summary_task_due": (("due_date", "project_id"), "task_count", f"""
+        SELECT due_date, project_id, COUNT(*) FROM tasks
+        WHERE is_active = 1 AND due_date IS NOT NULL AND task_status <> '{DONE_STATUS}'
+        GROUP BY due_date, project_id
+    """),
+    "summary_headcount": (("dimension", "group_id"), "headcount", """
+        SELECT 'department', department_id, COUNT(*) FROM employees WHERE is_active = 1 GROUP BY department_id
+        UNION ALL
+        SELECT 'job_title', job_title_id, COUNT(*) FROM employees WHERE is_active = 1 GROUP BY job_title_id
+    """),
+    "summary_project_members": (("project_id",), "member_count", """
+        SELECT project_id, COUNT(*) FROM project_members GROUP BY project_id
+    """),
+}
+
+# Dashboard reads (prepared, see queries.py)
+TASK_STATUS = Query("dashboard.task_status", """
+    SELECT s.project_id, p.project_code, p.project_name, s.task_status, s.task_count
+    FROM summary_task_status s
+    JOIN projects p ON p.project_id = s.project_id
+    WHERE p.is_active = 1 AND s.task_count > 0
+""")
+
+OVERDUE = Query("dashboard.overdue", """
+    SELECT s.project_id, p.project_code, p.project_name, s.task_count
+    FROM summary_task_due s
+    JOIN projects p ON p.project_id = s.project_id
+    WHERE s.due_date < %s AND p.is_active = 1
+""")
+
+MEMBER_COUNTS = Query("dashboard.member_counts", """
+    SELECT s.project_id, p.project_code, p.project_name, s.member_count
+    FROM summary_project_members s
+    JOIN projects p ON p.project_id = s.project_id
+    WHERE p.is_active = 1 AND s.member_count > 0
+""")
+
+DEPARTMENT_HEADCOUNT = Query("dashboard.department_headcount", """
+    SELECT d.department_id AS group_id, d.department_name AS name, s.headcount
+    FROM summary_headcount s
+    JOIN departments d ON d.department_id = s.group_id
+    WHERE s.dimension = 'department' AND s.headcount > 0
+    ORDER BY d.department_name
+""")
+
+JOB_TITLE_HEADCOUNT = Query("dashboard.job_title_headcount", """
+    SELECT j.job_title_id AS group_id, j.title_name AS name, s.headcount
+    FROM summary_headcount s
+    JOIN job_titles j ON j.job_title_id = s.group_id
+    WHERE s.dimension = 'job_title' AND s.headcount > 0
+    ORDER BY j.title_name
+""")
+
+
+def _day(value):
+    return value.isoformat() if isinstance(value, datetime.date) else value
+
+
+def _task_groups(task):
+    if not task or not int(task["is_active"]):
+        return []
+    groups = [("summary_task_status", (int(task["project_id"]), task["task_status"]))]
+    if task["due_date"] and task["task_status"] != DONE_STATUS:
+        groups.append(("summary_task_due", (_day(task["due_date"]), int(task["project_id"]))))
+    return groups
+
+
+def _employee_groups(employee):
+    if not employee or not int(employee["is_active"]):
+        return []
+    return [("summary_headcount", ("department", int(employee["department_id"]))),
+            ("summary_headcount", ("job_title", int(employee["job_title_id"])))]
+
+
+def _member_groups(member):
+    return [("summary_project_members", (int(member["project_id"]),))]
+
+
+# base table -> (columns its summary groups depend on, groups of a row)
+GROUPS = {
+    "tasks": ("project_id, task_status, due_date, is_active", _task_groups),
+    "employees": ("department_id, job_title_id, is_active", _employee_groups),
+    "project_members": ("project_id", _member_groups),
+}
+
+
+def _apply(conn, deltas):
+    """Add each non-zero delta to its group row, creating the row if needed."""
+    cur = conn.cursor()
+    try:
+        for (table, key), delta in sorted(deltas.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            if not delta:
+                continue
+            columns, count_column, _ = SUMMARIES[table]
+            marks = ", ".join(["%s"] * len(columns))
+            # IGNORE: a concurrent write may create the same group row first
+            cur.execute(f"INSERT IGNORE INTO {table} ({', '.join(columns)}, {count_column}) VALUES ({marks}, 0)",
+                        key)
+            where = " AND ".join(f"{c} = %s" for c in columns)
+            cur.execute(f"UPDATE {table} SET {count_column} = {count_column} + %s WHERE {where}",
+                        (delta,) + tuple(key))
+    finally:
+        cur.close()
+
+
+def _changes(groups_of, before, after):
+    deltas = Counter()
+    for row in before:
+        for group in groups_of(row):
+            deltas[group] -= 1
+    for row in after:
+        for group in groups_of(row):
+            deltas[group] += 1
+    return deltas
+
+
+def locked_task(conn, task_id):
+    """A task's summary columns, locked until commit; read it before changing the task."""
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("""
+            SELECT project_id, task_status, due_date, is_active FROM tasks WHERE task_id = %s FOR UPDATE
+        """, (task_id,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+
+
+def locked_employee(conn, employee_id):
+    """An employee's summary columns, locked until commit; read it before changing the employee."""
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("""
+            SELECT department_id, job_title_id, is_active FROM employees WHERE employee_id = %s FOR UPDATE
+        """, (employee_id,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+
+
+def tasks_changed(conn, before=(), after=()):
+    """Move tasks from their `before` to their `after` state (dicts with project_id,
+    task_status, due_date, is_active; None for a missing side). Call before commit."""
+    _apply(conn, _changes(_task_groups, before, after))
+
+
+def employees_changed(conn, before=(), after=()):
+    """Same as tasks_changed() for employees (department_id, job_title_id, is_active)."""
+    _apply(conn, _changes(_employee_groups, before, after))
+
+
+def rows_removed(conn, table, where, params):
+    """Take the rows of `table` matching `where` out of the summaries with one
+    grouped read, for set-based disables / deletes. Call before changing them."""
+    columns, groups_of = GROUPS[table]
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute(f"SELECT {columns}, COUNT(*) AS row_count FROM {table} WHERE {where} GROUP BY {columns}", params)
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+    deltas = Counter()
+    for row in rows:
+        for group in groups_of(row):
+            deltas[group] -= row["row_count"]
+    _apply(conn, deltas)
+
+
+def members_changed(conn, project_id, delta):
+    """Adjust a project's member count by `delta`. Call before commit."""
+    _apply(conn, Counter({("summary_project_members", (int(project_id),)): delta}))
+
+
+def rebuild(conn, progress=None):
+    """Recount every summary table from the base tables in one transaction.
+    `progress(done, total, table)`, if given, is called after each table;
+    an exception it raises rolls the whole rebuild back."""
+    cur = conn.cursor()
+    try:
+        for done, (table, (columns, count_column, query)) in enumerate(SUMMARIES.items(), 1):
+            cur.execute(f"DELETE FROM {table}")
+            cur.execute(f"INSERT INTO {table} ({', '.join(columns)}, {count_column}) {query}")
+            if progress is not None:
+                progress(done, len(SUMMARIES), table)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def dashboard(conn, today=None):
+    """Everything the dashboard shows, read from the summary tables only."""
+    today = _day(today or datetime.date.today())
+    projects = {}
+
+    def project(row):
+        entry = projects.get(row["project_id"])
+        if entry is None:
+            entry = projects[row["project_id"]] = {
+                "project_id": row["project_id"], "project_code": row["project_code"],
+                "project_name": row["project_name"], "statuses": {}, "open_tasks": 0,
+                "overdue": 0, "members": 0,
+            }
+        return entry
+
+    for row in fetch_all(conn, TASK_STATUS):
+        entry = project(row)
+        entry["statuses"][row["task_status"]] = row["task_count"]
+        if row["task_status"] != DONE_STATUS:
+            entry["open_tasks"] += row["task_count"]
+
+    for row in fetch_all(conn, OVERDUE, (today,)):
+        if row["task_count"]:
+            project(row)["overdue"] += row["task_count"]
+
+    for row in fetch_all(conn, MEMBER_COUNTS):
+        project(row)["members"] = row["member_count"]
+
+    departments = fetch_all(conn, DEPARTMENT_HEADCOUNT)
+    job_titles = fetch_all(conn, JOB_TITLE_HEADCOUNT)
+
+    rows = sorted(projects.values(), key=lambda p: p["project_code"])
+    statuses = Counter()
+    for p in rows:
+        statuses.update(p["statuses"])
+    return {
+        "today": today,
+        "projects": rows,
+        "totals": {
+            "statuses": {s: statuses.get(s, 0) for s in TASK_STATUSES},
+            "open_tasks": sum(p["open_tasks"] for p in rows),
+            "overdue": sum(p["overdue"] for p in rows),
+            "members": sum(p["members"] for p in rows),
+            "headcount": sum(d["headcount"] for d in departments),
+        },
+        "departments": departments,
+        "job_titles": job_titles,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["rebuild"]:
+        print("usage: python -m summaries rebuild")
+        return 2
+    from final_project_db import get_connection
+    conn = get_connection()
+    try:
+        rebuild(conn)
+    finally:
+        conn.close()
+    print("Summary tables rebuilt.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import final_project_db  # noqa: E402
+from bench.seed import seed  # noqa: E402
+
+VOLUMES = {"departments": 3, "job_titles": 4, "employees": 40, "clients": 10, "projects": 12, "members": 3,
+           "tasks": 60}
+
+
+@pytest.fixture(scope="session")
+def seeded(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("seed") / "seed.sqlite3")
+    seed(path, VOLUMES)
+    return path
+
+
+@pytest.fixture
+def db(seeded, tmp_path, monkeypatch):
+    """final_project_db pointed at a fresh copy of the seeded database, with one replica (a copy of it)."""
+    primary, replica = str(tmp_path / "primary.sqlite3"), str(tmp_path / "replica.sqlite3")
+    shutil.copy(seeded, primary)
+    shutil.copy(seeded, replica)
+    monkeypatch.setattr(final_project_db, "DB_BACKEND", "sqlite")
+    monkeypatch.setattr(final_project_db, "SQLITE_PATH", primary)
+    monkeypatch.setattr(final_project_db, "SQLITE_REPLICA_PATHS", [replica])
+    monkeypatch.setitem(final_project_db.POOL_CONFIG, "size", 2)
+    monkeypatch.setitem(final_project_db.POOL_CONFIG, "timeout", 1.0)
+    final_project_db.reset_pool()
+    final_project_db.start_request()
+    yield {"primary": primary, "replica": replica}
+    final_project_db.reset_pool()
@@ -0,0 +1,67 @@
+import changes
+import final_project_db
+
+
+def log(conn, *change_ids):
+    """Commit change_log entries with these ids (tasks updates), as transactions that took them would."""
+    cur = conn.cursor()
+    for change_id in change_ids:
+        cur.execute("INSERT INTO change_log (change_id, table_name, operation, pk, pk2, changed_at) "
+                    "VALUES (%s, 'tasks', 'update', %s, NULL, 0)", (change_id, change_id))
+    conn.commit()
+
+
+def read_all(conn, cursor, limit=2):
+    """Every change_id since() returns from `cursor` until it reports no more, and the final cursor."""
+    read = []
+    while True:
+        entries, more, cursor = changes.since(conn, cursor, limit)
+        read.extend(entry["change_id"] for entry in entries)
+        if not more:
+            return read, cursor
+
+
+def test_late_commit_of_a_lower_id_is_returned_once(db):
+    conn = final_project_db.get_connection()
+    try:
+        start = changes.latest(conn)
+        base = int(start)
+        log(conn, base + 1, base + 3, base + 4)  # base + 2 is still in flight
+        read, cursor = read_all(conn, start)
+        assert read == [base + 1, base + 3, base + 4]
+
+        log(conn, base + 2)  # commits after base + 3 and base + 4 were served
+        read, cursor = read_all(conn, cursor)
+        assert read == [base + 2]
+        assert read_all(conn, cursor)[0] == []
+        assert cursor == str(base + 4)  # nothing left to wait for
+    finally:
+        conn.close()
+
+
+def test_missing_id_is_given_up_after_the_timeout(db, monkeypatch):
+    conn = final_project_db.get_connection()
+    try:
+        base = int(changes.latest(conn))
+        log(conn, base + 2)
+        read, cursor = read_all(conn, str(base))
+        assert read == [base + 2] and cursor != str(base + 2)
+
+        monkeypatch.setattr(changes, "CHANGE_LOG_GAP_TIMEOUT", 0)
+        log(conn, base + 1)  # rolled back, as far as the reader is concerned
+        read, cursor = read_all(conn, cursor)
+        assert read == [] and cursor == str(base + 2)
+    finally:
+        conn.close()
+
+
+def test_latest_remembers_ids_still_in_flight(db):
+    conn = final_project_db.get_connection()
+    try:
+        base = int(changes.latest(conn))
+        log(conn, base + 2)
+        cursor = changes.latest(conn)
+        log(conn, base + 1)
+        assert read_all(conn, cursor)[0] == [base + 1]
+    finally:
+        conn.close()
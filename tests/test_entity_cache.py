@@ -0,0 +1,54 @@
+import re
+import sqlite3
+
+import pytest
+
+import entity_cache
+import final_project_db
+import http_cache
+from app import app
+
+
+@pytest.fixture
+def one_connection(db, monkeypatch):
+    """A pool of one connection, and a version snapshot that is reloaded on every read."""
+    monkeypatch.setitem(final_project_db.POOL_CONFIG, "size", 1)
+    monkeypatch.setitem(final_project_db.POOL_CONFIG, "timeout", 0.2)
+    monkeypatch.setattr(final_project_db, "SQLITE_REPLICA_PATHS", [])
+    monkeypatch.setattr(http_cache.primary_versions, "ttl", 0.0)
+    final_project_db.reset_pool()
+    return db
+
+
+@pytest.mark.parametrize("path", ["/hrm/employees/1/edit", "/pm/clients/1/edit", "/pm/projects/1/edit",
+                                  "/pm/tasks/1/edit"])
+def test_edit_page_needs_only_the_routes_connection(one_connection, path):
+    client = app.test_client()
+    for _ in range(3):  # a miss, then hits whose table version is checked again
+        assert client.get(path).status_code == 200
+    assert final_project_db.pool_stats()["timeouts"] == 0
+    assert final_project_db.pool_stats()["in_use"] == 0
+
+
+def test_row_changed_by_another_worker_is_reloaded(one_connection):
+    client = app.test_client()
+
+    def shown_name():
+        body = client.get("/pm/clients/4/edit").get_data(as_text=True)
+        return re.search(r'name="client_name"[^>]*value="([^"]*)"', body).group(1)
+
+    assert shown_name() == "Client 00004"
+    hits = entity_cache.cache.hits
+    assert shown_name() == "Client 00004"
+    assert entity_cache.cache.hits == hits + 1
+
+    # another process: updates the row and bumps the counter, but cannot evict this process's cache
+    other = sqlite3.connect(one_connection["primary"])
+    other.execute("UPDATE clients SET client_name = 'Changed Elsewhere' WHERE client_id = 4")
+    other.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = 'clients'")
+    other.commit()
+    other.close()
+
+    stale = entity_cache.cache.stale
+    assert shown_name() == "Changed Elsewhere"
+    assert entity_cache.cache.stale == stale + 1
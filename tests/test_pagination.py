@@ -0,0 +1,103 @@
+import base64
+
+import pytest
+
+import final_project_db
+from app import EMPLOYEE_KEYSET, TASK_KEYSET, employee_filters, task_filters
+from pagination import encode_token, fetch_page
+from queries import EMPLOYEES_LIST, TASKS_LIST
+
+LISTS = {
+    "tasks": (TASKS_LIST, TASK_KEYSET, task_filters(None, "all"), "task_id"),
+    "employees": (EMPLOYEES_LIST, EMPLOYEE_KEYSET, employee_filters("all"), "employee_id"),
+}
+PAGE = 7
+
+
+@pytest.fixture
+def conn(db):
+    conn = final_project_db.get_connection()
+    cur = conn.cursor()
+    # ties on every sort column but the last, and tasks without a due date
+    cur.execute("UPDATE employees SET last_name = 'Same', first_name = 'Name' WHERE employee_id <= 10")
+    cur.execute("UPDATE tasks SET due_date = NULL WHERE task_id % 4 = 0")
+    cur.execute("UPDATE tasks SET due_date = '2025-06-01', task_name = 'Same task' WHERE task_id % 4 = 1")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def ordered_ids(conn, name):
+    """Every row's id, in the list's order."""
+    query, keyset, (where_parts, params), id_column = LISTS[name]
+    cur = conn.cursor(dictionary=True)
+    cur.execute(f"{query.sql} WHERE {' AND '.join(where_parts) or '1 = 1'} ORDER BY {keyset.order_by()}", params)
+    return [row[id_column] for row in cur.fetchall()]
+
+
+def page(conn, name, **token):
+    query, keyset, (where_parts, params), id_column = LISTS[name]
+    rows, found = fetch_page(conn.cursor(dictionary=True), query.sql, where_parts, params, keyset, PAGE, **token)
+    return [row[id_column] for row in rows], found
+
+
+@pytest.mark.parametrize("name", LISTS)
+def test_walking_every_page_forward_then_back_sees_each_row_once(conn, name):
+    expected = ordered_ids(conn, name)
+    assert len(expected) > 3 * PAGE
+
+    forward, pages = [], []
+    ids, found = page(conn, name)
+    assert found["prev"] is None
+    while True:
+        forward.extend(ids)
+        pages.append(ids)
+        if found["next"] is None:
+            break
+        ids, found = page(conn, name, after=found["next"])
+    assert forward == expected
+
+    backward = [ids]
+    while found["prev"] is not None:
+        ids, found = page(conn, name, before=found["prev"])
+        backward.insert(0, ids)
+    assert backward == pages
+
+
+def test_tasks_without_a_due_date_come_last_in_their_project(conn):
+    cur = conn.cursor(dictionary=True)
+    cur.execute("SELECT task_id, project_code, due_date FROM tasks")
+    rows = {row["task_id"]: row for row in cur.fetchall()}
+    listed = [rows[task_id] for task_id in ordered_ids(conn, "tasks")]
+    assert any(row["due_date"] is None for row in listed)
+    for before, after in zip(listed, listed[1:]):
+        if before["project_code"] == after["project_code"] and before["due_date"] is None:
+            assert after["due_date"] is None
+
+
+@pytest.mark.parametrize("token", [
+    "not a token",
+    "!!!",
+    encode_token({"last_name": "Same"}),  # not a list
+    encode_token(["Same", 5]),  # too short
+    encode_token([5, "Name", 5]),  # a number where a name goes
+    encode_token([True, "Name", 5]),
+    base64.urlsafe_b64encode(b"[1,2").decode(),  # not JSON
+])
+@pytest.mark.parametrize("direction", ["after", "before"])
+def test_malformed_token_gives_the_first_page(conn, token, direction):
+    first = page(conn, "employees")
+    assert page(conn, "employees", **{direction: token}) == first
+
+
+def test_token_of_a_deleted_row_still_seeks_past_it(conn):
+    first, found = page(conn, "employees")
+    cur = conn.cursor()
+    cur.execute("DELETE FROM project_members WHERE employee_id = %s", (first[-1],))
+    cur.execute("UPDATE tasks SET employee_id = NULL WHERE employee_id = %s", (first[-1],))
+    cur.execute("DELETE FROM employees WHERE employee_id = %s", (first[-1],))
+    conn.commit()
+
+    second, _ = page(conn, "employees", after=found["next"])
+    expected = ordered_ids(conn, "employees")
+    assert second == expected[PAGE - 1:2 * PAGE - 1]
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+import final_project_db
+import sqlite_backend
+from app import app
+from final_project_db import ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "pool.sqlite3")
+    conn = sqlite_backend.connect(path)
+    conn.cursor().execute("CREATE TABLE notes (note TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def count_notes(path):
+    conn = sqlite_backend.connect(path)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM notes")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_acquire_times_out_when_every_connection_is_borrowed(path):
+    pool = ConnectionPool(lambda: sqlite_backend.connect(path), size=1, timeout=0.05)
+    held = pool.acquire()
+    start = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert time.monotonic() - start >= 0.05
+    assert pool.stats()["timeouts"] == 1
+
+    held.close()
+    pool.acquire().close()
+    assert pool.stats()["created"] == 1
+
+
+def test_waiting_acquire_gets_the_released_connection(path):
+    pool = ConnectionPool(lambda: sqlite_backend.connect(path), size=1, timeout=5.0)
+    held = pool.acquire()
+    threading.Timer(0.05, held.close).start()
+    conn = pool.acquire()
+    conn.close()
+    stats = pool.stats()
+    assert stats["timeouts"] == 0
+    assert stats["created"] == 1
+    assert stats["wait_time_max"] >= 0.04
+
+
+def test_connection_is_released_and_rolled_back_when_the_block_raises(path):
+    pool = ConnectionPool(lambda: sqlite_backend.connect(path), size=1, timeout=0.05)
+    with pytest.raises(ValueError):
+        with pool.acquire() as conn:
+            conn.cursor().execute("INSERT INTO notes VALUES ('uncommitted')")
+            raise ValueError("view failed")
+
+    stats = pool.stats()
+    assert (stats["in_use"], stats["idle"]) == (0, 1)
+    assert count_notes(path) == 0
+    pool.acquire().close()  # the slot is free again, not timed out
+
+
+def test_failed_write_route_rolls_back_and_returns_its_connection(db):
+    client = app.test_client()
+    response = client.post("/pm/clients/2/edit", data={"client_name": "Client 00001", "is_active": "1"})
+    assert response.status_code == 200  # the form again, with the error flashed
+
+    stats = final_project_db.pool_stats()
+    assert stats["in_use"] == 0
+    conn = final_project_db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT client_name FROM clients WHERE client_id = %s", (2,))
+        assert cur.fetchone()[0] == "Client 00002"
+    finally:
+        conn.close()
+
+
+class BrokenConnection:
+    """A connection whose rollback fails, as after a lost server connection."""
+
+    def __init__(self):
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        raise OSError("connection lost")
+
+    def close(self):
+        self.closed = True
+
+
+def test_connection_that_cannot_roll_back_is_discarded():
+    opened = []
+
+    def connect():
+        opened.append(BrokenConnection())
+        return opened[-1]
+
+    pool = ConnectionPool(connect, size=1, timeout=0.05)
+    pool.acquire().close()
+    stats = pool.stats()
+    assert (stats["open"], stats["idle"], stats["in_use"]) == (0, 0, 0)
+    assert opened[0].closed
+
+    pool.acquire().close()
+    assert len(opened) == 2
+
+
+def test_failed_connect_gives_its_slot_back(path):
+    attempts = []
+
+    def connect():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise OSError("server unreachable")
+        return sqlite_backend.connect(path)
+
+    pool = ConnectionPool(connect, size=1, timeout=0.05)
+    with pytest.raises(OSError):
+        pool.acquire()
+    assert pool.stats()["open"] == 0
+    pool.acquire().close()
+    assert pool.stats()["timeouts"] == 0
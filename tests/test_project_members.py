@@ -0,0 +1,88 @@
+import pytest
+
+import final_project_db
+import project_members
+from project_members import MembersChanged, apply_members, current_members
+
+
+def logged(conn, operation):
+    cur = conn.cursor()
+    cur.execute("SELECT pk2 FROM change_log WHERE table_name = 'project_members' AND operation = %s AND pk = 1",
+                (operation,))
+    return sorted(row[0] for row in cur.fetchall())
+
+
+def member_count(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT member_count FROM summary_project_members WHERE project_id = 1")
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def add_concurrently(employee_ids, times=1):
+    """Patch _active_employees so another connection adds `employee_ids` to project 1
+    between apply_members' read of the members and its INSERT."""
+    original = project_members._active_employees
+    calls = []
+
+    def racing(cur, ids):
+        if len(calls) < times:
+            calls.append(ids)
+            other = final_project_db.get_connection()
+            try:
+                other.cursor().execute("DELETE FROM project_members WHERE project_id = 1 AND employee_id IN (%s, %s)",
+                                       employee_ids)
+                other.commit()
+                other.cursor().execute("INSERT INTO project_members (project_id, employee_id) VALUES (1, %s), (1, %s)",
+                                       [employee_ids[0], employee_ids[1]])
+                other.commit()
+            finally:
+                other.close()
+        return original(cur, ids)
+
+    return racing
+
+
+def active_outsiders(conn, n):
+    """`n` active employees that are not members of project 1."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT employee_id FROM employees
+        WHERE is_active = 1 AND employee_id NOT IN (SELECT employee_id FROM project_members WHERE project_id = 1)
+        ORDER BY employee_id LIMIT %s
+    """, (n,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def test_members_added_by_a_concurrent_request_are_not_logged(db, monkeypatch):
+    conn = final_project_db.get_connection()
+    try:
+        outsiders = active_outsiders(conn, 4)
+        before_log, before_count = logged(conn, "insert"), member_count(conn)
+        monkeypatch.setattr(project_members, "_active_employees", add_concurrently(outsiders[:2]))
+
+        result = apply_members(conn, 1, outsiders, mode="add")
+
+        assert result["added"] == outsiders[2:]
+        assert logged(conn, "insert") == sorted(before_log + outsiders[2:])
+        assert member_count(conn) == before_count + 2
+        assert set(outsiders) <= current_members(conn.cursor(), 1)
+    finally:
+        conn.close()
+
+
+def test_apply_members_gives_up_when_the_members_keep_changing(db, monkeypatch):
+    conn = final_project_db.get_connection()
+    try:
+        outsiders = active_outsiders(conn, 3)
+        before_log = logged(conn, "insert")
+        monkeypatch.setattr(project_members, "_active_employees",
+                            add_concurrently(outsiders[:2], times=project_members.MEMBER_ATTEMPTS))
+        monkeypatch.setattr(project_members, "current_members", lambda cur, project_id, lock=False: set())
+
+        with pytest.raises(MembersChanged):
+            apply_members(conn, 1, outsiders, mode="add")
+        assert logged(conn, "insert") == before_log
+        assert outsiders[2] not in current_members(conn.cursor(), 1)
+    finally:
+        conn.close()
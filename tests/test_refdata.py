@@ -0,0 +1,36 @@
+import pytest
+
+import final_project_db
+import refdata
+from app import app
+
+
+@pytest.fixture
+def one_connection(db, monkeypatch):
+    """One connection per pool (primary and replica), and every lookup list expired."""
+    monkeypatch.setitem(final_project_db.POOL_CONFIG, "size", 1)
+    monkeypatch.setitem(final_project_db.POOL_CONFIG, "timeout", 0.2)
+    final_project_db.reset_pool()
+    refdata.invalidate()
+    return db
+
+
+@pytest.mark.parametrize("path", ["/pm/tasks?show=all", "/pm/calendar", "/pm/tasks/add", "/hrm/employees/add",
+                                  "/pm/tasks/1/edit", "/pm/projects/1/members"])
+def test_reload_never_needs_a_second_connection(one_connection, path):
+    assert app.test_client().get(path).status_code == 200
+    assert final_project_db.pool_stats()["timeouts"] == 0
+    assert final_project_db.pool_stats()["in_use"] == 0
+
+
+def test_invalidated_list_is_reloaded_from_the_primary(one_connection):
+    client = app.test_client()
+    client.get("/pm/tasks?show=all")  # cache the projects dropdown
+    form = {"project_code": "P000003", "project_name": "Renamed Project", "client_id": "1",
+            "start_date": "", "end_date": "", "status": "Active", "is_active": "1"}
+    assert client.post("/pm/projects/3/edit", data=form).status_code == 302
+
+    # another session, not pinned: the page is read from the (stale) replica, the dropdown from the primary
+    body = app.test_client().get("/pm/tasks?show=all").get_data(as_text=True)
+    assert "Renamed Project" in body
+    assert final_project_db.replica_stats()["replicas"][0]["reads"] > 0
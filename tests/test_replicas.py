@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+import async_db
+import final_project_db
+from app import app
+
+CLIENT_FORM = {"client_name": "Renamed Client", "contact_name": "", "contact_email": "", "contact_phone": "",
+               "is_active": "1"}
+
+
+def read_source():
+    """'primary' or 'replica': where get_read_connection() sends this request's reads."""
+    conn = final_project_db.get_read_connection()
+    try:
+        return "primary" if conn._pool is final_project_db.get_pool() else "replica"
+    finally:
+        conn.close()
+
+
+def replica_reads():
+    return final_project_db.replica_stats()["replicas"][0]["reads"]
+
+
+def test_reads_go_to_a_healthy_replica(db):
+    assert read_source() == "replica"
+    assert replica_reads() == 1
+    assert final_project_db.replica_stats()["fallbacks"] == 0
+
+
+@pytest.mark.parametrize("lag", [60.0, None], ids=["behind", "replication stopped"])
+def test_lagging_replica_falls_back_to_the_primary(db, monkeypatch, lag):
+    monkeypatch.setattr(final_project_db, "_replication_lag", lambda conn: lag)
+    assert read_source() == "primary"
+    assert read_source() == "primary"  # skipped for retry_after, not checked again
+
+    stats = final_project_db.replica_stats()
+    replica = stats["replicas"][0]
+    assert stats["fallbacks"] == 2
+    assert not replica["healthy"]
+    assert (replica["reads"], replica["failures"]) == (0, 1)
+    assert replica["pool"]["in_use"] == 0  # the connection used for the lag check went back
+
+
+def test_replica_is_used_again_once_it_catches_up(db, monkeypatch):
+    monkeypatch.setitem(final_project_db.REPLICA_CONFIG, "retry_after", 0.05)
+    monkeypatch.setitem(final_project_db.REPLICA_CONFIG, "check_interval", 0.0)
+    monkeypatch.setattr(final_project_db, "_replication_lag", lambda conn: 60.0)
+    assert read_source() == "primary"
+
+    monkeypatch.setattr(final_project_db, "_replication_lag", lambda conn: 0.5)
+    time.sleep(0.06)
+    assert read_source() == "replica"
+
+
+def test_unreachable_replica_falls_back_to_the_primary(db, monkeypatch):
+    monkeypatch.setattr(final_project_db, "SQLITE_REPLICA_PATHS", [db["replica"] + ".missing/replica.sqlite3"])
+    final_project_db.reset_pool()
+    assert read_source() == "primary"
+    assert final_project_db.replica_stats()["replicas"][0]["failures"] == 1
+
+
+def test_pinned_request_reads_the_primary(db):
+    final_project_db.start_request(pinned=True)
+    assert read_source() == "primary"
+    stats = final_project_db.replica_stats()
+    assert (stats["fallbacks"], stats["replicas"][0]["reads"]) == (0, 0)
+
+
+def test_session_reads_its_own_write_then_returns_to_the_replica(db, monkeypatch):
+    monkeypatch.setattr(final_project_db, "READ_YOUR_WRITES", 0.2)
+    writer, other = app.test_client(), app.test_client()
+
+    response = writer.post("/pm/clients/3/edit", data=CLIENT_FORM)
+    assert response.status_code == 302
+    with writer.session_transaction() as session:
+        assert session["primary_until"] > time.time()
+
+    # the replica (a copy taken before the write) never sees it; the writer's session is pinned
+    assert "Renamed Client" in writer.get("/pm/clients?show=all&limit=500").get_data(as_text=True)
+    assert replica_reads() == 0
+    assert "Renamed Client" not in other.get("/pm/clients?show=all&limit=500").get_data(as_text=True)
+    assert replica_reads() > 0
+
+    time.sleep(0.25)
+    assert "Renamed Client" not in writer.get("/pm/clients?show=all&limit=500").get_data(as_text=True)
+
+
+def test_no_pinning_without_replicas(db, monkeypatch):
+    monkeypatch.setattr(final_project_db, "SQLITE_REPLICA_PATHS", [])
+    final_project_db.reset_pool()
+    writer = app.test_client()
+    assert writer.post("/pm/clients/3/edit", data=CLIENT_FORM).status_code == 302
+    with writer.session_transaction() as session:
+        assert "primary_until" not in session
+
+
+@pytest.mark.parametrize("lag, source", [(0.5, "replica"), (60.0, "primary"), (None, "primary")],
+                         ids=["healthy", "behind", "replication stopped"])
+def test_async_reads_follow_the_same_rules(db, monkeypatch, lag, source):
+    monkeypatch.setattr(final_project_db, "_lag_from", lambda row: lag)
+
+    async def read_twice():
+        await async_db.reset_pool()
+        try:
+            sources = []
+            for _ in range(2):
+                conn = await async_db.get_read_connection()
+                sources.append("primary" if conn._pool is async_db.get_pool() else "replica")
+                await conn.close()
+            return sources, async_db.get_replicas().stats()
+        finally:
+            await async_db.reset_pool()
+
+    sources, stats = asyncio.run(read_twice())
+    assert sources == [source, source]
+    replica = stats["replicas"][0]
+    assert replica["healthy"] == (source == "replica")
+    assert (replica["reads"], replica["failures"], stats["fallbacks"]) == \
+        ((2, 0, 0) if source == "replica" else (0, 1, 2))
+    assert replica["pool"]["in_use"] == 0
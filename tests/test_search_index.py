@@ -0,0 +1,34 @@
+import final_project_db
+import search_index
+from app import app
+
+TASK_FORM = {"project_id": "1", "employee_id": "", "task_name": "Renamed task", "task_status": "To Do",
+             "due_date": "", "is_active": "1"}
+
+
+def test_failed_reindex_does_not_undo_a_saved_change(db, monkeypatch):
+    client = app.test_client()
+    assert client.get("/search?q=task").status_code == 200  # build the index
+
+    def broken(kind, pk, conn):
+        raise RuntimeError("index unavailable")
+
+    working = search_index.index.reindex
+    monkeypatch.setattr(search_index.index, "reindex", broken)
+    response = client.post("/pm/tasks/1/edit", data=TASK_FORM)
+
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert session["_flashes"] == [("success", "Task updated successfully.")]
+    conn = final_project_db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT task_name FROM tasks WHERE task_id = 1")
+        assert cur.fetchone()[0] == "Renamed task"
+    finally:
+        conn.close()
+
+    # the index is rebuilt from the database, so the next search finds the change
+    monkeypatch.setattr(search_index.index, "reindex", working)
+    body = client.get("/search?q=renamed&type=tasks").get_data(as_text=True)
+    assert "Renamed task" in body
@@ -0,0 +1,96 @@
+import pytest
+
+import final_project_db
+import soft_delete
+
+# every table a disable can touch
+TABLES = ("clients", "projects", "tasks", "employees", "project_members", "change_log", "table_versions",
+          "summary_task_status", "summary_task_due", "summary_headcount", "summary_project_members")
+
+
+@pytest.fixture
+def conn(db):
+    conn = final_project_db.get_connection()
+    yield conn
+    conn.close()
+
+
+def snapshot(conn):
+    cur = conn.cursor()
+    found = {}
+    for table in TABLES:
+        cur.execute(f"SELECT * FROM {table}")
+        found[table] = sorted(map(tuple, cur.fetchall()), key=repr)
+    return found
+
+
+def ids(conn, sql, params=()):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    return sorted(row[0] for row in cur.fetchall())
+
+
+def logged(conn, table, operation):
+    return ids(conn, "SELECT pk FROM change_log WHERE table_name = %s AND operation = %s", (table, operation))
+
+
+def test_dry_run_reports_the_counts_and_changes_nothing(conn):
+    before = snapshot(conn)
+    projects = ids(conn, "SELECT project_id FROM projects WHERE client_id = 1 AND is_active = 1")
+    tasks = ids(conn, "SELECT task_id FROM tasks WHERE is_active = 1 AND project_id IN "
+                      "(SELECT project_id FROM projects WHERE client_id = 1)")
+    assert projects and tasks
+
+    report = soft_delete.disable(conn, "clients", [1], dry_run=True)
+
+    assert report["dry_run"]
+    assert [(s["action"], s["table"], s["rows"]) for s in report["steps"]] == [
+        ("disable", "clients", 1), ("disable", "projects", len(projects)), ("disable", "tasks", len(tasks))]
+    assert snapshot(conn) == before
+    # the real disable reports the same counts
+    real = soft_delete.disable(conn, "clients", [1])
+    assert [s["rows"] for s in real["steps"]] == [s["rows"] for s in report["steps"]]
+
+
+def test_disabling_a_client_cascades_to_its_projects_and_their_tasks(conn):
+    projects = ids(conn, "SELECT project_id FROM projects WHERE client_id = 1 AND is_active = 1")
+    tasks = ids(conn, "SELECT task_id FROM tasks WHERE is_active = 1 AND project_id IN "
+                      "(SELECT project_id FROM projects WHERE client_id = 1)")
+
+    report = soft_delete.disable(conn, "clients", [1])
+
+    assert [s["rows"] for s in report["steps"]] == [1, len(projects), len(tasks)]
+    assert ids(conn, "SELECT client_id FROM clients WHERE client_id = 1 AND is_active = 0") == [1]
+    assert ids(conn, "SELECT project_id FROM projects WHERE client_id = 1 AND is_active = 1") == []
+    assert ids(conn, "SELECT task_id FROM tasks WHERE is_active = 1 AND project_id IN "
+                     "(SELECT project_id FROM projects WHERE client_id = 1)") == []
+    assert logged(conn, "clients", "disable") == [1]
+    assert logged(conn, "projects", "disable") == projects
+    assert logged(conn, "tasks", "disable") == tasks
+
+    # a repeat changes and logs nothing
+    assert [s["rows"] for s in soft_delete.disable(conn, "clients", [1])["steps"]] == [0, 0, 0]
+    assert logged(conn, "tasks", "disable") == tasks
+
+
+def test_disabling_an_employee_unassigns_open_tasks_and_removes_memberships(conn):
+    cur = conn.cursor()
+    cur.execute("UPDATE tasks SET employee_id = 2 WHERE task_id IN (1, 2, 3)")
+    cur.execute("UPDATE tasks SET task_status = 'Done' WHERE task_id = 3")
+    cur.execute("INSERT IGNORE INTO project_members (project_id, employee_id) VALUES (1, 2), (2, 2)")
+    conn.commit()
+    open_tasks = ids(conn, "SELECT task_id FROM tasks WHERE employee_id = 2 AND task_status <> 'Done'")
+    done_tasks = ids(conn, "SELECT task_id FROM tasks WHERE employee_id = 2 AND task_status = 'Done'")
+    projects = ids(conn, "SELECT project_id FROM project_members WHERE employee_id = 2")
+    assert open_tasks and 3 in done_tasks
+
+    report = soft_delete.disable(conn, "employees", [2])
+
+    assert [(s["action"], s["table"], s["rows"]) for s in report["steps"]] == [
+        ("disable", "employees", 1), ("unassign", "tasks", len(open_tasks)),
+        ("remove", "project_members", len(projects))]
+    assert ids(conn, "SELECT task_id FROM tasks WHERE employee_id = 2") == done_tasks  # Done tasks keep theirs
+    assert ids(conn, "SELECT project_id FROM project_members WHERE employee_id = 2") == []
+    assert logged(conn, "employees", "disable") == [2]
+    assert logged(conn, "tasks", "unassign") == open_tasks
+    assert logged(conn, "project_members", "delete") == projects
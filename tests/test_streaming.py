@@ -0,0 +1,57 @@
+import pytest
+
+import final_project_db
+import http_cache
+import metrics
+from app import app
+
+PATH = "/pm/tasks?show=all&limit=50"
+
+
+@pytest.fixture
+def streamed(db, monkeypatch):
+    monkeypatch.setitem(app.config, "STREAM_LIST_PAGES", True)
+    monkeypatch.setitem(app.config, "SQL_DEBUG_PANEL", False)
+    monkeypatch.setattr(http_cache, "pages", None)
+    metrics.registry.reset()
+    return db
+
+
+def test_head_request_returns_its_connection(streamed):
+    response = app.test_client().head(PATH)
+    assert response.status_code == 200
+    assert int(response.headers["Content-Length"]) > 0
+    response.close()
+    assert final_project_db.pool_stats()["in_use"] == 0
+
+
+def test_unread_streamed_page_returns_its_connection(streamed):
+    response = app.test_client().get(PATH)
+    assert response.is_streamed
+    response.close()  # the client went away before the first chunk
+    assert final_project_db.pool_stats()["in_use"] == 0
+
+
+def test_streamed_page_is_timed_to_its_last_chunk(streamed, monkeypatch):
+    client = app.test_client()
+    monkeypatch.setitem(app.config, "STREAM_LIST_PAGES", False)
+    client.get(PATH)  # load the projects dropdown
+    metrics.registry.reset()
+    whole = client.get(PATH)
+    assert "Server-Timing" in whole.headers
+    whole_queries = metrics.registry.snapshot()["pm_tasks_list"].queries
+
+    # the same page streamed: its statements and rendering are counted once the last chunk is out
+    monkeypatch.setitem(app.config, "STREAM_LIST_PAGES", True)
+    metrics.registry.reset()
+    response = client.get(PATH)
+    assert "Server-Timing" not in response.headers
+    assert "pm_tasks_list" not in metrics.registry.snapshot()
+    body = response.get_data(as_text=True)
+    response.close()
+    assert "</html>" in body
+    assert final_project_db.pool_stats()["in_use"] == 0
+    stats = metrics.registry.snapshot()["pm_tasks_list"]
+    assert stats.count == 1
+    assert stats.queries == whole_queries
+    assert stats.render_seconds > 0
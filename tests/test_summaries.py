@@ -0,0 +1,76 @@
+import final_project_db
+import summaries
+from app import app
+
+EMPLOYEE_FORM = {"employee_number": "E-TEST-1", "first_name": "Test", "last_name": "Employee",
+                 "email": "test.employee@example.com", "phone": "", "hire_date": "2025-01-06",
+                 "department_id": "1", "job_title_id": "1", "is_active": "1"}
+TASK_FORM = {"project_id": "1", "employee_id": "", "task_name": "Counted task", "task_status": "To Do",
+             "due_date": "2025-03-01", "is_active": "1"}
+
+
+def summary_rows(conn):
+    """{summary table: sorted rows}, leaving out groups counted down to zero."""
+    cur = conn.cursor()
+    found = {}
+    for table, (columns, count_column, _) in summaries.SUMMARIES.items():
+        cur.execute(f"SELECT {', '.join(columns)}, {count_column} FROM {table} WHERE {count_column} <> 0")
+        found[table] = sorted(tuple(str(value) for value in row) for row in cur.fetchall())
+    return found
+
+
+def one(conn, sql, params=()):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    return cur.fetchone()[0]
+
+
+def test_write_routes_keep_the_summaries_equal_to_a_rebuild(db):
+    conn = final_project_db.get_connection()
+    try:
+        summaries.rebuild(conn)
+    finally:
+        conn.close()
+
+    client = app.test_client()
+    assert client.post("/hrm/employees/add", data=EMPLOYEE_FORM).status_code == 302
+    conn = final_project_db.get_connection()
+    try:
+        employee_id = one(conn, "SELECT employee_id FROM employees WHERE employee_number = 'E-TEST-1'")
+    finally:
+        conn.close()
+    # moved to another department and job title
+    assert client.post(f"/hrm/employees/{employee_id}/edit",
+                       data=dict(EMPLOYEE_FORM, department_id="2", job_title_id="3")).status_code == 302
+
+    assert client.post("/pm/tasks/add", data=dict(TASK_FORM, employee_id=str(employee_id))).status_code == 302
+    assert client.post("/pm/tasks/add", data=dict(TASK_FORM, task_name="Second counted task")).status_code == 302
+    # another project, status and due date; then done (out of the due counts); then disabled
+    assert client.post("/pm/tasks/1/edit", data=dict(TASK_FORM, project_id="2", task_status="Blocked",
+                                                     due_date="2025-04-01")).status_code == 302
+    assert client.post("/pm/tasks/2/edit", data=dict(TASK_FORM, task_status="Done")).status_code == 302
+    assert client.post("/pm/tasks/3/disable").status_code == 302
+
+    # members: bulk add, bulk set, one removed
+    assert client.post("/pm/projects/4/members/bulk",
+                       data={"mode": "add", "employee_ids": ["1", "2", "3", str(employee_id)]}).status_code == 302
+    assert client.post("/pm/projects/5/members/bulk",
+                       data={"mode": "set", "employee_ids": ["4", "5"]}).status_code == 302
+    assert client.post(f"/pm/projects/4/members/{employee_id}/remove").status_code == 302
+
+    # disables that cascade: an employee (unassigned from tasks), a project and a client (their tasks)
+    assert client.post(f"/hrm/employees/{employee_id}/disable").status_code == 302
+    response = client.post("/pm/projects/disable.json", json={"ids": [6, 7]})
+    assert response.status_code == 200 and response.get_json()["steps"][1]["rows"] > 0  # their tasks
+    assert client.post("/pm/clients/2/disable").status_code == 302
+    assert client.post("/pm/tasks/disable.json", json={"ids": [4, 5]}).status_code == 200
+
+    conn = final_project_db.get_connection()
+    try:
+        assert one(conn, "SELECT is_active FROM employees WHERE employee_id = %s", (employee_id,)) == 0
+        assert one(conn, "SELECT task_status FROM tasks WHERE task_id = 2") == "Done"
+        kept = summary_rows(conn)
+        summaries.rebuild(conn)
+        assert kept == summary_rows(conn)
+    finally:
+        conn.close()
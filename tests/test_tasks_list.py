@@ -0,0 +1,59 @@
+import re
+
+import final_project_db
+from app import TASK_KEYSET, app
+from pagination import encode_token
+
+PROJECT_FORM = {"client_id": "1", "project_name": "Project 3", "start_date": "2025-01-01", "end_date": "",
+                "status": "Active", "is_active": "1"}
+
+
+def task_codes(conn):
+    """{task_id: (copied code, project's code)}"""
+    cur = conn.cursor()
+    cur.execute("SELECT t.task_id, t.project_code, p.project_code FROM tasks t "
+                "JOIN projects p ON t.project_id = p.project_id")
+    return {task_id: (copy, code) for task_id, copy, code in cur.fetchall()}
+
+
+def listed_codes(body):
+    return re.findall(r"<td>(P\d{6}|Z\w+)</td>", body)
+
+
+def test_tasks_are_listed_by_project_code(db):
+    body = app.test_client().get("/pm/tasks?show=all&limit=500").get_data(as_text=True)
+    codes = listed_codes(body)
+    assert codes and codes == sorted(codes)
+
+
+def test_task_copy_of_the_project_code_follows_its_project(db):
+    client = app.test_client()
+    assert client.post("/pm/projects/3/edit", data=dict(PROJECT_FORM, project_code="ZZ0003")).status_code == 302
+    form = {"project_id": "3", "employee_id": "", "task_name": "Moved task", "task_status": "To Do",
+            "due_date": "", "is_active": "1"}
+    assert client.post("/pm/tasks/1/edit", data=form).status_code == 302
+    assert client.post("/pm/tasks/add", data=dict(form, task_name="New task")).status_code == 302
+
+    conn = final_project_db.get_connection()
+    try:
+        codes = task_codes(conn)
+    finally:
+        conn.close()
+    assert all(copy == code for copy, code in codes.values())
+    assert codes[1] == ("ZZ0003", "ZZ0003")
+
+    # the renamed project's tasks now come last
+    body = client.get("/pm/tasks?show=all&limit=500").get_data(as_text=True)
+    assert listed_codes(body)[-1] == "ZZ0003"
+
+
+def test_token_of_another_type_shows_the_first_page(db):
+    client = app.test_client()
+    first = client.get("/pm/tasks?show=all&limit=5").get_data(as_text=True)
+    # issued while the list was ordered by project id
+    stale = encode_token([7, 0, "2025-01-01", "Review item 5", 5])
+    response = client.get(f"/pm/tasks?show=all&limit=5&after={stale}")
+    assert response.status_code == 200
+    assert listed_codes(response.get_data(as_text=True)) == listed_codes(first)
+    assert not TASK_KEYSET.accepts([7, 0, "2025-01-01", "Review item 5", 5])
+    assert TASK_KEYSET.accepts(["P000007", 1, None, "Review item 5", 5])
@@ -0,0 +1,94 @@
+"""Task timeline: overdue, due in a date range and upcoming per employee.
+
+    rows, page = timeline.overdue(conn, today, employee_id=7, limit=50)
+    rows, page = timeline.upcoming(conn, 7, today, days=30)
+    rows = timeline.due_between(conn, monday, monday + datetime.timedelta(days=7))
+
+Every query is a range seek on a due-date index (migration 0007): active
+tasks by (is_active, due_date), one employee's by (employee_id, is_active,
+due_date). Rows come off the index in (due_date, task_id) order, so nothing
+is sorted and tasks outside the date range are never read. Overdue and
+upcoming lists are paged with the keyset tokens of pagination.py.
+"""
+import datetime
+from collections import OrderedDict
+
+from pagination import Keyset, page_query, page_rows
+from queries import Filters, Query, fetch_all
+from summaries import DONE_STATUS
+
+TASKS = Query("timeline.tasks", """
+    SELECT t.task_id, t.task_name, t.task_status, t.due_date, t.is_active,
+           t.project_id, p.project_code, p.project_name,
+           t.employee_id, e.first_name, e.last_name
+    FROM tasks t
+    JOIN projects p ON p.project_id = t.project_id
+    LEFT JOIN employees e ON e.employee_id = t.employee_id
+""")
+OVERDUE_BY_EMPLOYEE = Query("timeline.overdue_by_employee", """
+    SELECT t.employee_id, e.first_name, e.last_name, COUNT(*) AS overdue, MIN(t.due_date) AS oldest_due
+    FROM tasks t
+    LEFT JOIN employees e ON e.employee_id = t.employee_id
+    WHERE t.is_active = 1 AND t.due_date < %s AND t.task_status <> %s
+    GROUP BY t.employee_id, e.first_name, e.last_name
+""")
+
+KEYSET = Keyset(("t.due_date", "due_date", str), ("t.task_id", "task_id", int))
+FILTERS = Filters(
+    is_active="t.is_active = %s",
+    employee_id="t.employee_id = %s",
+    due_from="t.due_date >= %s",
+    due_before="t.due_date < %s",
+    not_status="t.task_status <> %s",
+)
+
+
+def week_start(day):
+    """The Monday of `day`'s week."""
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def _page(conn, where, limit, after=None, before=None):
+    where_parts, params = where
+    sql, params, state = page_query(TASKS.sql, where_parts, params, KEYSET, limit, after, before)
+    return page_rows(fetch_all(conn, TASKS, params, sql=sql), KEYSET, state)
+
+
+def overdue(conn, today, employee_id=None, limit=50, after=None, before=None):
+    """(rows, page) of the open active tasks due before `today`, oldest first."""
+    where = FILTERS.build(is_active=1, employee_id=employee_id, due_before=today.isoformat(),
+                          not_status=DONE_STATUS)
+    return _page(conn, where, limit, after, before)
+
+
+def overdue_by_employee(conn, today):
+    """Overdue task counts per assignee (employee_id None: unassigned), most overdue first."""
+    rows = fetch_all(conn, OVERDUE_BY_EMPLOYEE, (today.isoformat(), DONE_STATUS))
+    return sorted(rows, key=lambda r: (-r["overdue"], r["last_name"] or "", r["first_name"] or ""))
+
+
+def upcoming(conn, employee_id, today, days=30, limit=50, after=None, before=None):
+    """(rows, page) of an employee's open active tasks due in the next `days` days, soonest first."""
+    where = FILTERS.build(is_active=1, employee_id=employee_id, due_from=today.isoformat(),
+                          due_before=(today + datetime.timedelta(days=days)).isoformat(), not_status=DONE_STATUS)
+    return _page(conn, where, limit, after, before)
+
+
+def due_between(conn, start, end, employee_id=None):
+    """Active tasks (Done included) due on or after `start` and before `end`."""
+    where_parts, params = FILTERS.build(is_active=1, employee_id=employee_id,
+                                        due_from=start.isoformat(), due_before=end.isoformat())
+    sql = f"{TASKS.sql} WHERE {' AND '.join(where_parts)} ORDER BY {KEYSET.order_by()}"
+    return fetch_all(conn, TASKS, params, sql=sql)
+
+
+def week(conn, start, employee_id=None):
+    """{day: [tasks due that day]} for the seven days from `start`, every day present."""
+    days = OrderedDict((start + datetime.timedelta(days=i), []) for i in range(7))
+    for row in due_between(conn, start, start + datetime.timedelta(days=7), employee_id):
+        days[_date(row["due_date"])].append(row)
+    return days
+
+
+def _date(value):
+    return value if isinstance(value, datetime.date) else datetime.date.fromisoformat(str(value)[:10])
@@ -0,0 +1,143 @@
+"""Per-worker stats for the pre-fork launcher (see gunicorn.conf.py).
+
+Each worker process keeps its own counters and writes them as a small JSON
+file to WORKER_STATS_DIR at most every WORKER_STATS_INTERVAL seconds, so any
+worker can answer /workers.json with a view of all of them.
+"""
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+
+from final_project_db import pool_stats
+
+WORKER_STATS_DIR = os.environ.get("WORKER_STATS_DIR",
+                                  os.path.join(tempfile.gettempdir(), "final_project_db_workers"))
+WORKER_STATS_INTERVAL = float(os.environ.get("WORKER_STATS_INTERVAL", 5))  # seconds between writes
+
+
+class WorkerStats:
+    """Counters of the current worker process."""
+
+    def __init__(self, directory=WORKER_STATS_DIR, interval=WORKER_STATS_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.pid = None
+
+    def start(self, age=None, max_requests=None):
+        """Begin counting in a freshly forked worker (`age` is gunicorn's worker generation)."""
+        with self._lock:
+            self.pid = os.getpid()
+            self.age = age
+            self.max_requests = max_requests
+            self.started = time.time()
+            self.requests = 0
+            self.statuses = {}
+            self.last_request = None
+            self._written = 0.0
+        self.flush()
+
+    def request_finished(self, status):
+        if self.pid is None:
+            return
+        now = time.time()
+        with self._lock:
+            self.requests += 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.last_request = now
+            due = now - self._written >= self.interval
+        if due:
+            self.flush()
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            return {
+                "pid": self.pid,
+                "age": self.age,
+                "started": self.started,
+                "uptime": round(time.time() - self.started, 3),
+                "requests": self.requests,
+                "max_requests": self.max_requests,
+                "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+                "last_request": self.last_request,
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                "pool": pool,
+                "updated": time.time(),
+            }
+
+    def flush(self):
+        """Write this worker's snapshot (atomically replacing the previous one)."""
+        if self.pid is None:
+            return
+        data = self.snapshot(pool_stats(create=False))  # never open a pool just to report on it
+        os.makedirs(self.directory, exist_ok=True)
+        path = _path(self.directory, self.pid)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self._written = time.time()
+
+    def stop(self):
+        if self.pid is not None:
+            remove(self.pid, self.directory)
+            self.pid = None
+
+
+def _path(directory, pid):
+    return os.path.join(directory, f"worker-{pid}.json")
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def remove(pid, directory=WORKER_STATS_DIR):
+    try:
+        os.remove(_path(directory, pid))
+    except FileNotFoundError:
+        pass
+
+
+def clear(directory=WORKER_STATS_DIR):
+    """Drop snapshots left over from an earlier run."""
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith("worker-"):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def read_all(directory=WORKER_STATS_DIR):
+    """Snapshots of the live workers, oldest first."""
+    workers = []
+    if not os.path.isdir(directory):
+        return workers
+    for name in os.listdir(directory):
+        if not (name.startswith("worker-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if _alive(data["pid"]):
+            workers.append(data)
+    workers.sort(key=lambda w: w["started"])
+    return workers
+
+
+current = WorkerStats()
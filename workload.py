@@ -0,0 +1,212 @@
+"""Workload report: project memberships, open tasks by status and overdue tasks
+for every active employee.
+
+    report = workload.build(conn)            # today's report
+    for chunk in report.csv_chunks(): ...    # or: python -m workload [--out FILE]
+
+Three grouped queries, however many employees there are:
+
+    employees  the active employees, in list order (last name, first name)
+    members    active project memberships per employee
+    tasks      active open tasks per (employee, status), with the overdue ones summed
+
+The grouped rows are scattered into count columns aligned with the employee
+list in a few vectorized steps: each group's position comes from a binary
+search of the sorted employee ids, and each column is one bincount over the
+positions. With NumPy installed the columns are NumPy arrays; without it
+they are stdlib arrays filled by a loop over the groups. Groups of employees
+that are no longer active (e.g. tasks still assigned to them) are dropped.
+"""
+import argparse
+import csv
+import datetime
+import io
+import sys
+import time
+from array import array
+
+from queries import Query, fetch_all
+from summaries import DONE_STATUS, TASK_STATUSES
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CSV_BATCH_SIZE = 5000  # rows per encoded chunk
+
+EMPLOYEES = Query("workload.employees", """
+    SELECT e.employee_id, e.employee_number, e.last_name, e.first_name, d.department_name, j.title_name
+    FROM employees e
+    JOIN departments d ON d.department_id = e.department_id
+    JOIN job_titles j ON j.job_title_id = e.job_title_id
+    WHERE e.is_active = 1
+    ORDER BY e.last_name, e.first_name, e.employee_id
+""")
+MEMBERSHIPS = Query("workload.memberships", """
+    SELECT pm.employee_id, COUNT(*)
+    FROM project_members pm
+    JOIN projects p ON p.project_id = pm.project_id
+    WHERE p.is_active = 1
+    GROUP BY pm.employee_id
+""")
+OPEN_TASKS = Query("workload.open_tasks", """
+    SELECT employee_id, task_status, COUNT(*), COUNT(CASE WHEN due_date < %s THEN 1 END)
+    FROM tasks
+    WHERE is_active = 1 AND employee_id IS NOT NULL AND task_status <> %s
+    GROUP BY employee_id, task_status
+""")
+
+COLUMNS = ("employee_id", "employee_number", "last_name", "first_name", "department", "job_title")
+
+
+class Workload:
+    """The report: `employees` (tuples of COLUMNS, in list order) and
+    count columns aligned with them: `projects`, `open_tasks`, `overdue`
+    and `by_status[status]`."""
+
+    def __init__(self, today, employees, projects, open_tasks, overdue, by_status, seconds):
+        self.today = today
+        self.employees = employees
+        self.projects = projects
+        self.open_tasks = open_tasks
+        self.overdue = overdue
+        self.by_status = by_status
+        self.seconds = seconds
+
+    @property
+    def statuses(self):
+        return list(self.by_status)
+
+    def header(self):
+        return list(COLUMNS) + ["projects", "open_tasks"] + self.statuses + ["overdue"]
+
+    def rows(self):
+        """Report rows, matching header()."""
+        counts = [self.projects, self.open_tasks] + list(self.by_status.values()) + [self.overdue]
+        if numpy is not None:
+            counts = [column.tolist() for column in counts]
+        for employee, *values in zip(self.employees, *counts):
+            yield employee + tuple(values)
+
+    def csv_chunks(self, batch_size=CSV_BATCH_SIZE):
+        """The report as CSV text, `batch_size` rows per chunk."""
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(self.header())
+        batch = []
+        for row in self.rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.writerows(batch)
+                batch = []
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        writer.writerows(batch)
+        yield buf.getvalue()
+
+    def totals(self):
+        """{"employees", "projects", "open_tasks", "overdue", "by_status": {...}} summed over everyone."""
+        return {"employees": len(self.employees), "projects": int(sum(self.projects)),
+                "open_tasks": int(sum(self.open_tasks)), "overdue": int(sum(self.overdue)),
+                "by_status": {s: int(sum(c)) for s, c in self.by_status.items()}}
+
+
+def build(conn, today=None):
+    """Run the grouped queries and combine them into a Workload."""
+    today = today or datetime.date.today()
+    started = time.perf_counter()
+    employees = [tuple(row) for row in fetch_all(conn, EMPLOYEES, dictionary=False)]
+    memberships = fetch_all(conn, MEMBERSHIPS, dictionary=False)
+    tasks = fetch_all(conn, OPEN_TASKS, (today.isoformat(), DONE_STATUS), dictionary=False)
+
+    size = len(employees)
+    locate = _locator([row[0] for row in employees])
+    projects = _scatter(size, locate([r[0] for r in memberships]), [r[1] for r in memberships])
+    positions = locate([r[0] for r in tasks])
+    counts = _ints([r[2] for r in tasks])
+    open_tasks = _scatter(size, positions, counts)
+    overdue = _scatter(size, positions, [r[3] for r in tasks])
+
+    # one scatter into a (employee, status) grid, row-major; status j's column is grid[j::width]
+    found = {r[1] for r in tasks}
+    statuses = [s for s in TASK_STATUSES if s in found] + sorted(found - set(TASK_STATUSES))
+    width = len(statuses) or 1
+    code = {status: j for j, status in enumerate(statuses)}
+    grid = _scatter(size * width, _cells(positions, [code[r[1]] for r in tasks], width), counts)
+    by_status = {status: grid[j::width] for j, status in enumerate(statuses)}
+    return Workload(today, employees, projects, open_tasks, overdue, by_status, time.perf_counter() - started)
+
+
+def _ints(values):
+    if numpy is not None:
+        return numpy.asarray(values, dtype=numpy.int64)
+    return array("q", values)
+
+
+def _cells(positions, codes, width):
+    """Grid cell of each (position, code) pair (-1 where the position is)."""
+    if numpy is not None:
+        return numpy.where(positions >= 0, positions * width + _ints(codes), -1)
+    return array("q", (p * width + c if p >= 0 else -1 for p, c in zip(positions, codes)))
+
+
+def _locator(ids):
+    """A function mapping employee ids to their index in `ids` (-1 if absent)."""
+    if numpy is not None:
+        ids = _ints(ids)
+        order = numpy.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+
+        def locate(keys):
+            keys = _ints(keys)
+            if not len(sorted_ids):
+                return numpy.full(len(keys), -1, dtype=numpy.int64)
+            at = numpy.searchsorted(sorted_ids, keys).clip(0, len(sorted_ids) - 1)
+            return numpy.where(sorted_ids[at] == keys, order[at], -1)
+        return locate
+
+    index = {employee_id: i for i, employee_id in enumerate(ids)}
+    return lambda keys: array("q", (index.get(key, -1) for key in keys))
+
+
+def _scatter(size, positions, values):
+    """A column of `size` counts: each value added at its position (-1: dropped)."""
+    if numpy is not None:
+        values = _ints(values)
+        kept = positions >= 0
+        return numpy.bincount(positions[kept], weights=values[kept], minlength=size).astype(numpy.int64)
+    column = array("q", bytes(8 * size))
+    for position, value in zip(positions, values):
+        if position >= 0:
+            column[position] += value
+    return column
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m workload", description="Write the workload report as CSV.")
+    parser.add_argument("--out", help="file to write (default: standard output)")
+    parser.add_argument("--today", help="YYYY-MM-DD that overdue is counted against (default: today)")
+    args = parser.parse_args(argv)
+
+    from final_project_db import get_connection
+    today = datetime.date.fromisoformat(args.today) if args.today else None
+    conn = get_connection()
+    try:
+        report = build(conn, today)
+    finally:
+        conn.close()
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    try:
+        for chunk in report.csv_chunks():
+            out.write(chunk)
+    finally:
+        if args.out:
+            out.close()
+    print(f"{len(report.employees)} employees in {report.seconds:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())